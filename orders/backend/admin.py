@@ -1,7 +1,7 @@
 from django.contrib import admin
 
 from .models import (User, Shop, Category, Model, ProductInfo,
-                     Parameter, ProductParameter, Order, OrderItem, Contact, DeliveryAddress)
+                     Parameter, ProductParameter, Order, OrderItem, Contact, DeliveryAddress, ImportJob)
 
 
 class CategoryInline(admin.TabularInline):
@@ -26,6 +26,11 @@ class ProductInfoAdmin(admin.ModelAdmin):
     list_display = ('product_name', 'model', 'shop', 'quantity', 'price', 'rrp',)
 
 
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ('file', 'shop', 'status', 'rows', 'seconds', 'created_at', 'finished_at', )
+
+
 @admin.register(ProductParameter)
 class ProductParameterAdmin(admin.ModelAdmin):
     list_display = ('product_info', 'parameter', 'value', )
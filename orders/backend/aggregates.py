@@ -0,0 +1,27 @@
+from django.db.models import Aggregate, JSONField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import ProductParameter
+
+
+class JSONBObjectAgg(Aggregate):
+    """
+    Postgres jsonb_object_agg(key, value): one JSON object built of the key/value pairs of a group
+    """
+    function = 'JSONB_OBJECT_AGG'
+    output_field = JSONField()
+
+    def __init__(self, key, value, **extra):
+        super().__init__(key, value, **extra)
+
+
+def parameters_map(product_info_ref='pk'):
+    """
+    Subquery of the parameters of a product as a {name: value} object, {} for products without parameters
+    """
+    parameters = (ProductParameter.objects
+                  .filter(product_info=OuterRef(product_info_ref))
+                  .values('product_info')
+                  .annotate(parameters=JSONBObjectAgg('parameter__name', 'value'))
+                  .values('parameters'))
+    return Coalesce(Subquery(parameters), Value({}, output_field=JSONField()))
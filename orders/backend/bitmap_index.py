@@ -0,0 +1,266 @@
+import heapq
+import threading
+
+from django.conf import settings
+from rest_framework.exceptions import ValidationError
+
+from . import catalog_cache
+from .filters import PARAMETER_QUERY_PARAM, parameter_constraints
+from .models import CatalogEntry
+
+# Query parameters the index can answer, anything else (search, price, facets, other orderings) goes to SQL
+NAMED_FIELDS = ('shop', 'category', 'model')
+INDEXED_PARAMS = {*NAMED_FIELDS, *(f'{field}_id' for field in NAMED_FIELDS),
+                  'parameter_name', 'parameter_value', 'cursor', 'page_size', 'ordering', 'fields',
+                  'format'}
+LOAD_CHUNK_SIZE = 10000
+
+BYTE_BITS = [tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256)]
+
+
+def bit_positions(bitmap):
+    """
+    Positions of the set bits of an integer bitmap in ascending order
+    """
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+    for index, byte in enumerate(data):
+        if byte:
+            base = index * 8
+            for bit in BYTE_BITS[byte]:
+                yield base + bit
+
+
+def make_bitmap(positions):
+    data = bytearray(max(positions) // 8 + 1)
+    for position in positions:
+        data[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(data, 'little')
+
+
+class BitmapIndex:
+    """
+    In-process index of catalog entries for filtering without SQL.
+
+    Every product gets a dense position, and every shop, category, model and (parameter, value) pair
+    has a bitmap (a Python integer) with the bits of its products set. Filters are answered by OR within
+    a filter and AND between filters, then only the page of product ids is read from the database.
+
+    A shop is loaded from its catalog entries once. Then every bump of its catalog version patches only the products
+    logged with the bump, so changes made by any process are picked up on the next request; the shop is reloaded
+    only when the log is lost. Entries are read before the lock is taken, requests are answered meanwhile.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sync_lock = threading.Lock()
+        self.positions = {}
+        self.ids = []
+        # Bitmap keys of the product at every position, to clear its bits when it changes
+        self.keys = []
+        # Positions of removed products, reused by new ones
+        self.free = []
+        self.live = 0
+        self.bitmaps = {}
+        self.interned = {}
+        self.names = {field: {} for field in NAMED_FIELDS}
+        self.shops = {}
+
+    def synchronise(self):
+        """
+        Patching shops whose catalog version has changed since they were loaded and dropping deleted shops.
+        One thread synchronises at a time, the others wait and then find the index current.
+        """
+        with self.sync_lock:
+            versions = catalog_cache.shop_versions(catalog_cache.shop_names())
+            for shop_id in set(self.shops) - set(versions):
+                self.apply(self.shop_products(shop_id), [])
+                with self.lock:
+                    self.shops.pop(shop_id, None)
+                    self.names['shop'].pop(shop_id, None)
+
+            for shop_id, version in versions.items():
+                loaded = self.shops.get(shop_id)
+                if loaded == version:
+                    continue
+                product_ids = None
+                if loaded is not None:
+                    product_ids = catalog_cache.changed_products(shop_id, loaded, version)
+                if product_ids is None:
+                    # The version is read before the entries, so a change committed meanwhile is patched next time
+                    self.apply(self.shop_products(shop_id), entry_rows(shop_id=shop_id))
+                elif product_ids:
+                    self.apply(product_ids, entry_rows(product_id__in=product_ids))
+                self.shops[shop_id] = version
+
+    def shop_products(self, shop_id):
+        return {self.ids[position] for position in bit_positions(self.bitmaps.get(('shop', shop_id), 0))}
+
+    def intern(self, key):
+        return self.interned.setdefault(key, key)
+
+    def apply(self, product_ids, rows):
+        """
+        Replacing the indexed products with their catalog entry rows, products without a row are removed.
+        Only the bitmaps of keys a product leaves or joins are rewritten.
+        """
+        new_keys = {}
+        names = {field: {} for field in NAMED_FIELDS}
+        for product_id, shop_id, shop_name, category_id, category_name, model_id, model_name, parameters in rows:
+            names['shop'][shop_id] = shop_name
+            names['category'][category_id] = category_name
+            names['model'][model_id] = model_name
+            new_keys[product_id] = tuple(self.intern(key) for key in [
+                ('shop', shop_id), ('category', category_id), ('model', model_id),
+                *(('param', name, str(value)) for name, value in (parameters or {}).items())])
+
+        with self.lock:
+            cleared, added = {}, {}
+            removed, present, freed = [], [], []
+            for product_id in set(product_ids) | set(new_keys):
+                position = self.positions.get(product_id)
+                old, new = (self.keys[position] if position is not None else ()), new_keys.get(product_id)
+                if old == new or position is None and new is None:
+                    continue
+                if position is None:
+                    position = self.position(product_id)
+                for key in old:
+                    cleared.setdefault(key, []).append(position)
+                if new is None:
+                    del self.positions[product_id]
+                    self.ids[position] = self.keys[position] = None
+                    removed.append(position)
+                    freed.append(position)
+                else:
+                    for key in new:
+                        added.setdefault(key, []).append(position)
+                    self.keys[position] = new
+                    present.append(position)
+
+            for key in cleared.keys() | added.keys():
+                bitmap = self.bitmaps.get(key, 0)
+                if key in cleared:
+                    bitmap &= ~make_bitmap(cleared[key])
+                if key in added:
+                    bitmap |= make_bitmap(added[key])
+                if bitmap:
+                    self.bitmaps[key] = bitmap
+                else:
+                    self.bitmaps.pop(key, None)
+                    self.interned.pop(key, None)
+            if removed:
+                self.live &= ~make_bitmap(removed)
+            if present:
+                self.live |= make_bitmap(present)
+            self.free += freed
+            for field in NAMED_FIELDS:
+                self.names[field].update(names[field])
+
+    def position(self, product_id):
+        position = self.positions.get(product_id)
+        if position is None:
+            if self.free:
+                position = self.free.pop()
+                self.ids[position] = product_id
+            else:
+                position = len(self.ids)
+                self.ids.append(product_id)
+                self.keys.append(())
+            self.positions[product_id] = position
+        return position
+
+    def named(self, field, value):
+        """
+        Union of the bitmaps of shops, categories or models whose name contains the value, like icontains
+        """
+        value = value.casefold()
+        bitmap = 0
+        for key_id, name in self.names[field].items():
+            if value in name.casefold():
+                bitmap |= self.bitmaps.get((field, key_id), 0)
+        return bitmap
+
+    def match(self, params):
+        """
+        Bitmap of the products matching the query parameters
+        """
+        with self.lock:
+            return self.matching(params)
+
+    def matching(self, params):
+        constraints = parameter_constraints(params)
+        bitmap = self.live
+        for field in NAMED_FIELDS:
+            if params.get(field):
+                bitmap &= self.named(field, params.get(field))
+            if params.get(f'{field}_id'):
+                bitmap &= self.bitmaps.get((field, int(params.get(f'{field}_id'))), 0)
+        for name, values in constraints.items():
+            union = 0
+            for value in values:
+                union |= self.bitmaps.get(('param', name, value), 0)
+            bitmap &= union
+            if not bitmap:
+                break
+        return bitmap
+
+    def page(self, params, after=None, limit=21):
+        """
+        The smallest `limit` product ids after the cursor among the products matching the query parameters.
+        Matching and reading ids take one lock, as positions of removed products are reused.
+        """
+        with self.lock:
+            ids = self.ids
+            matching = (ids[position] for position in bit_positions(self.matching(params)))
+            if after is not None:
+                matching = (product_id for product_id in matching if product_id > after)
+            return heapq.nsmallest(limit, matching)
+
+
+def entry_rows(**filters):
+    return (CatalogEntry.objects.filter(**filters)
+            .values_list('product_id', 'shop_id', 'shop_name', 'category_id', 'category_name', 'model_id',
+                         'model_name', 'parameters')
+            .iterator(chunk_size=LOAD_CHUNK_SIZE))
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def can_answer(params):
+    """
+    Whether the query parameters only use filters the bitmap index can answer.
+    Invalid filters are left to the SQL path, which rejects them.
+    """
+    for name in params:
+        if name not in INDEXED_PARAMS and not PARAMETER_QUERY_PARAM.match(name):
+            return False
+    try:
+        parameter_constraints(params)
+    except ValidationError:
+        return False
+    if params.get('ordering', 'id') not in ('', 'id'):
+        return False
+    if any(not params.get(f'{field}_id', '0').isdecimal() for field in NAMED_FIELDS):
+        return False
+    return bool(params.get('parameter_name')) == bool(params.get('parameter_value'))
+
+
+def get_index():
+    """
+    The process-wide bitmap index, built on first use and brought up to date, or None when it is disabled
+    """
+    global _index
+    if not settings.CATALOG_BITMAP_INDEX:
+        return None
+    with _index_lock:
+        if _index is None:
+            _index = BitmapIndex()
+    _index.synchronise()
+    return _index
+
+
+def reset_index():
+    global _index
+    with _index_lock:
+        _index = None
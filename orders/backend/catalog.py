@@ -0,0 +1,88 @@
+import threading
+from contextlib import contextmanager
+from itertools import islice
+
+from django.db import transaction
+
+from .aggregates import parameters_map
+from .catalog_cache import MAX_LOGGED_CHANGES, bump_shop_versions_on_commit
+from .models import ProductInfo, CatalogEntry
+
+REFRESH_BATCH_SIZE = 1000
+
+ENTRY_FIELDS = ['product_name', 'shop', 'shop_name', 'model', 'model_name', 'category', 'category_name',
+                'quantity', 'price', 'image', 'parameters']
+
+_state = threading.local()
+
+
+def refresh_catalog(batch_size=REFRESH_BATCH_SIZE, **filters):
+    """
+    Rebuilding catalog entries of the products matching the filters, the whole catalog without filters.
+    Cached pages of the shops of these products are invalidated on commit. Returns the number of written entries.
+    """
+    rows = (ProductInfo.objects.filter(**filters)
+            .values('id', 'product_name', 'shop_id', 'shop__name', 'model_id', 'model__name',
+                    'model__category_id', 'model__category__name', 'quantity', 'price', 'image')
+            .annotate(parameters=parameters_map())
+            .order_by())
+
+    written = 0
+    product_ids = []
+    shop_ids = set()
+    rows = rows.iterator(chunk_size=batch_size)
+    while batch := list(islice(rows, batch_size)):
+        CatalogEntry.objects.bulk_create([
+            CatalogEntry(
+                product_id=row['id'],
+                product_name=row['product_name'],
+                shop_id=row['shop_id'],
+                shop_name=row['shop__name'],
+                model_id=row['model_id'],
+                model_name=row['model__name'],
+                category_id=row['model__category_id'],
+                category_name=row['model__category__name'],
+                quantity=row['quantity'],
+                price=row['price'],
+                image=row['image'] or '',
+                parameters=row['parameters'],
+            )
+            for row in batch
+        ], update_conflicts=True, unique_fields=['product'], update_fields=ENTRY_FIELDS)
+        written += len(batch)
+        shop_ids.update(row['shop_id'] for row in batch)
+        # Changed products are logged for the bitmap index unless there are too many of them
+        if product_ids is not None:
+            product_ids += [row['id'] for row in batch]
+            if len(product_ids) > MAX_LOGGED_CHANGES:
+                product_ids = None
+
+    bump_shop_versions_on_commit(shop_ids, product_ids)
+    return written
+
+
+@contextmanager
+def catalog_signals_paused():
+    """
+    Ignoring catalog refreshes requested by signals, for bulk writers which refresh the catalog themselves
+    """
+    paused = getattr(_state, 'paused', False)
+    _state.paused = True
+    try:
+        yield
+    finally:
+        _state.paused = paused
+
+
+def catalog_signals_active():
+    return not getattr(_state, 'paused', False)
+
+
+def refresh_catalog_on_commit(**filters):
+    """
+    Refreshing catalog entries once the current transaction commits.
+    By then cascading deletes have finished, so entries of deleted products are not written back.
+    """
+    if not catalog_signals_active():
+        return
+    transaction.on_commit(lambda: refresh_catalog(**filters))
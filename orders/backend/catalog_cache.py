@@ -0,0 +1,172 @@
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Shop
+
+SHOPS_KEY = 'catalog:shops'
+HITS_KEY = 'catalog:hits'
+MISSES_KEY = 'catalog:misses'
+# Changed products are logged per version for the bitmap index, larger changes are logged as unknown
+MAX_LOGGED_CHANGES = 10000
+MAX_LOGGED_VERSIONS = 1000
+CHANGES_TIMEOUT = 60 * 60
+
+
+def version_key(shop_id):
+    return f'catalog:shop:{shop_id}:version'
+
+
+def changes_key(shop_id, version):
+    return f'catalog:shop:{shop_id}:changes:{version}'
+
+
+def shop_versions(shop_ids):
+    """
+    Current catalog versions of the shops as {shop id: version}.
+    A version starts at the current time, so a version lost by cache eviction is never reused.
+    """
+    keys = {version_key(shop_id): shop_id for shop_id in shop_ids}
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        for key in missing:
+            cache.add(key, time.time_ns(), timeout=None)
+        versions.update(cache.get_many(missing))
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def bump_shop_versions(shop_ids, product_ids=None):
+    """
+    Invalidating cached pages and products of the shops.
+    Ids of the changed products are logged with every new version, so the bitmap index patches only them:
+    None stands for unknown changes, an empty list for changes of fields which are not indexed (stock and price).
+    """
+    if product_ids is not None:
+        product_ids = sorted(set(product_ids))
+        if len(product_ids) > MAX_LOGGED_CHANGES:
+            product_ids = None
+    for shop_id in set(shop_ids):
+        try:
+            version = cache.incr(version_key(shop_id))
+        except ValueError:
+            cache.add(version_key(shop_id), time.time_ns(), timeout=None)
+            continue
+        if product_ids is not None:
+            cache.set(changes_key(shop_id, version), product_ids, timeout=CHANGES_TIMEOUT)
+
+
+def bump_shop_versions_on_commit(shop_ids, product_ids=None):
+    """
+    Bumping versions once the current transaction commits.
+    A version bumped earlier could be read together with the old rows and cache them as current.
+    """
+    shop_ids = set(shop_ids)
+    if shop_ids:
+        transaction.on_commit(lambda: bump_shop_versions(shop_ids, product_ids))
+
+
+def changed_products(shop_id, since, until):
+    """
+    Ids of the products changed after version `since` up to version `until` of the shop,
+    or None when a change is unknown, its log has expired or there are too many changes in between
+    """
+    if not 0 < until - since <= MAX_LOGGED_VERSIONS:
+        return None
+    keys = [changes_key(shop_id, version) for version in range(since + 1, until + 1)]
+    logs = cache.get_many(keys)
+    if len(logs) < len(keys):
+        return None
+    product_ids = set().union(*logs.values())
+    return product_ids if len(product_ids) <= MAX_LOGGED_CHANGES else None
+
+
+def shop_names():
+    """
+    Names of all shops as {shop id: name}, cached until a shop is saved or deleted
+    """
+    names = cache.get(SHOPS_KEY)
+    if names is None:
+        names = dict(Shop.objects.values_list('id', 'name'))
+        cache.set(SHOPS_KEY, names, timeout=None)
+    return names
+
+
+def forget_shop_names():
+    transaction.on_commit(lambda: cache.delete(SHOPS_KEY))
+
+
+def list_key(request, kind='list', ignore=()):
+    """
+    Cache key of a product list page: the normalised query parameters and the versions of every shop
+    whose products can be on the page. Pages filtered by shop depend only on the matching shops.
+    Parameters in `ignore` do not change the key, e.g. facets are the same on every page of a list.
+    """
+    params = sorted(
+        (name, value)
+        for name in request.query_params
+        for value in request.query_params.getlist(name)
+        if value != '' and name not in ignore
+    )
+    shop = request.query_params.get('shop', '').casefold()
+    shop_ids = [shop_id for shop_id, name in shop_names().items() if shop in name.casefold()]
+    versions = sorted(shop_versions(shop_ids).items())
+
+    content = json.dumps([request.get_host(), params, versions], ensure_ascii=False)
+    return f'catalog:{kind}:{hashlib.sha1(content.encode("utf-8")).hexdigest()}'
+
+
+def product_key(product_id):
+    return f'catalog:product:{product_id}'
+
+
+def count(key):
+    if not cache.add(key, 1, timeout=None):
+        cache.incr(key)
+
+
+def get_page(key):
+    """
+    Cached product list page or None, counting the hit or miss
+    """
+    page = cache.get(key)
+    count(HITS_KEY if page is not None else MISSES_KEY)
+    return page
+
+
+def set_page(key, page):
+    cache.set(key, page, timeout=settings.CATALOG_CACHE_TIMEOUT)
+
+
+def get_product(product_id):
+    """
+    Cached {'shop', 'version', 'data'} of a product or None when it is missing or its shop has changed since,
+    counting the hit or miss
+    """
+    cached = cache.get(product_key(product_id))
+    if cached is not None and shop_versions([cached['shop']]).get(cached['shop']) != cached['version']:
+        cached = None
+    count(HITS_KEY if cached is not None else MISSES_KEY)
+    return cached
+
+
+def set_product(product_id, shop_id, version, data):
+    cache.set(product_key(product_id), {'shop': shop_id, 'version': version, 'data': data},
+              timeout=settings.CATALOG_CACHE_TIMEOUT)
+
+
+def cache_stats():
+    """
+    Hit and miss counters of the catalog cache since it was last cleared
+    """
+    counters = cache.get_many([HITS_KEY, MISSES_KEY])
+    hits, misses = counters.get(HITS_KEY, 0), counters.get(MISSES_KEY, 0)
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / (hits + misses), 4) if hits + misses else None,
+    }
@@ -0,0 +1,38 @@
+import hashlib
+import json
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+
+def make_etag(*parts):
+    """
+    Strong ETag of version stamps: any JSON-serialisable values, datetimes are written in ISO format
+    """
+    content = json.dumps(parts, default=str, ensure_ascii=False)
+    return f'"{hashlib.sha1(content.encode("utf-8")).hexdigest()}"'
+
+
+def not_modified(request, etag, last_modified=None, private=False):
+    """
+    304 Not Modified response when the client's copy matches the ETag or Last-Modified, None otherwise
+    """
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+    if response is not None:
+        set_validators(response, etag, last_modified, private=private)
+    return response
+
+
+def set_validators(response, etag, last_modified=None, private=False):
+    """
+    Adding ETag and Last-Modified to a response, clients must revalidate it before reuse
+    """
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    patch_cache_control(response, no_cache=True, private=private)
+    return response
@@ -0,0 +1,67 @@
+import csv
+import json
+import re
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import CatalogEntry
+
+EXPORT_FIELDS = ['product_id', 'product_name', 'shop_id', 'shop_name', 'model_name', 'category_name', 'quantity',
+                 'price', 'parameters']
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+ACCEPTS_GZIP = re.compile(r'\bgzip\b')
+EXPORT_CHUNK_SIZE = 2000
+# Rows are joined into chunks of about this many bytes, so a chunk is not written per product
+OUTPUT_CHUNK_BYTES = 64 * 1024
+
+
+def export_rows(queryset=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Catalog entries in product order, read through a server-side cursor `chunk_size` rows at a time
+    """
+    if queryset is None:
+        queryset = CatalogEntry.objects.all()
+    return queryset.values(*EXPORT_FIELDS).order_by('product_id').iterator(chunk_size=chunk_size)
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False, cls=DjangoJSONEncoder) + '\n'
+
+
+class LineBuffer:
+    """
+    File-like object returning what csv.writer writes instead of keeping it
+    """
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    writer = csv.writer(LineBuffer())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        row['parameters'] = json.dumps(row['parameters'], ensure_ascii=False)
+        yield writer.writerow([row[field] for field in EXPORT_FIELDS])
+
+
+def export_chunks(rows, file_format='ndjson'):
+    """
+    UTF-8 encoded export of the rows in chunks of about OUTPUT_CHUNK_BYTES.
+    The first chunk is produced after the first rows are read, not after the whole query.
+    """
+    lines = csv_lines(rows) if file_format == 'csv' else ndjson_lines(rows)
+    chunk, size = [], 0
+    for line in lines:
+        line = line.encode('utf-8')
+        chunk.append(line)
+        size += len(line)
+        if size >= OUTPUT_CHUNK_BYTES:
+            yield b''.join(chunk)
+            chunk, size = [], 0
+    if chunk:
+        yield b''.join(chunk)
@@ -0,0 +1,56 @@
+from django.db import connection
+
+# Upper bounds of the price facet buckets, the last bucket has no upper bound
+PRICE_BUCKETS = [1000, 5000, 10000, 20000, 50000, 100000]
+TOP_PARAMETER_VALUES = 10
+
+FACETS_SQL = '''
+    WITH filtered (category_name, shop_name, price, parameters) AS ({filtered})
+    SELECT 'category', category_name, NULL, NULL::integer, count(*) FROM filtered GROUP BY category_name
+    UNION ALL
+    SELECT 'shop', shop_name, NULL, NULL, count(*) FROM filtered GROUP BY shop_name
+    UNION ALL
+    SELECT 'price', NULL, NULL, width_bucket(price, %s::numeric[]), count(*) FROM filtered GROUP BY 4
+    UNION ALL
+    SELECT 'parameter', name, value, NULL, count FROM (
+        SELECT parameter.key AS name, parameter.value AS value, count(*) AS count,
+               row_number() OVER (PARTITION BY parameter.key ORDER BY count(*) DESC, parameter.value) AS position
+        FROM filtered, jsonb_each_text(filtered.parameters) AS parameter
+        GROUP BY parameter.key, parameter.value
+    ) AS parameter_values
+    WHERE position <= %s
+'''
+
+
+def facet_counts(queryset):
+    """
+    Counts of the products of a filtered catalog entries queryset by category, shop, price bucket
+    and the most frequent values of every parameter, computed with one query
+    """
+    filtered, params = (queryset.order_by()
+                        .values('category_name', 'shop_name', 'price', 'parameters')
+                        .query.sql_with_params())
+    with connection.cursor() as cursor:
+        cursor.execute(FACETS_SQL.format(filtered=filtered), [*params, PRICE_BUCKETS, TOP_PARAMETER_VALUES])
+        rows = cursor.fetchall()
+
+    facets = {'category': [], 'shop': [], 'price': [], 'parameters': {}}
+    buckets = {}
+    for facet, name, value, bucket, count in rows:
+        if facet == 'parameter':
+            facets['parameters'].setdefault(name, []).append({'value': value, 'count': count})
+        elif facet == 'price':
+            buckets[bucket] = count
+        else:
+            facets[facet].append({'value': name, 'count': count})
+
+    bounds = [None, *PRICE_BUCKETS, None]
+    facets['price'] = [
+        {'from': bounds[bucket], 'to': bounds[bucket + 1], 'count': buckets[bucket]}
+        for bucket in sorted(buckets)
+    ]
+    for facet in ('category', 'shop'):
+        facets[facet].sort(key=lambda item: (-item['count'], item['value']))
+    for values in facets['parameters'].values():
+        values.sort(key=lambda item: (-item['count'], item['value']))
+    return facets
@@ -1,29 +1,109 @@
+import re
+
 import django_filters
+from rest_framework.exceptions import ValidationError
+
+from backend.models import CatalogEntry, ProductParameter, parse_numeric_value
+
+PARAMETER_QUERY_PARAM = re.compile(r'^param\[(.+)\]$')
+PARAMETER_RANGE_QUERY_PARAM = re.compile(r'^param_(min|max)\[(.+)\]$')
+MAX_PARAMETER_CONSTRAINTS = 20
+
 
-from backend.models import ProductParameter
+def parameter_constraints(data):
+    """
+    {parameter name: accepted values} of param[<name>] query parameters and of the parameter_name/value pair
+    """
+    constraints = {}
+    for key in data:
+        match = PARAMETER_QUERY_PARAM.match(key)
+        if match:
+            values = [value for value in data.getlist(key) if value != '']
+            if values:
+                constraints.setdefault(match.group(1), set()).update(values)
+    if data.get('parameter_name') and data.get('parameter_value'):
+        constraints.setdefault(data.get('parameter_name'), set()).add(data.get('parameter_value'))
+    if len(constraints) > MAX_PARAMETER_CONSTRAINTS:
+        raise ValidationError({'param': f'At most {MAX_PARAMETER_CONSTRAINTS} parameters can be filtered'})
+    return constraints
+
+
+def parameter_ranges(data):
+    """
+    {parameter name: {'gte': number, 'lte': number}} of param_min[<name>] and param_max[<name>] query parameters
+    """
+    ranges = {}
+    for key in data:
+        match = PARAMETER_RANGE_QUERY_PARAM.match(key)
+        if match and data.get(key) != '':
+            number = parse_numeric_value(data.get(key))
+            if number is None:
+                raise ValidationError({key: 'Parameter range bound must be a number'})
+            lookup = 'gte' if match.group(1) == 'min' else 'lte'
+            ranges.setdefault(match.group(2), {})[lookup] = number
+    if len(ranges) > MAX_PARAMETER_CONSTRAINTS:
+        raise ValidationError({'param': f'At most {MAX_PARAMETER_CONSTRAINTS} parameters can be filtered'})
+    return ranges
 
 
 class ProductListFilter(django_filters.FilterSet):
     """
-    FilterSet for ProductParameter model
+    FilterSet for CatalogEntry model.
+    Parameter filters select products having a matching parameter, so every product is listed once.
+
+    Several parameters are filtered with param[<name>]=<value> query parameters, combined with AND,
+    e.g. param[Цвет]=красный&param[Встроенная память (Гб)]=256.
+    Repeating the same name allows any of the values.
+    Numeric parameter values are filtered by range with param_min[<name>] and param_max[<name>],
+    e.g. param_min[Встроенная память (Гб)]=256&param_max[Диагональ (дюйм)]=7.
+    Values which are not numbers never match a range.
+    Every constraint is a semi-join on the (parameter, value, product info) index of product parameters.
     """
 
-    price_from = django_filters.NumberFilter(field_name='product_info__price', lookup_expr='gte')
-    price_to = django_filters.NumberFilter(field_name='product_info__price', lookup_expr='lte')
-    shop = django_filters.CharFilter(field_name='product_info__shop__name', lookup_expr='icontains')
-    model = django_filters.CharFilter(field_name='product_info__model__name', lookup_expr='icontains')
-    category = django_filters.CharFilter(field_name='product_info__model__category__name', lookup_expr='icontains')
-    parameter_name = django_filters.CharFilter(field_name='parameter__name', lookup_expr='icontains')
-    parameter_value = django_filters.CharFilter(field_name='parameter__name', lookup_expr='icontains')
+    price_from = django_filters.NumberFilter(field_name='price', lookup_expr='gte')
+    price_to = django_filters.NumberFilter(field_name='price', lookup_expr='lte')
+    shop = django_filters.CharFilter(field_name='shop_name', lookup_expr='icontains')
+    model = django_filters.CharFilter(field_name='model_name', lookup_expr='icontains')
+    category = django_filters.CharFilter(field_name='category_name', lookup_expr='icontains')
+    shop_id = django_filters.NumberFilter(field_name='shop_id')
+    model_id = django_filters.NumberFilter(field_name='model_id')
+    category_id = django_filters.NumberFilter(field_name='category_id')
+    in_stock = django_filters.BooleanFilter(method='filter_in_stock')
+    parameter_name = django_filters.CharFilter(method='filter_parameter', field_name='parameter__name')
+    parameter_value = django_filters.CharFilter(method='filter_parameter', field_name='value')
 
     class Meta:
-        model = ProductParameter
-        fields = ['price_from', 'price_to', 'shop', 'model', 'category', 'parameter_name', 'parameter_value', ]
+        model = CatalogEntry
+        fields = ['price_from', 'price_to', 'shop', 'model', 'category', 'shop_id', 'model_id', 'category_id',
+                  'in_stock', 'parameter_name', 'parameter_value', ]
+
+    def filter_in_stock(self, queryset, name, value):
+        # quantity > 0 is the condition of the partial in-stock indexes
+        return queryset.filter(quantity__gt=0) if value else queryset.filter(quantity=0)
+
+    def has_parameter_pair(self):
+        return bool(self.data.get('parameter_name')) and bool(self.data.get('parameter_value'))
+
+    def filter_parameter(self, queryset, name, value):
+        # A name together with a value is an exact pair, applied with the other parameter constraints
+        if self.has_parameter_pair():
+            return queryset
+        return queryset.filter(product_id__in=ProductParameter.objects.filter(**{f'{name}__icontains': value})
+                               .values('product_info_id'))
+
+    def parameter_constraints(self):
+        return parameter_constraints(self.data)
 
     def filter_queryset(self, queryset):
-        if 'parameter_name' in self.data and 'parameter_value' in self.data:
-            return queryset.filter(
-                parameter__name=self.data.get('parameter_name'),
-                value=self.data.get('parameter_value')
-            )
-        return super().filter_queryset(queryset)
+        queryset = super().filter_queryset(queryset)
+        for name, values in sorted(self.parameter_constraints().items()):
+            queryset = queryset.filter(product_id__in=ProductParameter.objects.filter(
+                parameter__name=name,
+                value__in=sorted(values),
+            ).values('product_info_id'))
+        for name, bounds in sorted(parameter_ranges(self.data).items()):
+            queryset = queryset.filter(product_id__in=ProductParameter.objects.filter(
+                parameter__name=name,
+                **{f'numeric_value__{lookup}': number for lookup, number in bounds.items()},
+            ).values('product_info_id'))
+        return queryset
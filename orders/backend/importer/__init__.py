@@ -0,0 +1,5 @@
+from .engine import CatalogImporter, ImportProgress, DEFAULT_BATCH_SIZE
+from .readers import FeedError, stream_yaml_feed
+from .sync import CatalogSync
+from .parallel import FeedResult, find_feeds, import_feed, import_feeds
+from .formats import FEED_EXTENSIONS, open_feed, write_feed
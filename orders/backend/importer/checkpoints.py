@@ -0,0 +1,91 @@
+import hashlib
+import os
+
+from django.db import transaction
+from django.utils import timezone
+
+from .engine import chunked
+from .formats import open_feed
+from .locks import shop_session_lock
+from .readers import FeedError
+from .sync import CatalogSync
+from ..models import ImportJob
+
+
+def file_hash(path, block_size=2 ** 20):
+    """
+    SHA-1 of the file content, read in blocks without parsing
+    """
+    digest = hashlib.sha1()
+    with open(path, 'rb') as file:
+        while block := file.read(block_size):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def find_interrupted_job(path, content_hash):
+    """
+    The last checkpointed import of the file which did not finish
+    """
+    job = (ImportJob.objects
+           .filter(path=path, status__in=[ImportJob.JobStatus.RUNNING, ImportJob.JobStatus.FAILED])
+           .order_by('-created_at').first())
+    if job is None:
+        raise FeedError(f'No interrupted import of {path} to resume')
+    if job.content_hash != content_hash:
+        raise FeedError('Price list has changed since the interrupted import')
+    return job
+
+
+def import_checkpointed(path, importer, stream=False, resume=False):
+    """
+    Importing a price list in one transaction per batch.
+    Every transaction also saves the checkpoint of the ImportJob, so a resumed import
+    starts right after the last committed batch. Returns the price list data.
+    """
+    if isinstance(importer, CatalogSync):
+        raise FeedError('Sync imports delete goods missing from the whole feed and cannot be checkpointed')
+
+    path = os.path.abspath(path)
+    content_hash = file_hash(path)
+    if resume:
+        job = find_interrupted_job(path, content_hash)
+    else:
+        job = ImportJob.objects.create(path=path, content_hash=content_hash)
+    job.status = ImportJob.JobStatus.RUNNING
+    job.error = ''
+    job.save(update_fields=['status', 'error'])
+
+    try:
+        with open_feed(path, stream=stream, checkpoint=job.checkpoint) as data, shop_session_lock(data.get('shop')):
+            import_batches(importer, job, data)
+    except Exception as e:
+        job.status = ImportJob.JobStatus.FAILED
+        job.error = str(e)
+        job.save(update_fields=['status', 'error'])
+        raise
+
+    job.status = ImportJob.JobStatus.DONE
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'finished_at'])
+    return data
+
+
+def import_batches(importer, job, data):
+    with transaction.atomic():
+        shop = importer.import_shop(data.get('shop'))
+        category_ids = importer.import_categories(shop, data.get('categories') or [])
+        job.shop = shop.name
+        job.header = {'shop': data.get('shop'), 'categories': data.get('categories') or []}
+        job.save(update_fields=['shop', 'header'])
+
+    position = data.get('position') or {}
+    rows, seconds = job.rows, job.seconds
+    for goods in chunked(data.get('goods') or [], importer.batch_size):
+        with transaction.atomic():
+            importer.import_goods(shop, category_ids, goods)
+            job.goods_done += len(goods)
+            job.offset = position.get('offset')
+            job.rows = rows + importer.progress.total_rows
+            job.seconds = seconds + importer.progress.total_seconds
+            job.save(update_fields=['goods_done', 'offset', 'rows', 'seconds'])
@@ -0,0 +1,220 @@
+import hashlib
+import json
+import time
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import transaction
+
+from ..catalog import refresh_catalog
+from ..models import Shop, Category, Model, ProductInfo, Parameter, ProductParameter, parse_numeric_value
+
+DEFAULT_BATCH_SIZE = 2000
+
+
+def chunked(iterable, size):
+    """
+    Splitting any iterable into lists of at most `size` items
+    """
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def normalized_number(value):
+    """
+    Number as the database stores it, so 1000.5 of YAML and '1000.50' of CSV are the same price
+    """
+    try:
+        return str(Decimal(str(value)).normalize())
+    except InvalidOperation:
+        return str(value)
+
+
+def fingerprint(good):
+    """
+    Hash of every field of a good that is written to the database.
+    Values are compared as strings, numbers once normalised, so a good has the same fingerprint in every feed format.
+    """
+    fields = [str(good.get(key)) for key in ('name', 'model')]
+    fields += [normalized_number(good.get(key)) for key in ('category', 'price', 'price_rrc', 'quantity')]
+    fields.append({str(name): str(value) for name, value in (good.get('parameters') or {}).items()})
+    content = json.dumps(fields, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+class ImportProgress:
+    """
+    Collects row counts and elapsed time for every import phase.
+    The optional callback is called with (phase, rows, seconds) each time a phase step finishes.
+    Counters collect numbers which are not import phases, e.g. unchanged goods of a sync.
+    """
+    PHASES = ['shop', 'categories', 'models', 'parameters', 'products', 'product parameters']
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.phases = {phase: {'rows': 0, 'seconds': 0.0} for phase in self.PHASES}
+        self.counters = {}
+
+    def count(self, name, number):
+        self.counters[name] = self.counters.get(name, 0) + number
+
+    def add(self, phase, rows, seconds):
+        stats = self.phases.setdefault(phase, {'rows': 0, 'seconds': 0.0})
+        stats['rows'] += rows
+        stats['seconds'] += seconds
+        if self.callback:
+            self.callback(phase, stats['rows'], stats['seconds'])
+
+    @property
+    def total_rows(self):
+        return sum(stats['rows'] for stats in self.phases.values())
+
+    @property
+    def total_seconds(self):
+        return sum(stats['seconds'] for stats in self.phases.values())
+
+    def summary(self):
+        """
+        Human-readable report with one line per phase
+        """
+        lines = []
+        for phase, stats in self.phases.items():
+            rate = stats['rows'] / stats['seconds'] if stats['seconds'] else 0
+            lines.append(f'{phase.capitalize()}: {stats["rows"]} rows in {stats["seconds"]:.2f}s ({rate:.0f} rows/s)')
+        if self.counters:
+            lines.append(', '.join(f'{name.capitalize()}: {number}' for name, number in self.counters.items()))
+        return lines
+
+
+class CatalogImporter:
+    """
+    Set-based importer of supplier price lists.
+
+    Category, model and parameter names are resolved to ids once and cached,
+    every table is written with bulk_create in batches of `batch_size` rows.
+    Shared names are inserted in sorted order, so concurrent imports lock rows in the same order.
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+        self.batch_size = batch_size
+        self.progress = progress or ImportProgress()
+        self.model_ids = {}
+        self.parameter_ids = {}
+
+    def run(self, data):
+        """
+        Importing a whole feed ({'shop', 'categories', 'goods'}) inside one transaction
+        """
+        with transaction.atomic():
+            shop = self.import_shop(data.get('shop'))
+            category_ids = self.import_categories(shop, data.get('categories') or [])
+            for goods in chunked(data.get('goods') or [], self.batch_size):
+                self.import_goods(shop, category_ids, goods)
+
+        return self.progress
+
+    def import_shop(self, shop_name):
+        started = time.perf_counter()
+        shop, created = Shop.objects.get_or_create(name=shop_name)
+        self.progress.add('shop', 1, time.perf_counter() - started)
+        return shop
+
+    def import_categories(self, shop, categories):
+        """
+        Creating missing categories and linking all of them to the shop.
+        Returns mapping of feed category id to database id.
+        """
+        started = time.perf_counter()
+        names = {category.get('id'): category.get('name') for category in categories}
+
+        Category.objects.bulk_create(
+            [Category(name=name) for name in sorted(set(names.values()))],
+            ignore_conflicts=True,
+        )
+        ids_by_name = dict(Category.objects.filter(name__in=names.values()).values_list('name', 'id'))
+
+        through = Category.shops.through
+        through.objects.bulk_create(
+            [through(category_id=category_id, shop_id=shop.id) for category_id in sorted(ids_by_name.values())],
+            ignore_conflicts=True,
+        )
+
+        self.progress.add('categories', len(ids_by_name), time.perf_counter() - started)
+        return {feed_id: ids_by_name[name] for feed_id, name in names.items()}
+
+    def import_goods(self, shop, category_ids, goods):
+        """
+        Writing one batch of goods with their models, parameters and parameter values
+        """
+        self.resolve_models(category_ids, goods)
+        self.resolve_parameters(goods)
+
+        started = time.perf_counter()
+        products_info = ProductInfo.objects.bulk_create([
+            ProductInfo(
+                product_name=good.get('name'),
+                model_id=self.model_ids[good.get('model')],
+                shop_id=shop.id,
+                quantity=good.get('quantity'),
+                price=good.get('price'),
+                rrp=good.get('price_rrc'),
+                external_id=good.get('id'),
+                fingerprint=fingerprint(good),
+            )
+            for good in goods
+        ], batch_size=self.batch_size)
+        self.progress.add('products', len(products_info), time.perf_counter() - started)
+
+        started = time.perf_counter()
+        product_parameters = ProductParameter.objects.bulk_create([
+            ProductParameter(
+                product_info_id=product_info.id,
+                parameter_id=self.parameter_ids[name],
+                value=str(value),
+                numeric_value=parse_numeric_value(value),
+            )
+            for product_info, good in zip(products_info, goods)
+            for name, value in (good.get('parameters') or {}).items()
+        ], batch_size=self.batch_size)
+        self.progress.add('product parameters', len(product_parameters), time.perf_counter() - started)
+
+        self.refresh_entries([product_info.id for product_info in products_info])
+
+    def refresh_entries(self, product_ids):
+        """
+        Rebuilding catalog entries of the written products, bulk_create sends no signals
+        """
+        started = time.perf_counter()
+        written = refresh_catalog(batch_size=self.batch_size, id__in=product_ids)
+        self.progress.add('catalog', written, time.perf_counter() - started)
+
+    def resolve_models(self, category_ids, goods):
+        started = time.perf_counter()
+        missing = {}
+        for good in goods:
+            name = good.get('model')
+            if name not in self.model_ids and name not in missing:
+                missing[name] = category_ids[good.get('category')]
+
+        if missing:
+            Model.objects.bulk_create(
+                [Model(name=name, category_id=category_id) for name, category_id in sorted(missing.items())],
+                ignore_conflicts=True,
+            )
+            self.model_ids.update(Model.objects.filter(name__in=missing).values_list('name', 'id'))
+        self.progress.add('models', len(missing), time.perf_counter() - started)
+
+    def resolve_parameters(self, goods):
+        started = time.perf_counter()
+        missing = {
+            name
+            for good in goods
+            for name in (good.get('parameters') or {})
+            if name not in self.parameter_ids
+        }
+
+        if missing:
+            Parameter.objects.bulk_create([Parameter(name=name) for name in sorted(missing)], ignore_conflicts=True)
+            self.parameter_ids.update(Parameter.objects.filter(name__in=missing).values_list('name', 'id'))
+        self.progress.add('parameters', len(missing), time.perf_counter() - started)
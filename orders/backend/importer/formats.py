@@ -0,0 +1,222 @@
+import csv
+import json
+import os
+from contextlib import contextmanager
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from yaml import dump
+
+from .readers import FeedError, load_yaml_feed, stream_yaml_feed, validate_feed, validate_header, validate_good
+
+YAML_EXTENSIONS = ('.yaml', '.yml')
+CSV_EXTENSIONS = ('.csv',)
+JSONL_EXTENSIONS = ('.jsonl', '.ndjson')
+FEED_EXTENSIONS = YAML_EXTENSIONS + CSV_EXTENSIONS + JSONL_EXTENSIONS
+
+# Long format: one row per parameter of a good, goods without parameters have one row with empty parameter
+CSV_COLUMNS = ['shop', 'category_id', 'category', 'id', 'model', 'name', 'price', 'price_rrc', 'quantity',
+               'parameter', 'value']
+
+
+def parse_number(text):
+    """
+    Integer or decimal value of a CSV cell
+    """
+    if not text:
+        raise FeedError('Number must be provided')
+    try:
+        return int(text)
+    except ValueError:
+        try:
+            return Decimal(text)
+        except InvalidOperation:
+            raise FeedError(f'{text!r} is not a number')
+
+
+class OffsetLines:
+    """
+    Decoded lines of a binary file, remembering the byte offset after the last line read
+    """
+
+    def __init__(self, file):
+        self.file = file
+        self.offset = file.tell()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.file.readline()
+        if not line:
+            raise StopIteration
+        self.offset += len(line)
+        return line.decode('utf-8')
+
+
+def read_csv_feed(file, header=None, offset=None):
+    """
+    Reading a CSV price list in long format from a binary file.
+    Unless the header (shop and categories) is given, the first pass collects it and the second one yields goods
+    assembled from consecutive rows with the same id. Reading starts at `offset` when it is given.
+    data['position']['offset'] is the byte offset right after the last yielded good.
+    """
+    file.seek(0)
+    fieldnames = next(csv.reader(OffsetLines(file)), None)
+    if not fieldnames:
+        raise FeedError('CSV price list must have a header row')
+    goods_start = file.tell()
+
+    if header is None:
+        shop = None
+        categories = {}
+        for row in csv.DictReader(OffsetLines(file), fieldnames=fieldnames):
+            shop = shop or row.get('shop')
+            categories.setdefault(parse_number(row.get('category_id')), row.get('category'))
+        header = {
+            'shop': shop,
+            'categories': [{'id': category_id, 'name': name} for category_id, name in categories.items()],
+        }
+
+    file.seek(offset or goods_start)
+    data = {'shop': header.get('shop'), 'categories': header.get('categories'), 'position': {'offset': file.tell()}}
+    category_ids = validate_header(data)
+    data['goods'] = (validate_good(good, category_ids) for good in csv_goods(file, fieldnames, data['position']))
+    return data
+
+
+def csv_goods(file, fieldnames, position):
+    lines = OffsetLines(file)
+    rows = []
+    row_end = lines.offset
+    for row in csv.DictReader(lines, fieldnames=fieldnames):
+        if rows and row.get('id') != rows[0].get('id'):
+            position['offset'] = row_end
+            yield csv_good(rows)
+            rows = []
+        rows.append(row)
+        row_end = lines.offset
+    if rows:
+        position['offset'] = row_end
+        yield csv_good(rows)
+
+
+def csv_good(rows):
+    first = rows[0]
+    return {
+        'id': parse_number(first.get('id')),
+        'category': parse_number(first.get('category_id')),
+        'model': first.get('model'),
+        'name': first.get('name'),
+        'price': parse_number(first.get('price')),
+        'price_rrc': parse_number(first.get('price_rrc')),
+        'quantity': parse_number(first.get('quantity')),
+        'parameters': {row.get('parameter'): row.get('value') for row in rows if row.get('parameter')},
+    }
+
+
+def write_csv_feed(data, file):
+    categories = {category.get('id'): category.get('name') for category in data.get('categories') or []}
+    writer = csv.writer(file)
+    writer.writerow(CSV_COLUMNS)
+    for good in data.get('goods') or []:
+        row = [data.get('shop'), good.get('category'), categories.get(good.get('category')), good.get('id'),
+               good.get('model'), good.get('name'), good.get('price'), good.get('price_rrc'), good.get('quantity')]
+        parameters = (good.get('parameters') or {}).items()
+        for name, value in parameters or [('', '')]:
+            writer.writerow(row + [name, value])
+
+
+def read_jsonl_feed(file, header=None, offset=None):
+    """
+    Reading a JSON Lines price list from a binary file: the first line holds the shop and categories,
+    every next line is one good. Reading starts at `offset` when it is given together with the header.
+    data['position']['offset'] is the byte offset right after the last yielded good.
+    """
+    file.seek(0)
+    first_line = file.readline()
+    if header is None:
+        try:
+            header = json.loads(first_line or 'null')
+        except json.JSONDecodeError as e:
+            raise FeedError(f'Invalid JSON in line 1: {e}')
+        if not isinstance(header, dict):
+            raise FeedError('The first line must be a mapping with shop and categories')
+
+    if offset:
+        file.seek(offset)
+    data = {'shop': header.get('shop'), 'categories': header.get('categories') or [],
+            'position': {'offset': file.tell()}}
+    category_ids = validate_header(data)
+    data['goods'] = (validate_good(good, category_ids) for good in jsonl_goods(file, data['position']))
+    return data
+
+
+def jsonl_goods(file, position):
+    lines = OffsetLines(file)
+    for line in lines:
+        if line.strip():
+            try:
+                good = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise FeedError(f'Invalid JSON before byte {lines.offset}: {e}')
+            position['offset'] = lines.offset
+            yield good
+
+
+def write_jsonl_feed(data, file):
+    header = {'shop': data.get('shop'), 'categories': data.get('categories') or []}
+    file.write(json.dumps(header, ensure_ascii=False) + '\n')
+    for good in data.get('goods') or []:
+        file.write(json.dumps(good, ensure_ascii=False, default=str) + '\n')
+
+
+def write_yaml_feed(data, file):
+    dump({**data, 'goods': list(data.get('goods') or [])}, file, allow_unicode=True, sort_keys=False)
+
+
+def feed_format(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension in YAML_EXTENSIONS:
+        return 'yaml'
+    if extension in CSV_EXTENSIONS:
+        return 'csv'
+    if extension in JSONL_EXTENSIONS:
+        return 'jsonl'
+    raise FeedError(f'Unknown price list format {extension!r}')
+
+
+@contextmanager
+def open_feed(path, stream=False, checkpoint=None):
+    """
+    Opening a price list of any supported format as {'shop', 'categories', 'goods'}.
+    Goods of CSV, JSON Lines and streamed YAML price lists are read lazily while the file is open.
+    A checkpoint ({'goods', 'offset', 'header'}) continues reading after the goods already imported:
+    CSV and JSON Lines files are read from the byte offset, YAML goods are parsed and skipped.
+    """
+    checkpoint = checkpoint or {}
+    kind = feed_format(path)
+    if kind == 'yaml':
+        with open(path, 'rb') as file:
+            if stream:
+                data = stream_yaml_feed(file)
+                category_ids = validate_header(data)
+                data['goods'] = (validate_good(good, category_ids) for good in data['goods'])
+            else:
+                data = validate_feed(load_yaml_feed(file))
+            if checkpoint.get('goods'):
+                data['goods'] = islice(data.get('goods') or [], checkpoint.get('goods'), None)
+            yield data
+    else:
+        reader = read_csv_feed if kind == 'csv' else read_jsonl_feed
+        with open(path, 'rb') as file:
+            yield reader(file, header=checkpoint.get('header') or None, offset=checkpoint.get('offset'))
+
+
+def write_feed(data, path):
+    """
+    Writing a price list in the format given by the extension of the path
+    """
+    writer = {'yaml': write_yaml_feed, 'csv': write_csv_feed, 'jsonl': write_jsonl_feed}[feed_format(path)]
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        writer(data, file)
@@ -0,0 +1,58 @@
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+
+
+def lock_key(shop_name):
+    return f'backend.import.{shop_name}'
+
+
+@contextmanager
+def shop_lock(shop_name):
+    """
+    Serialising imports of the same shop with a Postgres advisory lock held until the end of the transaction.
+    Imports of different shops take different locks and run concurrently.
+    """
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_xact_lock(hashtext(%s))', [lock_key(shop_name)])
+        yield
+
+
+@contextmanager
+def shop_session_lock(shop_name):
+    """
+    The same lock held by the session, for imports which commit several transactions
+    """
+    if connection.vendor != 'postgresql':
+        yield
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_lock(hashtext(%s))', [lock_key(shop_name)])
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_unlock(hashtext(%s))', [lock_key(shop_name)])
+
+
+@contextmanager
+def try_session_lock(name):
+    """
+    Taking a lock held by the session without waiting for it, yields whether it was taken
+    """
+    if connection.vendor != 'postgresql':
+        yield True
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_try_advisory_lock(hashtext(%s))', [name])
+        locked = cursor.fetchone()[0]
+    try:
+        yield locked
+    finally:
+        if locked:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_unlock(hashtext(%s))', [name])
@@ -0,0 +1,77 @@
+import glob
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.db import DatabaseError, connections
+from yaml import YAMLError
+
+from .checkpoints import import_checkpointed
+from .engine import CatalogImporter, ImportProgress, DEFAULT_BATCH_SIZE
+from .formats import FEED_EXTENSIONS, open_feed
+from .locks import shop_lock
+from .readers import FeedError
+from .sync import CatalogSync
+
+
+def find_feeds(pattern):
+    """
+    Price lists of a directory or matching a glob pattern, sorted by path
+    """
+    if os.path.isdir(pattern):
+        return sorted(
+            os.path.join(pattern, name) for name in os.listdir(pattern) if name.endswith(FEED_EXTENSIONS)
+        )
+    return sorted(path for path in glob.glob(pattern) if os.path.isfile(path))
+
+
+class FeedResult:
+    """
+    Outcome of importing one price list: import progress or the error which stopped it
+    """
+
+    def __init__(self, path, shop=None, progress=None, error=None):
+        self.path = path
+        self.shop = shop
+        self.progress = progress
+        self.error = error
+
+
+def import_feed(path, batch_size=DEFAULT_BATCH_SIZE, sync=False, stream=False, progress=None,
+                checkpoint=False, resume=False):
+    """
+    Parsing, validating and importing one price list.
+    With `checkpoint` every batch is committed separately, `resume` continues the last interrupted import of the file.
+    Runs in a worker process, so it returns a picklable FeedResult instead of raising.
+    """
+    importer_class = CatalogSync if sync else CatalogImporter
+    importer = importer_class(batch_size=batch_size, progress=progress or ImportProgress())
+    try:
+        if checkpoint or resume:
+            data = import_checkpointed(path, importer, stream=stream, resume=resume)
+        else:
+            with open_feed(path, stream=stream) as data, shop_lock(data.get('shop')):
+                importer.run(data)
+    except (FeedError, YAMLError, UnicodeDecodeError, OSError, DatabaseError) as e:
+        return FeedResult(path, error=str(e))
+
+    return FeedResult(path, shop=data.get('shop'), progress=importer.progress)
+
+
+def import_feeds(paths, workers=1, **options):
+    """
+    Importing several price lists, in a pool of `workers` processes when more than one is requested.
+    Results are yielded in order of completion.
+    """
+    if workers <= 1 or len(paths) <= 1:
+        for path in paths:
+            yield import_feed(path, **options)
+        return
+
+    # Worker processes are forked and must open their own database connections
+    connections.close_all()
+    context = multiprocessing.get_context('fork')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        futures = [executor.submit(import_feed, path, **options) for path in paths]
+        for future in as_completed(futures):
+            yield future.result()
@@ -0,0 +1,137 @@
+from yaml import SafeLoader, load
+from yaml.composer import Composer
+from yaml.constructor import SafeConstructor
+from yaml.events import MappingStartEvent, MappingEndEvent, SequenceStartEvent, SequenceEndEvent, ScalarEvent
+from yaml.resolver import Resolver
+
+try:
+    from yaml.cyaml import CParser, CSafeLoader as FastLoader
+except ImportError:
+    CParser = None
+    FastLoader = SafeLoader
+
+
+class FeedError(ValueError):
+    """
+    Price list does not follow the shop1.yaml structure
+    """
+
+
+if CParser is not None:
+    class StreamingLoader(CParser, Composer, SafeConstructor, Resolver):
+        """
+        libyaml event parser combined with the pure-Python composer,
+        so that single nodes can be composed out of the event stream
+        """
+
+        def __init__(self, stream):
+            CParser.__init__(self, stream)
+            Composer.__init__(self)
+            SafeConstructor.__init__(self)
+            Resolver.__init__(self)
+else:
+    StreamingLoader = SafeLoader
+
+
+def load_yaml_feed(stream):
+    """
+    Loading a whole YAML price list with the libyaml loader when it is available
+    """
+    data = load(stream, Loader=FastLoader)
+    if not isinstance(data, dict):
+        raise FeedError('Price list must be a mapping')
+    return data
+
+
+GOOD_FIELDS = ('id', 'category', 'model', 'name', 'price', 'price_rrc', 'quantity')
+
+
+def validate_feed(data):
+    """
+    Checking a fully loaded price list before anything is written to the database
+    """
+    category_ids = validate_header(data)
+    for good in data.get('goods') or []:
+        validate_good(good, category_ids)
+    return data
+
+
+def validate_header(data):
+    """
+    Checking the shop name and categories of a price list, returns ids of the categories
+    """
+    if not data.get('shop'):
+        raise FeedError('Shop name must be provided')
+
+    category_ids = set()
+    for category in data.get('categories') or []:
+        if not isinstance(category, dict) or category.get('id') is None or not category.get('name'):
+            raise FeedError(f'Category must have id and name, got {category!r}')
+        category_ids.add(category.get('id'))
+    return category_ids
+
+
+def validate_good(good, category_ids):
+    if not isinstance(good, dict):
+        raise FeedError(f'Good must be a mapping, got {good!r}')
+    missing = [key for key in GOOD_FIELDS if good.get(key) is None]
+    if missing:
+        raise FeedError(f'Good {good.get("id")} has no {", ".join(missing)}')
+    if good.get('category') not in category_ids:
+        raise FeedError(f'Good {good.get("id")} refers to unknown category {good.get("category")}')
+    return good
+
+
+def read_node(loader):
+    """
+    Composing and constructing the next node of the event stream
+    """
+    value = loader.construct_document(loader.compose_node(None, None))
+    loader.anchors = {}
+    return value
+
+
+def stream_yaml_feed(stream):
+    """
+    Reading a YAML price list without loading the whole document.
+    Every key before `goods` is loaded as usual, `goods` is returned as a generator
+    which parses one good at a time, so `shop` and `categories` must precede `goods` in the file.
+    """
+    loader = StreamingLoader(stream)
+    loader.get_event()
+    loader.get_event()
+    if not loader.check_event(MappingStartEvent):
+        raise FeedError('Price list must be a mapping')
+    loader.get_event()
+
+    feed = {'goods': iter(())}
+    while not loader.check_event(MappingEndEvent):
+        key = read_node(loader)
+        if key == 'goods':
+            feed['goods'] = stream_goods(loader)
+            break
+        feed[key] = read_node(loader)
+
+    return feed
+
+
+def stream_goods(loader):
+    if loader.check_event(ScalarEvent):
+        read_node(loader)
+        return
+    if not loader.check_event(SequenceStartEvent):
+        raise FeedError('Goods must be a list')
+    loader.get_event()
+
+    while not loader.check_event(SequenceEndEvent):
+        good = read_node(loader)
+        if not isinstance(good, dict):
+            raise FeedError(f'Good must be a mapping, got {good!r}')
+        yield good
+    loader.get_event()
+
+    while not loader.check_event(MappingEndEvent):
+        key = read_node(loader)
+        if key in ('shop', 'categories'):
+            raise FeedError(f'"{key}" must precede "goods" in a streamed price list')
+        read_node(loader)
@@ -0,0 +1,138 @@
+import csv
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.core.validators import DecimalValidator
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .engine import DEFAULT_BATCH_SIZE, chunked
+from .readers import FeedError
+from ..catalog import refresh_catalog
+from ..catalog_cache import bump_shop_versions_on_commit
+from ..models import ProductInfo, CatalogEntry
+
+# Products and their catalog entries are updated by one statement, the number of updated products is returned
+UPDATE_SQL = '''
+    WITH updated AS (
+        UPDATE {table} AS product
+        SET quantity = stock.quantity::integer, price = stock.price::numeric, fingerprint = '', updated_at = now()
+        FROM (VALUES {values}) AS stock (external_id, quantity, price)
+        WHERE product.shop_id = %s AND product.external_id = stock.external_id::bigint
+        RETURNING product.id, product.external_id, product.quantity, product.price
+    ), entries AS (
+        UPDATE {entry_table} AS entry
+        SET quantity = updated.quantity, price = updated.price
+        FROM updated
+        WHERE entry.product_id = updated.id
+    )
+    SELECT external_id FROM updated
+'''
+
+# Bounds of the columns, a value outside them is a row error rather than a database error
+MAX_EXTERNAL_ID = 2 ** 63 - 1
+MAX_QUANTITY = 2 ** 31 - 1
+PRICE_FIELD = ProductInfo._meta.get_field('price')
+validate_price = DecimalValidator(PRICE_FIELD.max_digits, PRICE_FIELD.decimal_places)
+
+
+def parse_stock_row(row):
+    """
+    Validated (external_id, quantity, price) tuple of a list, dict or CSV row
+    """
+    if isinstance(row, dict):
+        row = [row.get('external_id', row.get('id')), row.get('quantity'), row.get('price')]
+    if not isinstance(row, (list, tuple)) or len(row) != 3:
+        raise FeedError(f'Stock row must be (external_id, quantity, price), got {row!r}')
+    try:
+        external_id, quantity, price = int(row[0]), int(row[1]), Decimal(str(row[2]))
+    except (TypeError, ValueError, InvalidOperation):
+        raise FeedError(f'Stock row must hold numbers, got {row!r}')
+    if external_id < 0 or quantity < 0 or price < 0 or not price.is_finite():
+        raise FeedError(f'Stock row must hold positive numbers, got {row!r}')
+    if external_id > MAX_EXTERNAL_ID or quantity > MAX_QUANTITY:
+        raise FeedError(f'Stock row numbers are too big, got {row!r}')
+    try:
+        validate_price(price)
+    except ValidationError as e:
+        raise FeedError(f'Stock row price {price}: {" ".join(e.messages)}')
+    return external_id, quantity, price
+
+
+def read_stock_csv(lines):
+    """
+    Stock rows of CSV lines: external_id,quantity,price with an optional header line
+    """
+    rows = csv.reader(lines)
+    for number, row in enumerate(rows):
+        if not row:
+            continue
+        if number == 0 and not row[0].strip().isdigit():
+            continue
+        yield parse_stock_row(row)
+
+
+def read_stock_json(content):
+    """
+    Stock rows of a JSON list of [external_id, quantity, price] lists or objects
+    """
+    try:
+        rows = json.loads(content)
+    except json.JSONDecodeError as e:
+        raise FeedError(f'Invalid JSON: {e}')
+    if not isinstance(rows, list):
+        raise FeedError('Stock update must be a list')
+    return [parse_stock_row(row) for row in rows]
+
+
+def update_stock(shop_id, rows, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Setting quantity and price of the shop's products by supplier id with one UPDATE per batch.
+    The fingerprint is cleared, so the next sync writes these products again.
+    Quantity and price of the catalog entries are updated together with the products.
+    Returns the number of updated products and the number of supplier ids not found in the shop,
+    counting every supplier id once however many rows and batches hold it.
+    """
+    received, updated = set(), set()
+    with transaction.atomic():
+        for batch in chunked(rows, batch_size):
+            # The last row of a supplier id wins, UPDATE ... FROM would pick any of the duplicates
+            batch = list({external_id: (external_id, quantity, price)
+                          for external_id, quantity, price in batch}.values())
+            received.update(external_id for external_id, _, _ in batch)
+            updated.update(update_batch(shop_id, batch))
+        # Quantity and price are not in the bitmap index, so no indexed product has changed
+        bump_shop_versions_on_commit([shop_id], product_ids=[])
+
+    return len(updated), len(received - updated)
+
+
+def update_batch(shop_id, batch):
+    """
+    Supplier ids of the batch whose products were updated
+    """
+    if connection.vendor != 'postgresql':
+        products = {
+            product.external_id: product
+            for product in ProductInfo.objects.filter(shop_id=shop_id, external_id__in=[row[0] for row in batch])
+        }
+        for external_id, quantity, price in batch:
+            if external_id in products:
+                products[external_id].quantity = quantity
+                products[external_id].price = price
+                products[external_id].fingerprint = ''
+                products[external_id].updated_at = timezone.now()
+        ProductInfo.objects.bulk_update(products.values(), ['quantity', 'price', 'fingerprint', 'updated_at'])
+        refresh_catalog(id__in=[product.id for product in products.values()])
+        return list(products)
+
+    sql = UPDATE_SQL.format(
+        table=connection.ops.quote_name(ProductInfo._meta.db_table),
+        entry_table=connection.ops.quote_name(CatalogEntry._meta.db_table),
+        values=', '.join(['(%s, %s, %s)'] * len(batch)),
+    )
+    params = [value for row in batch for value in row] + [shop_id]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [external_id for external_id, in cursor.fetchall()]
@@ -0,0 +1,141 @@
+import time
+
+from django.db import connection, transaction
+
+from .engine import CatalogImporter, chunked, fingerprint
+from ..catalog import catalog_signals_paused
+from ..catalog_cache import bump_shop_versions_on_commit
+from ..models import CatalogEntry, OrderItem, ProductInfo, ProductParameter, parse_numeric_value
+
+PRODUCT_FIELDS = ['product_name', 'model', 'quantity', 'price', 'rrp', 'fingerprint', 'updated_at']
+
+# Products of the shop missing from the feed are found by an anti-join with the seen supplier ids
+# and locked against new order items. Ordered products are retired, the others are deleted with their dependents.
+DELETE_MISSING_SQL = '''
+    WITH missing AS (
+        SELECT product.id, EXISTS (SELECT 1 FROM {order_item} item WHERE item.product_id = product.id) AS ordered
+        FROM {product} product
+        WHERE product.shop_id = %s AND product.external_id IS NOT NULL AND product.fingerprint <> ''
+            AND NOT EXISTS (SELECT 1 FROM unnest(%s::bigint[]) AS seen(external_id)
+                            WHERE seen.external_id = product.external_id)
+        FOR UPDATE OF product
+    ), entries AS (
+        DELETE FROM {entry} WHERE product_id IN (SELECT id FROM missing)
+    ), parameters AS (
+        DELETE FROM {parameter} WHERE product_info_id IN (SELECT id FROM missing WHERE NOT ordered)
+    ), retired AS (
+        UPDATE {product} SET quantity = 0, fingerprint = ''
+        WHERE id IN (SELECT id FROM missing WHERE ordered) RETURNING id
+    ), deleted AS (
+        DELETE FROM {product} WHERE id IN (SELECT id FROM missing WHERE NOT ordered) RETURNING id
+    )
+    SELECT id, false FROM deleted UNION ALL SELECT id, true FROM retired
+'''.format(product=ProductInfo._meta.db_table, order_item=OrderItem._meta.db_table,
+           entry=CatalogEntry._meta.db_table, parameter=ProductParameter._meta.db_table)
+
+
+class CatalogSync(CatalogImporter):
+    """
+    Differential importer of supplier price lists.
+
+    Goods are matched to the shop's products by supplier id (external_id).
+    Goods with an unchanged fingerprint are skipped, changed and new ones are upserted,
+    products missing from the feed are deleted. Counts are stored in progress.counters.
+    Catalog entries of changed products are rebuilt per batch, entries of deleted ones are deleted with them.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.seen_ids = set()
+
+    def run(self, data):
+        with transaction.atomic(), catalog_signals_paused():
+            shop = self.import_shop(data.get('shop'))
+            category_ids = self.import_categories(shop, data.get('categories') or [])
+            for goods in chunked(data.get('goods') or [], self.batch_size):
+                self.import_goods(shop, category_ids, goods)
+            self.delete_missing(shop)
+
+        return self.progress
+
+    def import_goods(self, shop, category_ids, goods):
+        """
+        Upserting goods of one batch whose fingerprint differs from the stored one
+        """
+        ids = [good.get('id') for good in goods]
+        self.seen_ids.update(ids)
+        stored = dict(
+            ProductInfo.objects.filter(shop_id=shop.id, external_id__in=ids).values_list('external_id', 'fingerprint')
+        )
+
+        changed = []
+        for good in goods:
+            good_fingerprint = fingerprint(good)
+            if stored.get(good.get('id')) != good_fingerprint:
+                changed.append((good, good_fingerprint))
+        self.progress.count('unchanged', len(goods) - len(changed))
+        if not changed:
+            return
+
+        changed_goods = [good for good, _ in changed]
+        self.resolve_models(category_ids, changed_goods)
+        self.resolve_parameters(changed_goods)
+
+        started = time.perf_counter()
+        products_info = ProductInfo.objects.bulk_create([
+            ProductInfo(
+                product_name=good.get('name'),
+                model_id=self.model_ids[good.get('model')],
+                shop_id=shop.id,
+                quantity=good.get('quantity'),
+                price=good.get('price'),
+                rrp=good.get('price_rrc'),
+                external_id=good.get('id'),
+                fingerprint=good_fingerprint,
+            )
+            for good, good_fingerprint in changed
+        ], batch_size=self.batch_size, update_conflicts=True,
+            unique_fields=['shop', 'external_id'], update_fields=PRODUCT_FIELDS)
+        self.progress.add('products', len(products_info), time.perf_counter() - started)
+
+        updated = sum(1 for good in changed_goods if good.get('id') in stored)
+        self.progress.count('inserted', len(changed_goods) - updated)
+        self.progress.count('updated', updated)
+
+        started = time.perf_counter()
+        product_parameters = ProductParameter.objects.bulk_create([
+            ProductParameter(
+                product_info_id=product_info.id,
+                parameter_id=self.parameter_ids[name],
+                value=str(value),
+                numeric_value=parse_numeric_value(value),
+            )
+            for product_info, good in zip(products_info, changed_goods)
+            for name, value in (good.get('parameters') or {}).items()
+        ], batch_size=self.batch_size, update_conflicts=True,
+            unique_fields=['product_info', 'parameter'], update_fields=['value', 'numeric_value'])
+
+        ProductParameter.objects.filter(
+            product_info_id__in=[product_info.id for product_info in products_info],
+        ).exclude(id__in=[product_parameter.id for product_parameter in product_parameters]).delete()
+        self.progress.add('product parameters', len(product_parameters), time.perf_counter() - started)
+
+        self.refresh_entries([product_info.id for product_info in products_info])
+
+    def delete_missing(self, shop):
+        """
+        Deleting the shop's imported products which are not in the feed with one statement.
+        Products created through the API have no supplier id and are kept.
+        Products with order items are retired instead: they leave the catalog with zero quantity
+        and an empty fingerprint, so the good is written again if it comes back to the feed.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(DELETE_MISSING_SQL, [shop.id, list(self.seen_ids)])
+            rows = cursor.fetchall()
+
+        retired = sum(1 for _, ordered in rows if ordered)
+        self.progress.count('deleted', len(rows) - retired)
+        if retired:
+            self.progress.count('retired', retired)
+        if rows:
+            bump_shop_versions_on_commit([shop.id], [product_id for product_id, _ in rows])
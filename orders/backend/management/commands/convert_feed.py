@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+from yaml import YAMLError
+
+from ...importer import FeedError, open_feed, write_feed
+
+
+class Command(BaseCommand):
+    help = 'Converting a price list between YAML, CSV and JSON Lines formats'
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help='Price list to convert (.yaml, .csv, .jsonl)')
+        parser.add_argument('target', help='Path of the converted price list, the format is taken from the extension')
+        parser.add_argument('--stream', action='store_true',
+                            help='Parse a YAML source one good at a time to keep memory flat')
+
+    def handle(self, *args, **kwargs):
+        try:
+            with open_feed(kwargs['source'], stream=kwargs.get('stream', False)) as data:
+                write_feed(data, kwargs['target'])
+        except (FeedError, YAMLError) as e:
+            raise CommandError(f'Invalid price list {kwargs["source"]}: {e}')
+
+        self.stdout.write(f'Price list {kwargs["source"]} converted to {kwargs["target"]}')
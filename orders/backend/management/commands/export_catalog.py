@@ -0,0 +1,39 @@
+import gzip
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...export import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, export_chunks, export_rows
+from ...models import Shop, CatalogEntry
+
+
+class Command(BaseCommand):
+    help = 'Streaming the catalog of all shops or of one shop to an NDJSON or CSV file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=list(EXPORT_FORMATS), default='ndjson', dest='file_format')
+        parser.add_argument('--output', help='File path, catalog.<format>[.gz] by default')
+        parser.add_argument('--gzip', action='store_true', help='Compress the file with gzip')
+        parser.add_argument('--shop', help='Shop name, all shops by default')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE,
+                            help='Number of rows fetched from the server-side cursor at once')
+
+    def handle(self, *args, **kwargs):
+        queryset = CatalogEntry.objects.all()
+        if kwargs.get('shop'):
+            shop = Shop.objects.filter(name=kwargs['shop']).first()
+            if shop is None:
+                raise CommandError(f'Shop {kwargs["shop"]} does not exist')
+            queryset = queryset.filter(shop_id=shop.id)
+
+        file_format = kwargs['file_format']
+        output = kwargs.get('output') or f'catalog.{file_format}{".gz" if kwargs.get("gzip") else ""}'
+        started = time.perf_counter()
+        written = 0
+        with (gzip.open if kwargs.get('gzip') else open)(output, 'wb') as file:
+            for chunk in export_chunks(export_rows(queryset, chunk_size=kwargs['chunk_size']), file_format):
+                file.write(chunk)
+                written += len(chunk)
+        seconds = time.perf_counter() - started
+
+        self.stdout.write(f'Catalog exported to {output}: {written} bytes in {seconds:.2f}s')
@@ -1,80 +1,72 @@
 import os
 
-from django.core.management.base import BaseCommand
-from yaml import load, Loader
+from django.core.management.base import BaseCommand, CommandError
+from kombu.exceptions import OperationalError
 
-from ...models import Shop, Category, Model, ProductInfo, Parameter, ProductParameter
+from ...importer import DEFAULT_BATCH_SIZE, find_feeds, import_feeds
+from ...tasks import queue_catalog_snapshots
 
 
 class Command(BaseCommand):
     help = 'Data parser'
 
-    def handle(self, *args, **kwargs):
-        base_dir = os.path.dirname(__file__)
-        file_path = os.path.join(base_dir, 'shop1.yaml')
-
-        with open(file_path, encoding='utf-8') as file:
-            data: dict = load(file, Loader=Loader)
+    def add_arguments(self, parser):
+        source = parser.add_mutually_exclusive_group()
+        source.add_argument('--file', help='Path to the YAML, CSV or JSON Lines price list (shop1.yaml by default)')
+        source.add_argument('--feeds', help='Directory or glob pattern of YAML, CSV or JSON Lines price lists, '
+                                            'one shop per file')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help='Number of processes parsing and importing --feeds')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='Number of rows written per INSERT')
+        parser.add_argument('--stream', action='store_true',
+                            help='Parse goods of a YAML price list one at a time with the libyaml parser '
+                                 'to keep memory flat, CSV and JSON Lines are always read this way')
+        parser.add_argument('--sync', action='store_true',
+                            help='Update an already imported shop: write only changed goods, delete missing ones')
+        parser.add_argument('--checkpoint', action='store_true',
+                            help='Commit every batch and record a checkpoint, so that a failed import can be resumed')
+        parser.add_argument('--resume', action='store_true',
+                            help='Continue the last interrupted checkpointed import of the price list')
 
-            #Loading store data
-            shop_name: dict = data.get('shop')
-            shop, created = Shop.objects.get_or_create(name=shop_name)
-            print(f'Shop {shop} uploaded')
+    def handle(self, *args, **kwargs):
+        if kwargs.get('sync') and (kwargs.get('checkpoint') or kwargs.get('resume')):
+            raise CommandError('--sync imports cannot be checkpointed or resumed')
 
-            #Loading product category data
-            categories = data.get('categories')
-            categories_dict = {}
-            for category in categories:
-                product_category = Category.objects.create(id=category.get('id'), name=category.get('name'))
-                product_category.shops.add(shop)
-                categories_dict[category.get('id')] = product_category
-                print(f'Category {category.get("name")} uploaded')
+        if kwargs.get('feeds'):
+            paths = find_feeds(kwargs['feeds'])
+            if not paths:
+                raise CommandError(f'No price lists found in {kwargs["feeds"]}')
+        else:
+            paths = [kwargs.get('file') or os.path.join(os.path.dirname(__file__), 'shop1.yaml')]
 
-            # Loading product model data
-            goods = data.get('goods')
-            models_dict = {}
-            for good in goods:
-                if good.get('model') not in models_dict.keys():
-                    category_id = good.get('category')
-                    category_object = categories_dict.get(category_id)
-                    product_model = Model.objects.create(name=good.get('model'), category=category_object)
-                    models_dict[good.get('model')] = product_model
-                    print(f'Model {good.get("model")} uploaded')
+        results = import_feeds(
+            paths,
+            workers=kwargs.get('workers') or 1,
+            batch_size=kwargs.get('batch_size') or DEFAULT_BATCH_SIZE,
+            sync=kwargs.get('sync', False),
+            stream=kwargs.get('stream', False),
+            checkpoint=kwargs.get('checkpoint', False),
+            resume=kwargs.get('resume', False),
+        )
 
-            # Loading product information data
-            products_info_dict = {}
-            for good in goods:
-                model_name = good.get('model')
-                model_object = models_dict.get(model_name)
-                product_info_model = ProductInfo.objects.create(
-                    id=good.get('id'),
-                    product_name=good.get('name'),
-                    model=model_object,
-                    shop=shop,
-                    quantity=good.get('quantity'),
-                    price=good.get('price'),
-                    rrp=good.get('price_rrc'),
-                )
-                products_info_dict[good.get('id')] = product_info_model
-                print(f'Product {good.get("name")} uploaded')
+        failed = []
+        for result in results:
+            if result.error:
+                failed.append(result.path)
+                self.stderr.write(f'Price list {result.path} was not imported: {result.error}')
+                continue
+            for line in result.progress.summary():
+                self.stdout.write(line)
+            self.stdout.write(f'Shop {result.shop} uploaded: '
+                              f'{result.progress.total_rows} rows in {result.progress.total_seconds:.2f}s')
 
-            # Loading product parameters names
-            for good in goods:
-                parameters = good.get('parameters')
-                for parameter in parameters.keys():
-                    parameter_object, created = Parameter.objects.get_or_create(name=parameter)
-                    print(f'Parameter {parameter} uploaded')
+        # Beat rebuilds the snapshots on schedule anyway, an unreachable broker does not fail the import
+        if len(failed) < len(paths):
+            try:
+                queue_catalog_snapshots()
+            except OperationalError as e:
+                self.stderr.write(f'Catalog snapshots were not queued: {e}')
 
-            # Loading product parameters data
-            for good in goods:
-                good_id = good.get('id')
-                product_info_object = products_info_dict.get(good_id)
-                parameters = good.get('parameters')
-                for key, value in parameters.items():
-                    parameter_object = Parameter.objects.get(name=key)
-                    product_parameter_object, created = ProductParameter.objects.get_or_create(
-                        product_info=product_info_object,
-                        parameter=parameter_object,
-                        value=value,
-                    )
-                    print(f"Parameter's info {key}: {value} uploaded")
+        if failed:
+            raise CommandError(f'{len(failed)} of {len(paths)} price lists were not imported')
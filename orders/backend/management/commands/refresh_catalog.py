@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...catalog import REFRESH_BATCH_SIZE, refresh_catalog
+from ...models import Shop
+
+
+class Command(BaseCommand):
+    help = 'Rebuilding catalog entries of all products or of one shop'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shop', help='Shop name, all shops by default')
+        parser.add_argument('--batch-size', type=int, default=REFRESH_BATCH_SIZE,
+                            help='Number of entries written per INSERT')
+
+    def handle(self, *args, **kwargs):
+        filters = {}
+        if kwargs.get('shop'):
+            shop = Shop.objects.filter(name=kwargs['shop']).first()
+            if shop is None:
+                raise CommandError(f'Shop {kwargs["shop"]} does not exist')
+            filters['shop_id'] = shop.id
+
+        started = time.perf_counter()
+        written = refresh_catalog(batch_size=kwargs.get('batch_size') or REFRESH_BATCH_SIZE, **filters)
+        seconds = time.perf_counter() - started
+
+        self.stdout.write(f'Catalog refreshed: {written} entries in {seconds:.2f}s')
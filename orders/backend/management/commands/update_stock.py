@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...importer import DEFAULT_BATCH_SIZE, FeedError
+from ...importer.stock import read_stock_csv, read_stock_json, update_stock
+from ...models import Shop
+
+
+class Command(BaseCommand):
+    help = 'Updating quantity and price of a shop\'s products from external_id,quantity,price rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='CSV (external_id,quantity,price) or JSON list of rows')
+        parser.add_argument('--shop', required=True, help='Shop name')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='Number of rows written per UPDATE')
+
+    def handle(self, *args, **kwargs):
+        shop = Shop.objects.filter(name=kwargs['shop']).first()
+        if shop is None:
+            raise CommandError(f'Shop {kwargs["shop"]} does not exist')
+
+        started = time.perf_counter()
+        try:
+            with open(kwargs['file'], encoding='utf-8', newline='') as file:
+                if kwargs['file'].endswith('.json'):
+                    rows = read_stock_json(file.read())
+                else:
+                    rows = read_stock_csv(file)
+                batch_size = kwargs.get('batch_size') or DEFAULT_BATCH_SIZE
+                updated, not_found = update_stock(shop.id, rows, batch_size=batch_size)
+        except FeedError as e:
+            raise CommandError(f'Invalid stock update {kwargs["file"]}: {e}')
+        seconds = time.perf_counter() - started
+
+        self.stdout.write(f'Shop {shop.name} stock updated: {updated} products in {seconds:.2f}s, '
+                          f'{not_found} unknown ids')
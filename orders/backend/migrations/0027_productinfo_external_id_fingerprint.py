@@ -0,0 +1,52 @@
+# Generated by Django 5.2 on 2026-10-17 16:40
+
+from django.db import migrations, models
+from django.db.models import F, Min
+
+
+def set_external_ids(apps, schema_editor):
+    """
+    Goods imported before the sync mode used the supplier id as the primary key
+    """
+    ProductInfo = apps.get_model('backend', 'ProductInfo')
+    ProductInfo.objects.filter(external_id__isnull=True).update(external_id=F('id'))
+
+
+def remove_duplicate_parameters(apps, schema_editor):
+    """
+    Keeping the first value of every parameter of a product
+    """
+    ProductParameter = apps.get_model('backend', 'ProductParameter')
+    first_ids = (ProductParameter.objects.values('product_info', 'parameter')
+                 .annotate(first_id=Min('id')).values('first_id'))
+    ProductParameter.objects.exclude(id__in=first_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0026_user_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productinfo',
+            name='external_id',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='productinfo',
+            name='fingerprint',
+            field=models.CharField(blank=True, default='', max_length=40),
+        ),
+        migrations.RunPython(set_external_ids, migrations.RunPython.noop),
+        migrations.RunPython(remove_duplicate_parameters, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='productinfo',
+            constraint=models.UniqueConstraint(fields=('shop', 'external_id'), name='unique_shop_external_id'),
+        ),
+        migrations.AddConstraint(
+            model_name='productparameter',
+            constraint=models.UniqueConstraint(fields=('product_info', 'parameter'), name='unique_product_parameter'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2 on 2026-10-17 17:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0027_productinfo_external_id_fingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(upload_to='import_feeds/')),
+                ('sync', models.BooleanField(default=False)),
+                ('status', models.IntegerField(choices=[(0, 'Queued'), (1, 'Running'), (2, 'Done'), (3, 'Failed')], default=0)),
+                ('shop', models.CharField(blank=True, default='', max_length=50)),
+                ('phase', models.CharField(blank=True, default='', max_length=50)),
+                ('rows', models.PositiveBigIntegerField(default=0)),
+                ('seconds', models.FloatField(default=0)),
+                ('counters', models.JSONField(blank=True, default=dict)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='import_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Import job',
+                'verbose_name_plural': 'Import jobs',
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2 on 2026-10-17 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0028_importjob'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='importjob',
+            name='file',
+            field=models.FileField(blank=True, upload_to='import_feeds/'),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='path',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=40),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='goods_done',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='offset',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='header',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-17 18:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0029_importjob_checkpoint'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='productinfo',
+            index=models.Index(fields=['price', 'id'], name='productinfo_price_id'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2 on 2026-10-17 19:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+FILL_CATALOG_SQL = '''
+    INSERT INTO backend_catalogentry (product_id, product_name, shop_id, shop_name, model_id, model_name,
+                                      category_id, category_name, quantity, price, image, parameters)
+    SELECT product.id, product.product_name, shop.id, shop.name, model.id, model.name,
+           category.id, category.name, product.quantity, product.price, coalesce(product.image, ''),
+           coalesce((SELECT jsonb_object_agg(parameter.name, product_parameter.value)
+                     FROM backend_productparameter AS product_parameter
+                     JOIN backend_parameter AS parameter ON parameter.id = product_parameter.parameter_id
+                     WHERE product_parameter.product_info_id = product.id), '{}'::jsonb)
+    FROM backend_productinfo AS product
+    JOIN backend_shop AS shop ON shop.id = product.shop_id
+    JOIN backend_model AS model ON model.id = product.model_id
+    JOIN backend_category AS category ON category.id = model.category_id
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0030_productinfo_price_id_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogEntry',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True,
+                                                 related_name='catalog_entry', serialize=False,
+                                                 to='backend.productinfo')),
+                ('product_name', models.CharField()),
+                ('shop_name', models.CharField(max_length=50)),
+                ('model_name', models.CharField(max_length=50)),
+                ('category_name', models.CharField(max_length=50)),
+                ('quantity', models.PositiveIntegerField()),
+                ('price', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('image', models.CharField(blank=True, default='', max_length=100)),
+                ('parameters', models.JSONField(blank=True, default=dict)),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE,
+                                           related_name='catalog_entries', to='backend.shop')),
+                ('model', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE,
+                                            related_name='catalog_entries', to='backend.model')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE,
+                                               related_name='catalog_entries', to='backend.category')),
+            ],
+            options={
+                'verbose_name': 'Catalog entry',
+                'verbose_name_plural': 'Catalog entries',
+                'indexes': [models.Index(fields=['price', 'product'], name='catalogentry_price_product')],
+            },
+        ),
+        migrations.RunSQL(FILL_CATALOG_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2 on 2026-10-17 20:10
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Product name weighs most, then model, then category and shop names, then parameter values.
+# The trigger also covers bulk upserts and raw SQL writes, which send no signals.
+SEARCH_TRIGGER_SQL = '''
+    CREATE FUNCTION backend_catalogentry_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('russian', coalesce(NEW.product_name, '')), 'A') ||
+            setweight(to_tsvector('russian', coalesce(NEW.model_name, '')), 'B') ||
+            setweight(to_tsvector('russian', coalesce(NEW.category_name, '') || ' ' || coalesce(NEW.shop_name, '')),
+                      'C') ||
+            setweight(jsonb_to_tsvector('russian', coalesce(NEW.parameters, '{}'::jsonb), '["string", "numeric"]'),
+                      'D');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql;
+
+    CREATE TRIGGER backend_catalogentry_search_vector
+    BEFORE INSERT OR UPDATE OF product_name, model_name, category_name, shop_name, parameters
+    ON backend_catalogentry
+    FOR EACH ROW EXECUTE FUNCTION backend_catalogentry_search_vector();
+
+    UPDATE backend_catalogentry SET product_name = product_name;
+'''
+
+DROP_SEARCH_TRIGGER_SQL = '''
+    DROP TRIGGER IF EXISTS backend_catalogentry_search_vector ON backend_catalogentry;
+    DROP FUNCTION IF EXISTS backend_catalogentry_search_vector();
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0032_order_productinfo_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='catalogentry',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunSQL(SEARCH_TRIGGER_SQL, DROP_SEARCH_TRIGGER_SQL),
+        migrations.AddIndex(
+            model_name='catalogentry',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='catalogentry_search_vector'),
+        ),
+    ]
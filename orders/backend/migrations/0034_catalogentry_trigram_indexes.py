@@ -0,0 +1,26 @@
+# Generated by Django 5.2 on 2026-10-17 20:35
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0033_catalogentry_search_vector'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='catalogentry',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['product_name'], name='catalogentry_name_trgm',
+                                                           opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='catalogentry',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['model_name'], name='catalogentry_model_trgm',
+                                                           opclasses=['gin_trgm_ops']),
+        ),
+    ]
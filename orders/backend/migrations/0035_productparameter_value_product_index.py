@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-17 20:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0034_catalogentry_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='productparameter',
+            index=models.Index(fields=['parameter', 'value', 'product_info'], name='productparameter_value_product'),
+        ),
+    ]
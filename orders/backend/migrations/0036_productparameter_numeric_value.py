@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-17 21:40
+
+from django.db import migrations, models
+
+# Same rule as models.NUMERIC_VALUE, numeric input accepts the surrounding whitespace
+FILL_NUMERIC_VALUE_SQL = r'''
+    UPDATE backend_productparameter
+    SET numeric_value = replace(value, ',', '.')::numeric
+    WHERE value ~ '^\s*[-+]?\d{1,14}([.,]\d{1,6})?\s*$'
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0035_productparameter_value_product_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productparameter',
+            name='numeric_value',
+            field=models.DecimalField(blank=True, decimal_places=6, editable=False, max_digits=20, null=True),
+        ),
+        migrations.RunSQL(FILL_NUMERIC_VALUE_SQL, migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name='productparameter',
+            index=models.Index(condition=models.Q(('numeric_value__isnull', False)),
+                               fields=['parameter', 'numeric_value', 'product_info'], name='productparameter_numeric'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2 on 2026-10-17 22:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0036_productparameter_numeric_value'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='catalogentry',
+            index=models.Index(fields=['product_name', 'product'], name='catalogentry_name_product'),
+        ),
+        migrations.AddIndex(
+            model_name='catalogentry',
+            index=models.Index(fields=['quantity', 'product'], name='catalogentry_quantity_product'),
+        ),
+        migrations.AddIndex(
+            model_name='catalogentry',
+            index=models.Index(fields=['shop', 'price', 'product'], name='catalogentry_shop_price'),
+        ),
+        migrations.AddIndex(
+            model_name='catalogentry',
+            index=models.Index(fields=['category', 'price', 'product'], name='catalogentry_category_price'),
+        ),
+        migrations.AddIndex(
+            model_name='catalogentry',
+            index=models.Index(fields=['model', 'price', 'product'], name='catalogentry_model_price'),
+        ),
+        migrations.AddIndex(
+            model_name='catalogentry',
+            index=models.Index(condition=models.Q(('quantity__gt', 0)),
+                               fields=['price', 'product'], name='catalogentry_stock_price'),
+        ),
+        migrations.AddIndex(
+            model_name='catalogentry',
+            index=models.Index(condition=models.Q(('quantity__gt', 0)),
+                               fields=['category', 'price', 'product'], name='catalogentry_stock_category'),
+        ),
+        migrations.AddIndex(
+            model_name='catalogentry',
+            index=models.Index(condition=models.Q(('quantity__gt', 0)),
+                               fields=['shop', 'price', 'product'], name='catalogentry_stock_shop'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-17 23:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0037_catalogentry_ordering_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='orderitem',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='backend.productinfo'),
+        ),
+    ]
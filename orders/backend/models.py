@@ -3,6 +3,8 @@ from decimal import Decimal
 
 from django.contrib.auth.base_user import BaseUserManager
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.exceptions import ValidationError
 from django.db import models
 
@@ -124,7 +126,8 @@ class Model(models.Model):
 class ProductInfo(models.Model):
     """
     Product information model:
-        product name, model, shop, quantity, price, recommended retail price (rrp)
+        product name, model, shop, quantity, price, recommended retail price (rrp),
+        supplier id of the good (external_id), fingerprint of its last imported data and time of the last change
     """
     product_name = models.CharField(blank=False, null=False)
     model = models.ForeignKey(Model, on_delete=models.CASCADE, related_name='products_info')
@@ -132,6 +135,9 @@ class ProductInfo(models.Model):
     quantity = models.PositiveIntegerField(blank=False, null=False)
     price = models.DecimalField(max_digits=12, decimal_places=2, blank=False, null=False)
     rrp = models.DecimalField(max_digits=12, decimal_places=2, blank=False, null=False)
+    external_id = models.PositiveBigIntegerField(blank=True, null=True)
+    fingerprint = models.CharField(max_length=40, blank=True, default='')
+    updated_at = models.DateTimeField(auto_now=True)
 
     image = models.ImageField(upload_to='product_images/', blank=True, null=True)
 
@@ -140,6 +146,12 @@ class ProductInfo(models.Model):
     class Meta:
         verbose_name = 'Product info'
         verbose_name_plural = 'Products info'
+        indexes = [
+            models.Index(fields=['price', 'id'], name='productinfo_price_id'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['shop', 'external_id'], name='unique_shop_external_id'),
+        ]
 
     def __str__(self):
         return (f'Product {self.product_name}: '
@@ -173,6 +185,20 @@ class Parameter(models.Model):
         return self.name
 
 
+# A parameter value holding a plain number, e.g. '6.5', '512' or '6,1'; the same rule fills existing rows
+NUMERIC_VALUE = re.compile(r'\s*([-+]?\d{1,14})(?:[.,](\d{1,6}))?\s*', re.ASCII)
+
+
+def parse_numeric_value(value):
+    """
+    Number of a parameter value or None when the value is not a plain number
+    """
+    match = NUMERIC_VALUE.fullmatch(str(value))
+    if match is None:
+        return None
+    return Decimal(f'{match.group(1)}.{match.group(2) or 0}')
+
+
 class ProductParameter(models.Model):
     """
     Product parameter model
@@ -180,12 +206,28 @@ class ProductParameter(models.Model):
     product_info = models.ForeignKey(ProductInfo, on_delete=models.CASCADE, blank=False, null=False)
     parameter = models.ForeignKey(Parameter, on_delete=models.CASCADE, blank=False, null=False)
     value = models.CharField(max_length=50, blank=False, null=False)
+    numeric_value = models.DecimalField(max_digits=20, decimal_places=6, blank=True, null=True, editable=False)
 
     objects = models.Manager()
 
     class Meta:
         verbose_name = 'Product parameter'
         verbose_name_plural = 'Product parameters'
+        indexes = [
+            models.Index(fields=['parameter', 'value', 'product_info'], name='productparameter_value_product'),
+            models.Index(fields=['parameter', 'numeric_value', 'product_info'], name='productparameter_numeric',
+                         condition=models.Q(numeric_value__isnull=False)),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['product_info', 'parameter'], name='unique_product_parameter'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.numeric_value = parse_numeric_value(self.value)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'value' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'numeric_value'}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f'{self.product_info.product_name} has {self.parameter.name} with {self.value} value'
@@ -293,6 +335,7 @@ class Order(models.Model):
 
     user = models.ForeignKey(User, on_delete=models.CASCADE, blank=False, null=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     status = models.IntegerField(choices=OrderStatus, default=0, blank=False)
     delivery_address = models.ForeignKey(DeliveryAddress, on_delete=models.SET_NULL, blank=True, null=True,
                                          related_name='orders')
@@ -322,7 +365,7 @@ class OrderItem(models.Model):
     Order item model
     """
     order = models.ForeignKey(Order, on_delete=models.CASCADE, blank=False, null=False)
-    product = models.ForeignKey(ProductInfo, on_delete=models.CASCADE, blank=False, null=False)
+    product = models.ForeignKey(ProductInfo, on_delete=models.PROTECT, blank=False, null=False)
     shop =models.ForeignKey(Shop, on_delete=models.CASCADE, blank=False, null=False)
     quantity = models.PositiveSmallIntegerField(blank=False, null=False)
 
@@ -342,3 +385,114 @@ class OrderItem(models.Model):
                 f'order created at {self.order.created_at}, '
                 f'from {self.shop.name} shop, '
                 f'quantity {self.quantity} pcs')
+
+
+class ImportJob(models.Model):
+    """
+    Price list import run by a Celery worker or a checkpointed parse_data command:
+        uploaded file or path, status, current phase, processed rows and elapsed time, error message,
+        checkpoint of a chunked import (imported goods, byte offset after them, price list header and hash)
+    """
+    class JobStatus(models.IntegerChoices):
+        QUEUED = 0
+        RUNNING = 1
+        DONE = 2
+        FAILED = 3
+
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, blank=True, null=True, related_name='import_jobs')
+    file = models.FileField(upload_to='import_feeds/', blank=True)
+    path = models.CharField(max_length=255, blank=True, default='')
+    sync = models.BooleanField(default=False)
+    status = models.IntegerField(choices=JobStatus, default=0, blank=False)
+    shop = models.CharField(max_length=50, blank=True, default='')
+    phase = models.CharField(max_length=50, blank=True, default='')
+    rows = models.PositiveBigIntegerField(default=0)
+    seconds = models.FloatField(default=0)
+    counters = models.JSONField(blank=True, default=dict)
+    error = models.TextField(blank=True, default='')
+    content_hash = models.CharField(max_length=40, blank=True, default='')
+    goods_done = models.PositiveBigIntegerField(default=0)
+    offset = models.PositiveBigIntegerField(blank=True, null=True)
+    header = models.JSONField(blank=True, default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    objects = models.Manager()
+
+    @property
+    def throughput(self):
+        return self.rows / self.seconds if self.seconds else 0
+
+    @property
+    def feed_path(self):
+        return self.file.path if self.file else self.path
+
+    @property
+    def checkpoint(self):
+        if not self.goods_done:
+            return None
+        return {'goods': self.goods_done, 'offset': self.offset, 'header': self.header}
+
+    @property
+    def progress_key(self):
+        """
+        Cache key of the live progress written by the worker while the import transaction is open
+        """
+        return f'import-job-{self.id}-progress'
+
+    class Meta:
+        verbose_name = 'Import job'
+        verbose_name_plural = 'Import jobs'
+
+    def __str__(self):
+        return f'Import of {self.file.name or self.path} has status: {self.JobStatus(self.status).name}'
+
+
+class CatalogEntry(models.Model):
+    """
+    Catalog read model: one row per product info with the names of its shop, model and category,
+    price, quantity, image path and parameters as a {name: value} object.
+    Kept in sync by signals and rebuilt in bulk at the end of imports.
+    search_vector is written by a database trigger from the names and parameter values
+    """
+    product = models.OneToOneField(ProductInfo, on_delete=models.CASCADE, primary_key=True,
+                                   related_name='catalog_entry')
+    product_name = models.CharField(blank=False, null=False)
+    shop = models.ForeignKey(Shop, on_delete=models.CASCADE, related_name='catalog_entries')
+    shop_name = models.CharField(max_length=50, blank=False, null=False)
+    model = models.ForeignKey(Model, on_delete=models.CASCADE, related_name='catalog_entries')
+    model_name = models.CharField(max_length=50, blank=False, null=False)
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='catalog_entries')
+    category_name = models.CharField(max_length=50, blank=False, null=False)
+    quantity = models.PositiveIntegerField(blank=False, null=False)
+    price = models.DecimalField(max_digits=12, decimal_places=2, blank=False, null=False)
+    image = models.CharField(max_length=100, blank=True, default='')
+    parameters = models.JSONField(blank=True, default=dict)
+    search_vector = SearchVectorField(blank=True, null=True, editable=False)
+
+    objects = models.Manager()
+
+    class Meta:
+        verbose_name = 'Catalog entry'
+        verbose_name_plural = 'Catalog entries'
+        indexes = [
+            models.Index(fields=['price', 'product'], name='catalogentry_price_product'),
+            models.Index(fields=['product_name', 'product'], name='catalogentry_name_product'),
+            models.Index(fields=['quantity', 'product'], name='catalogentry_quantity_product'),
+            models.Index(fields=['shop', 'price', 'product'], name='catalogentry_shop_price'),
+            models.Index(fields=['category', 'price', 'product'], name='catalogentry_category_price'),
+            models.Index(fields=['model', 'price', 'product'], name='catalogentry_model_price'),
+            # In-stock browsing reads only these smaller indexes
+            models.Index(fields=['price', 'product'], name='catalogentry_stock_price',
+                         condition=models.Q(quantity__gt=0)),
+            models.Index(fields=['category', 'price', 'product'], name='catalogentry_stock_category',
+                         condition=models.Q(quantity__gt=0)),
+            models.Index(fields=['shop', 'price', 'product'], name='catalogentry_stock_shop',
+                         condition=models.Q(quantity__gt=0)),
+            GinIndex(fields=['search_vector'], name='catalogentry_search_vector'),
+            GinIndex(fields=['product_name'], opclasses=['gin_trgm_ops'], name='catalogentry_name_trgm'),
+            GinIndex(fields=['model_name'], opclasses=['gin_trgm_ops'], name='catalogentry_model_trgm'),
+        ]
+
+    def __str__(self):
+        return f'{self.product_name} in shop {self.shop_name}'
@@ -0,0 +1,201 @@
+import base64
+import json
+import math
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+MAX_CURSOR_INTEGER = 2 ** 63 - 1
+
+
+def cursor_value(field_type, value):
+    """
+    Value of a decoded cursor converted to the type of its ordering field.
+    Decimals travel as strings, a value which does not fit the type raises ValueError.
+    """
+    if field_type is int and type(value) is int and abs(value) <= MAX_CURSOR_INTEGER:
+        return value
+    if field_type is float and type(value) in (int, float) and math.isfinite(value):
+        return float(value)
+    if field_type is str and isinstance(value, str):
+        return value
+    if field_type is Decimal and isinstance(value, str):
+        try:
+            number = Decimal(value)
+        except InvalidOperation:
+            raise ValueError(f'Invalid decimal {value!r}')
+        if number.is_finite():
+            return number
+    raise ValueError(f'Cursor value {value!r} is not {field_type.__name__}')
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a stable key of the queryset.
+
+    Every ordering ends with the unique `key`, the cursor holds the ordering values of the last row of the page,
+    and the next page is the rows after it. Pages take the same time however deep the client scrolls,
+    provided there is an index on the ordering fields. Cursor values are checked against `field_types`.
+    """
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    key = 'id'
+    orderings = {
+        'id': [],
+        'price': ['price'],
+        '-price': ['-price'],
+    }
+    default_ordering = 'id'
+    field_types = {
+        'id': int,
+        'price': Decimal,
+    }
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            queryset = queryset.filter(self.after(cursor))
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            raise ValidationError({self.page_size_query_param: 'Page size must be a number'})
+        return min(max(page_size, 1), self.max_page_size)
+
+    def get_default_ordering(self, request):
+        return self.default_ordering
+
+    def get_ordering(self, request):
+        ordering = request.query_params.get(self.ordering_query_param) or self.get_default_ordering(request)
+        if ordering not in self.orderings:
+            raise ValidationError({self.ordering_query_param: f'Ordering must be one of {", ".join(self.orderings)}'})
+        self.ordering_name = ordering
+        fields = self.orderings[ordering]
+        descending = bool(fields) and fields[-1].startswith('-')
+        return fields + [f'-{self.key}' if descending else self.key]
+
+    def after(self, cursor):
+        """
+        Rows following the cursor in the page ordering, written as
+        (a >= x) AND (a > x OR b > y) so that the database starts an index scan at the cursor
+        """
+        condition = None
+        for field, value in reversed(list(zip(self.ordering, cursor))):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            strict = Q(**{f'{name}__{lookup}': value})
+            if condition is None:
+                condition = strict
+            else:
+                condition = Q(**{f'{name}__{lookup}e': value}) & (strict | condition)
+        return condition
+
+    def cursor_values(self, row):
+        values = []
+        for field in self.ordering:
+            value = row[field.lstrip('-')] if isinstance(row, dict) else getattr(row, field.lstrip('-'))
+            values.append(str(value) if isinstance(value, Decimal) else value)
+        return values
+
+    def encode_cursor(self, row):
+        content = json.dumps({'o': self.ordering_name, 'v': self.cursor_values(row)}, ensure_ascii=False)
+        return base64.urlsafe_b64encode(content.encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            content = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            values = content['v']
+            valid = (content['o'] == self.ordering_name and isinstance(values, list)
+                     and len(values) == len(self.ordering))
+            if valid:
+                values = [cursor_value(self.field_types[field.lstrip('-')], value)
+                          for field, value in zip(self.ordering, values)]
+        except (ValueError, KeyError, TypeError):
+            valid = False
+        if not valid:
+            raise NotFound('Invalid cursor')
+        return values
+
+    def get_cursor_key(self, request):
+        """
+        Key value of the last row of the previous page, or None on the first page
+        """
+        self.ordering = self.get_ordering(request)
+        cursor = self.decode_cursor(request)
+        return cursor[-1] if cursor is not None else None
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class CatalogPagination(KeysetPagination):
+    """
+    Keyset pagination of catalog entries, whose key is the product.
+    Every ordering has an index ending with the product, alone and after shop, category or model for price.
+    Search results are ordered by relevance unless another ordering is requested.
+    """
+    key = 'product_id'
+    search_query_param = 'search'
+    orderings = {
+        **KeysetPagination.orderings,
+        'name': ['product_name'],
+        '-name': ['-product_name'],
+        'quantity': ['quantity'],
+        '-quantity': ['-quantity'],
+        'rank': ['-rank'],
+    }
+    field_types = {
+        **KeysetPagination.field_types,
+        'product_id': int,
+        'product_name': str,
+        'quantity': int,
+        'rank': float,
+    }
+
+    def searching(self, request):
+        return bool(request.query_params.get(self.search_query_param, '').strip())
+
+    def get_default_ordering(self, request):
+        return 'rank' if self.searching(request) else self.default_ordering
+
+    def get_ordering(self, request):
+        ordering = super().get_ordering(request)
+        if self.ordering_name == 'rank' and not self.searching(request):
+            raise ValidationError({self.ordering_query_param: 'Ordering by rank requires a search'})
+        return ordering
@@ -0,0 +1,45 @@
+import codecs
+from decimal import Decimal, InvalidOperation
+
+import msgpack
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+from .importer import FeedError
+from .importer.stock import read_stock_csv
+from .renderers import DECIMAL_EXT_TYPE
+
+
+class StockCSVParser(BaseParser):
+    """
+    Parses external_id,quantity,price CSV lines into stock rows
+    """
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return list(read_stock_csv(codecs.iterdecode(stream, 'utf-8')))
+        except (FeedError, UnicodeDecodeError) as e:
+            raise ParseError(f'CSV parse error - {e}')
+
+
+def unpack_extension(code, data):
+    if code == DECIMAL_EXT_TYPE:
+        try:
+            return Decimal(data.decode('ascii'))
+        except (UnicodeDecodeError, InvalidOperation):
+            raise ValueError('Invalid decimal')
+    return msgpack.ExtType(code, data)
+
+
+class MessagePackParser(BaseParser):
+    """
+    Parses MessagePack request bodies, decimals packed as extension type 1 are read back exactly
+    """
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), ext_hook=unpack_extension, raw=False)
+        except (ValueError, msgpack.UnpackException) as e:
+            raise ParseError(f'MessagePack parse error - {e}')
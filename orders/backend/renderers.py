@@ -0,0 +1,99 @@
+from decimal import Decimal
+
+import msgpack
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# MessagePack extension type of decimals, packed as their exact string
+DECIMAL_EXT_TYPE = 1
+
+# Product list fields whose values are stored once per page in the columnar format
+DICTIONARY_FIELDS = ('model', 'category', 'shop')
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON renderer encoding with orjson when it is installed, which is several times faster on large pages.
+    Indented output, e.g. for the browsable API, and installs without orjson use the standard encoder.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return orjson.dumps(data, default=self.encoder_class().default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def columnar_page(page):
+    """
+    Product list page with products as rows of values in the order of `columns`.
+    Models, categories, shops and parameter names are listed once in `dictionaries`
+    and rows hold their index; parameters are [name index, value] pairs.
+    """
+    results = page['results']
+    columns = list(results[0]) if results else []
+    tables = {field: {} for field in DICTIONARY_FIELDS if field in columns}
+    parameters = {}
+    rows = []
+    for item in results:
+        row = []
+        for column in columns:
+            value = item[column]
+            if column in tables:
+                value = tables[column].setdefault(value, len(tables[column]))
+            elif column == 'parameter':
+                value = [[parameters.setdefault(name, len(parameters)), parameter_value]
+                         for name, parameter_value in value.items()]
+            row.append(value)
+        rows.append(row)
+
+    dictionaries = {field: list(table) for field, table in tables.items()}
+    if 'parameter' in columns:
+        dictionaries['parameter'] = list(parameters)
+    columnar = {key: value for key, value in page.items() if key != 'results'}
+    columnar.update({'columns': columns, 'dictionaries': dictionaries, 'rows': rows})
+    return columnar
+
+
+class ColumnarJSONRenderer(FastJSONRenderer):
+    """
+    Opt-in compact representation of product list pages, selected with ?format=columnar
+    or the Accept header. Other responses, e.g. errors, are rendered as usual.
+    """
+    media_type = 'application/vnd.catalog.columnar+json'
+    format = 'columnar'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict) and isinstance(data.get('results'), list):
+            data = columnar_page(data)
+        return super().render(data, accepted_media_type, renderer_context)
+
+
+def pack_default(value):
+    """
+    MessagePack form of values msgpack cannot pack itself: decimals as an extension type
+    keeping every digit, anything else the way the JSON renderer encodes it
+    """
+    if isinstance(value, Decimal):
+        return msgpack.ExtType(DECIMAL_EXT_TYPE, str(value).encode('ascii'))
+    return JSONEncoder().default(value)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Renderer of MessagePack bodies for internal clients sending Accept: application/msgpack,
+    which are smaller and faster to encode and decode than JSON
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=pack_default, use_bin_type=True)
@@ -0,0 +1,146 @@
+import re
+import threading
+from contextlib import ExitStack, contextmanager
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db import connection, transaction
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import Cast, Greatest
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+SEARCH_CONFIG = 'russian'
+
+_state = threading.local()
+
+
+def as_rank(expression):
+    """
+    Rank as double precision. ts_rank and trigram similarity are `real`, which a cursor cannot hold exactly,
+    so `rank < cursor` would find the row the cursor came from again.
+    """
+    return Cast(expression, FloatField())
+
+
+@contextmanager
+def search_scope():
+    """
+    Scope in which the searched queryset is filtered and evaluated.
+    A fuzzy search inside opens a transaction until the end of the scope and sets the trigram threshold for it only,
+    so the threshold does not leak to other requests served by the same connection.
+    """
+    previous = getattr(_state, 'stack', None)
+    with ExitStack() as stack:
+        _state.stack = stack
+        try:
+            yield
+        finally:
+            _state.stack = previous
+
+
+def set_trigram_threshold(similarity):
+    """
+    Setting the threshold of the %> operator for the current transaction
+    """
+    stack = getattr(_state, 'stack', None)
+    if stack is not None:
+        stack.enter_context(transaction.atomic())
+    elif not connection.in_atomic_block:
+        raise RuntimeError('Fuzzy search must be evaluated inside search_scope() or a transaction')
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT set_config('pg_trgm.word_similarity_threshold', %s, true)", [str(similarity)])
+
+
+class RankedSearchFilter(BaseFilterBackend):
+    """
+    Full-text search over the stored search vector of catalog entries.
+
+    The search parameter is parsed like a web search query (words, "phrases", -exclusions, or),
+    matching rows are found through the GIN index and annotated with their `rank`.
+
+    With `fuzzy=true` misspelled queries are tolerated: words are first matched as prefixes of the indexed words,
+    and only when that finds fewer than `fuzzy_min_hits` products, product and model names are compared
+    by trigram word similarity of at least `similarity` through the trigram indexes.
+    The queryset has to be filtered and evaluated inside search_scope().
+    """
+    search_param = 'search'
+    search_description = 'Words of product, model, category, shop names or parameter values'
+    fuzzy_param = 'fuzzy'
+    similarity_param = 'similarity'
+    default_similarity = 0.4
+    fuzzy_min_hits = 5
+
+    def get_search_terms(self, request):
+        return request.query_params.get(self.search_param, '').strip()
+
+    def get_search_query(self, request):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return None
+        return SearchQuery(terms, config=SEARCH_CONFIG, search_type='websearch')
+
+    def is_fuzzy(self, request):
+        return request.query_params.get(self.fuzzy_param, '').lower() in ('1', 'true', 'yes')
+
+    def get_similarity(self, request):
+        value = request.query_params.get(self.similarity_param)
+        if value is None or value == '':
+            return self.default_similarity
+        try:
+            similarity = float(value)
+        except ValueError:
+            similarity = None
+        if similarity is None or not 0 < similarity <= 1:
+            raise ValidationError({self.similarity_param: 'Similarity must be a number above 0 and up to 1'})
+        return similarity
+
+    def filter_queryset(self, request, queryset, view):
+        if self.is_fuzzy(request) and self.get_search_terms(request):
+            return self.fuzzy_search(request, queryset)
+        query = self.get_search_query(request)
+        if query is None:
+            return queryset
+        return queryset.filter(search_vector=query).annotate(rank=as_rank(SearchRank(F('search_vector'), query)))
+
+    def fuzzy_search(self, request, queryset):
+        terms = self.get_search_terms(request)
+        similarity = self.get_similarity(request)
+
+        words = re.findall(r'\w+', terms)
+        if words:
+            query = SearchQuery(' & '.join(f'{word}:*' for word in words), config=SEARCH_CONFIG, search_type='raw')
+            prefixed = queryset.filter(search_vector=query)
+            if len(prefixed.values('pk')[:self.fuzzy_min_hits]) >= self.fuzzy_min_hits:
+                return prefixed.annotate(rank=as_rank(SearchRank(F('search_vector'), query)))
+
+        # The %> operator uses the trigram indexes only with its threshold, which is a setting, not an argument
+        set_trigram_threshold(similarity)
+        return (queryset
+                .filter(Q(product_name__trigram_word_similar=terms) | Q(model_name__trigram_word_similar=terms))
+                .annotate(rank=as_rank(Greatest(TrigramWordSimilarity(terms, 'product_name'),
+                                                TrigramWordSimilarity(terms, 'model_name')))))
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.search_param,
+                'required': False,
+                'in': 'query',
+                'description': self.search_description,
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.fuzzy_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Tolerate misspelled product and model names',
+                'schema': {'type': 'boolean'},
+            },
+            {
+                'name': self.similarity_param,
+                'required': False,
+                'in': 'query',
+                'description': f'Minimal trigram word similarity of fuzzy search, {self.default_similarity} by default',
+                'schema': {'type': 'number'},
+            },
+        ]
@@ -1,9 +1,10 @@
 import re
 
+from django.core.cache import cache
 from rest_framework import serializers
 
 from .models import User, Shop, Category, Model, ProductInfo, Parameter, ProductParameter, Order, OrderItem, Contact, \
-    DeliveryAddress
+    DeliveryAddress, ImportJob
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -71,19 +72,48 @@ class UserRegistrationResponseSerializer(serializers.ModelSerializer):
 
 class ProductListSerializer(serializers.Serializer):
     """
-    Serializes list of products data with grouped parameters
+    Serializes list of products data read from the catalog entries
     """
 
-    name = serializers.CharField(source='product_info__product_name')
-    model = serializers.CharField(source='product_info__model__name')
-    category = serializers.CharField(source='product_info__model__category__name')
-    shop = serializers.CharField(source='product_info__shop__name')
-    parameter = serializers.SerializerMethodField()
-    price = serializers.DecimalField(max_digits=12, decimal_places=2, source='product_info__price')
-    quantity = serializers.IntegerField(source='product_info__quantity')
+    id = serializers.IntegerField(source='product_id')
+    name = serializers.CharField(source='product_name')
+    model = serializers.CharField(source='model_name')
+    category = serializers.CharField(source='category_name')
+    shop = serializers.CharField(source='shop_name')
+    parameter = serializers.DictField(source='parameters')
+    price = serializers.DecimalField(max_digits=12, decimal_places=2)
+    quantity = serializers.IntegerField()
+
+
+# Product list fields and the catalog entry columns they are read from, in the order of ProductListSerializer
+PRODUCT_LIST_FIELDS = {
+    'id': 'product_id',
+    'name': 'product_name',
+    'model': 'model_name',
+    'category': 'category_name',
+    'shop': 'shop_name',
+    'parameter': 'parameters',
+    'price': 'price',
+    'quantity': 'quantity',
+}
+
 
-    def get_parameter(self, obj):
-        return self.context.get('parameter_dict', {}).get(obj['product_info__product_name'], {})
+def product_list_data(rows, fields=tuple(PRODUCT_LIST_FIELDS)):
+    """
+    The same representation of catalog entry rows as ProductListSerializer gives,
+    built as plain dicts without calling every serializer field for every row.
+    Only the listed fields are included.
+    """
+    columns = [(name, PRODUCT_LIST_FIELDS[name]) for name in fields]
+    with_price = 'price' in fields
+    data = []
+    for row in rows:
+        item = {name: row[column] for name, column in columns}
+        if with_price:
+            # Prices are read as numeric(12, 2), so the string has the two decimal places of DecimalField
+            item['price'] = str(item['price'])
+        data.append(item)
+    return data
 
 
 class CertainProductSerializer(serializers.Serializer):
@@ -365,3 +395,36 @@ class OrderItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = OrderItem
         fields = ['order', 'product', 'product_name', 'shop', 'shop_name', 'quantity']
+
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    """
+    Serializer for price list import jobs: upload of the file and progress of the import.
+    Progress of a running job is read from the cache, where the worker reports it.
+    """
+    file = serializers.FileField(write_only=True)
+    file_name = serializers.CharField(source='file.name', read_only=True)
+    status = serializers.SerializerMethodField()
+    throughput = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ImportJob
+        fields = ['id', 'file', 'file_name', 'sync', 'status', 'shop', 'phase', 'rows', 'seconds', 'throughput',
+                  'counters', 'error', 'created_at', 'finished_at']
+        read_only_fields = ['id', 'status', 'shop', 'phase', 'rows', 'seconds', 'throughput',
+                            'counters', 'error', 'created_at', 'finished_at']
+
+    def get_status(self, obj):
+        return obj.JobStatus(obj.status).name.capitalize()
+
+    def get_throughput(self, obj):
+        return round(obj.throughput)
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if instance.status == ImportJob.JobStatus.RUNNING:
+            live = cache.get(instance.progress_key)
+            if live:
+                data.update(live)
+                data['throughput'] = round(live['rows'] / live['seconds']) if live['seconds'] else 0
+        return data
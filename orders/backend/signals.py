@@ -1,6 +1,9 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import ProductInfo, User
+from django.utils import timezone
+from .catalog import catalog_signals_active, refresh_catalog_on_commit
+from .catalog_cache import bump_shop_versions_on_commit, forget_shop_names
+from .models import ProductInfo, User, ProductParameter, Model, Category, Shop, Order, OrderItem
 from .tasks import make_thumbnails
 
 @receiver(post_save, sender=ProductInfo)
@@ -8,3 +11,50 @@ from .tasks import make_thumbnails
 def generate_thumbnails(sender, instance, **kwargs):
     if instance.image:
         make_thumbnails.delay(instance.image.name)
+
+
+@receiver(post_save, sender=ProductInfo)
+def refresh_product_entry(sender, instance, **kwargs):
+    refresh_catalog_on_commit(id=instance.id)
+
+
+@receiver(post_delete, sender=ProductInfo)
+def invalidate_deleted_product(sender, instance, **kwargs):
+    if catalog_signals_active():
+        bump_shop_versions_on_commit([instance.shop_id], [instance.id])
+
+
+@receiver(post_save, sender=ProductParameter)
+@receiver(post_delete, sender=ProductParameter)
+def refresh_parameter_entry(sender, instance, **kwargs):
+    refresh_catalog_on_commit(id=instance.product_info_id)
+
+
+@receiver(post_save, sender=Model)
+def refresh_model_entries(sender, instance, created, **kwargs):
+    if not created:
+        refresh_catalog_on_commit(model_id=instance.id)
+
+
+@receiver(post_save, sender=Category)
+def refresh_category_entries(sender, instance, created, **kwargs):
+    if not created:
+        refresh_catalog_on_commit(model__category_id=instance.id)
+
+
+@receiver(post_save, sender=Shop)
+def refresh_shop_entries(sender, instance, created, **kwargs):
+    forget_shop_names()
+    if not created:
+        refresh_catalog_on_commit(shop_id=instance.id)
+
+
+@receiver(post_delete, sender=Shop)
+def forget_deleted_shop(sender, instance, **kwargs):
+    forget_shop_names()
+
+
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def touch_order(sender, instance, **kwargs):
+    Order.objects.filter(id=instance.order_id).update(updated_at=timezone.now())
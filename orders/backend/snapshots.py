@@ -0,0 +1,128 @@
+import gzip
+import json
+import os
+import shutil
+
+from django.conf import settings
+from django.http import HttpRequest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.utils.urls import replace_query_param
+
+from .models import CatalogEntry
+from .pagination import CatalogPagination
+from .renderers import FastJSONRenderer
+from .serializers import PRODUCT_LIST_FIELDS, product_list_data
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+SNAPSHOT_DIR = 'catalog-snapshots'
+INDEX_FILE = 'index.json'
+# Versions kept besides the current one, for clients which read the index just before a swap
+KEPT_VERSIONS = 1
+SNAPSHOT_COLUMNS = list(PRODUCT_LIST_FIELDS.values())
+
+
+def snapshot_root():
+    return os.path.join(settings.MEDIA_ROOT, SNAPSHOT_DIR)
+
+
+def snapshot_url(*parts):
+    return f'{settings.MEDIA_URL}{SNAPSHOT_DIR}/' + '/'.join(parts)
+
+
+def first_page(**filters):
+    """
+    First page of the product list filtered by the exact id filters, as the API returns it,
+    with a `next` link continuing through the API
+    """
+    request = Request(HttpRequest())
+    paginator = CatalogPagination()
+    page = paginator.paginate_queryset(CatalogEntry.objects.filter(**filters).values(*SNAPSHOT_COLUMNS), request)
+    next_link = None
+    if paginator.has_next:
+        next_link = reverse('product-list-list')
+        for name, value in filters.items():
+            next_link = replace_query_param(next_link, name, value)
+        next_link = replace_query_param(next_link, paginator.cursor_query_param, paginator.encode_cursor(page[-1]))
+    return {'next': next_link, 'results': product_list_data(page)}
+
+
+def write_snapshot(directory, name, data):
+    """
+    Writing the snapshot as name.json with name.json.gz and, when brotli is installed, name.json.br beside it
+    """
+    content = FastJSONRenderer().render(data)
+    with open(os.path.join(directory, f'{name}.json'), 'wb') as file:
+        file.write(content)
+    with open(os.path.join(directory, f'{name}.json.gz'), 'wb') as file:
+        file.write(gzip.compress(content, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(os.path.join(directory, f'{name}.json.br'), 'wb') as file:
+            file.write(brotli.compress(content, quality=11))
+
+
+def build_snapshots():
+    """
+    Writing the first product list page of every category and every shop to a new version directory
+    and switching the index to it.
+
+    The version is written to a hidden directory and renamed into place once complete, then index.json
+    is replaced in one rename, so readers of the index never see a partial version.
+    Returns the new index.
+    """
+    root = snapshot_root()
+    os.makedirs(root, exist_ok=True)
+    version = timezone.now().strftime('%Y%m%d%H%M%S%f')
+    building = os.path.join(root, f'.{version}')
+    os.makedirs(building)
+
+    index = {
+        'version': version,
+        'created_at': timezone.now().isoformat(),
+        'encodings': ['gzip', 'br'] if brotli is not None else ['gzip'],
+        'categories': [],
+        'shops': [],
+    }
+    try:
+        kinds = [('categories', 'category', 'category_name'), ('shops', 'shop', 'shop_name')]
+        for key, kind, name_field in kinds:
+            for object_id, name in (CatalogEntry.objects.order_by(f'{kind}_id')
+                                    .values_list(f'{kind}_id', name_field).distinct()):
+                write_snapshot(building, f'{kind}-{object_id}', first_page(**{f'{kind}_id': object_id}))
+                index[key].append({'id': object_id, 'name': name,
+                                   'url': snapshot_url(version, f'{kind}-{object_id}.json')})
+        os.rename(building, os.path.join(root, version))
+    except BaseException:
+        shutil.rmtree(building, ignore_errors=True)
+        raise
+
+    index_path = os.path.join(root, INDEX_FILE)
+    with open(f'{index_path}.{version}', 'w', encoding='utf-8') as file:
+        json.dump(index, file, ensure_ascii=False)
+    os.replace(f'{index_path}.{version}', index_path)
+
+    remove_old_versions(root, version)
+    return index
+
+
+def remove_old_versions(root, current):
+    versions = sorted(name for name in os.listdir(root)
+                      if name.isdigit() and name != current and os.path.isdir(os.path.join(root, name)))
+    for name in versions[:max(len(versions) - KEPT_VERSIONS, 0)]:
+        shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+
+def read_index():
+    """
+    The current snapshot index or None when no snapshots were built
+    """
+    try:
+        with open(os.path.join(snapshot_root(), INDEX_FILE), encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
@@ -2,6 +2,16 @@ import os
 from PIL import Image
 from celery import shared_task
 from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .importer import ImportProgress, import_feed
+from .importer.locks import try_session_lock
+from .models import ImportJob
+from .snapshots import build_snapshots
+
+SNAPSHOTS_LOCK = 'backend.snapshots'
 
 # Celery functionality test
 @shared_task
@@ -31,3 +41,70 @@ def make_thumbnails(image_path, sizes=[(200, 200), (100, 100), (50, 50)]):
         return {'error': str(e)}
 
     return {'status': 'ok', 'generated': len(sizes)}
+
+
+@shared_task
+def run_import_job(job_id):
+    """
+    Importing an uploaded price list.
+    Live progress goes to the cache because the job row is not visible to other connections
+    until the import transaction commits.
+    """
+    job = ImportJob.objects.get(id=job_id)
+    job.status = ImportJob.JobStatus.RUNNING
+    job.save(update_fields=['status'])
+
+    progress = ImportProgress()
+
+    def report(phase, rows, seconds):
+        cache.set(job.progress_key, {
+            'phase': phase,
+            'rows': progress.total_rows,
+            'seconds': progress.total_seconds,
+        }, timeout=60 * 60 * 24)
+
+    progress.callback = report
+    try:
+        result = import_feed(job.feed_path, sync=job.sync, progress=progress)
+    except Exception as e:
+        ImportJob.objects.filter(id=job.id).update(status=ImportJob.JobStatus.FAILED, error=str(e),
+                                                   finished_at=timezone.now())
+        cache.delete(job.progress_key)
+        raise
+
+    job.status = ImportJob.JobStatus.FAILED if result.error else ImportJob.JobStatus.DONE
+    job.shop = result.shop or ''
+    job.phase = ''
+    job.rows = progress.total_rows
+    job.seconds = progress.total_seconds
+    job.counters = progress.counters
+    job.error = result.error or ''
+    job.finished_at = timezone.now()
+    job.save()
+    cache.delete(job.progress_key)
+    if job.status == ImportJob.JobStatus.DONE:
+        queue_catalog_snapshots()
+
+    return {'status': job.get_status_display(), 'rows': job.rows}
+
+
+@shared_task
+def build_catalog_snapshots():
+    """
+    Rebuilding the static first-page snapshots of the catalog, after imports and on schedule.
+    A build running in another worker holds a Postgres advisory lock and makes this one skip,
+    the next run picks the changes up. The lock goes away with the connection of a worker that dies mid-build.
+    """
+    with try_session_lock(SNAPSHOTS_LOCK) as locked:
+        if not locked:
+            return {'status': 'skipped'}
+        index = build_snapshots()
+    return {'status': 'ok', 'version': index['version'],
+            'snapshots': len(index['categories']) + len(index['shops'])}
+
+
+def queue_catalog_snapshots():
+    """
+    Queueing a rebuild of the snapshots once the import transaction commits
+    """
+    transaction.on_commit(build_catalog_snapshots.delay)
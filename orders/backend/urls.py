@@ -2,7 +2,9 @@ from rest_framework.routers import DefaultRouter
 from django.urls import path, include
 
 from .views import (UserViewSet, OrderViewSet, ContactViewSet, ProductViewSet, CartContainsViewSet,
-                    UserDeliveryDetailsViewSet, DeliveryAddressViewSet, OrderConfirmationViewSet, ProductInfoViewSet)
+                    UserDeliveryDetailsViewSet, DeliveryAddressViewSet, OrderConfirmationViewSet, ProductInfoViewSet,
+                    ImportJobViewSet, StockUpdateView, CatalogCacheStatsView, CatalogExportView,
+                    CatalogSnapshotsView)
 
 router = DefaultRouter()
 router.register('users', UserViewSet, basename='users')
@@ -14,7 +16,12 @@ router.register('user-delivery-details', UserDeliveryDetailsViewSet, basename='u
 router.register('delivery-address', DeliveryAddressViewSet, basename='delivery-address')
 router.register('order-confirmation', OrderConfirmationViewSet, basename='order-confirmation')
 router.register('product-info', ProductInfoViewSet, basename='product-info')
+router.register('import-jobs', ImportJobViewSet, basename='import-jobs')
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('shops/<int:shop_id>/stock/', StockUpdateView.as_view(), name='shop-stock'),
+    path('catalog-cache/', CatalogCacheStatsView.as_view(), name='catalog-cache'),
+    path('catalog-export/', CatalogExportView.as_view(), name='catalog-export'),
+    path('catalog-snapshots/', CatalogSnapshotsView.as_view(), name='catalog-snapshots'),
 ]
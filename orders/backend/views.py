@@ -1,30 +1,46 @@
-from collections import defaultdict
-
 from django.contrib.auth import authenticate, login
 from django.contrib.auth.backends import AllowAllUsersModelBackend
 from django.core.mail import send_mail
-from django.http import HttpResponse
+from django.db.models import Count, Max
+from django.http import HttpResponse, StreamingHttpResponse
 from rest_framework.parsers import MultiPartParser, FormParser
 from django.shortcuts import render, get_object_or_404
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
 from django.views.decorators.csrf import csrf_exempt
 from drf_yasg.utils import swagger_auto_schema
-from rest_framework import generics, filters, status, viewsets
+from rest_framework import generics, mixins, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.exceptions import PermissionDenied
-from rest_framework.parsers import FormParser
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.parsers import FormParser, JSONParser
 from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
 from django_filters.rest_framework import DjangoFilterBackend
 
+from . import bitmap_index, catalog_cache
+from .conditional import make_etag, not_modified, set_validators
+from .export import ACCEPTS_GZIP, EXPORT_FORMATS, export_chunks, export_rows
+from .facets import facet_counts
 from .filters import ProductListFilter
+from .importer import FeedError
+from .importer.stock import parse_stock_row, update_stock
 from .models import User, Shop, Category, Model, ProductInfo, Parameter, ProductParameter, Order, OrderItem, Contact, \
-    DeliveryAddress
+    DeliveryAddress, ImportJob, CatalogEntry
+from .pagination import CatalogPagination
+from .parsers import StockCSVParser
 from .permissions import IsAdminOrReadOnly, IsAdminOrSelf
+from .renderers import ColumnarJSONRenderer, FastJSONRenderer, MessagePackRenderer
+from .search import RankedSearchFilter, search_scope
 from .serializers import UserSerializer, ShopSerializer, CategorySerializer, ModelSerializer, ProductInfoSerializer, \
     ParameterSerializer, ProductParameterSerializer, OrderSerializer, OrderItemSerializer, ContactSerializer, \
     ProductListSerializer, CartContainsSerializer, DeliveryAddressSerializer, UserDeliveryDetailsSerializer, \
-    ConfirmOrderSerializer, OrderHistorySerializer, CertainProductSerializer
+    ConfirmOrderSerializer, OrderHistorySerializer, CertainProductSerializer, ImportJobSerializer, \
+    PRODUCT_LIST_FIELDS, product_list_data
+from .snapshots import read_index
+from .tasks import run_import_job
 
 
 class UserViewSet(ModelViewSet):
@@ -57,100 +73,198 @@ class ProductViewSet(ReadOnlyModelViewSet):
     """
     The API endpoint provides certain product or list of products with details:
     name, quantity, price, shop, category, parameters.
-    List of products supports filtering and search. Read-only.
+    Products are read from the denormalised catalog entries, one row per product without joins.
+    List of products supports filtering, full-text search ranked by relevance, cursor pagination,
+    sparse fieldsets (?fields=id,name,price), optional facet counts (?facets=true)
+    and a compact columnar representation (?format=columnar). Read-only.
+    Pages and products are cached under the catalog versions of their shops,
+    the X-Cache header tells whether a response came from the cache.
     """
-    queryset = ProductParameter.objects.select_related(
-        'product_info__model__category',
-        'product_info__shop',
-        'parameter'
-    )
+    queryset = CatalogEntry.objects.all()
     serializer_class = ProductListSerializer
 
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filter_backends = [DjangoFilterBackend, RankedSearchFilter]
     filterset_class = ProductListFilter
-    search_fields = [
-        'product_info__product_name',
-        'product_info__shop__name',
-        'product_info__model__name',
-        'product_info__model__category__name',
-    ]
-    lookup_field = 'product_info__id'
-    lookup_url_kwarg = 'pk'
+    pagination_class = CatalogPagination
+    renderer_classes = [FastJSONRenderer, ColumnarJSONRenderer, BrowsableAPIRenderer, MessagePackRenderer]
+
+    def get_list_fields(self, request):
+        """
+        Product list fields requested with ?fields=id,name,price, all fields by default
+        """
+        requested = {name.strip() for name in request.query_params.get('fields', '').split(',') if name.strip()}
+        if not requested:
+            return list(PRODUCT_LIST_FIELDS)
+        unknown = requested - set(PRODUCT_LIST_FIELDS)
+        if unknown:
+            raise ValidationError({'fields': f'Unknown fields {", ".join(sorted(unknown))}, '
+                                             f'fields are {", ".join(PRODUCT_LIST_FIELDS)}'})
+        return [name for name in PRODUCT_LIST_FIELDS if name in requested]
 
     def get_queryset(self):
         queryset = super().get_queryset()
+        if self.action == 'list':
+            # Only the requested columns and the ordering columns needed by the cursor are read
+            ordering = [field.lstrip('-') for field in self.paginator.get_ordering(self.request) if field != '-rank']
+            fields = self.get_list_fields(self.request)
+            return queryset.values(*dict.fromkeys([*ordering, *(PRODUCT_LIST_FIELDS[name] for name in fields)]))
         return queryset.values(
-            'product_info__product_name',
-            'product_info__quantity',
-            'product_info__price',
-            'product_info__shop__name',
-            'product_info__model__name',
-            'product_info__model__category__name',
-            'parameter__name',
-            'value'
+            'product_id',
+            'product_name',
+            'quantity',
+            'price',
+            'shop_id',
+            'shop_name',
+            'model_name',
+            'category_name',
+            'parameters',
         )
 
     def list(self, request, *args, **kwargs):
         """
-        Viewing list of products
+        Viewing list of products, one page at a time
         """
-        queryset = self.filter_queryset(self.get_queryset())
-
-        parameters_dict = defaultdict(dict)
-        unique_products = []
-        seen_products = set()
-
-        for product in queryset:
-            product_name = product.get('product_info__product_name')
-            param_name = product.get('parameter__name')
-            param_value = product.get('value')
-            parameters_dict[product_name][param_name] = param_value
-
-            if product_name not in seen_products:
-                seen_products.add(product_name)
-                unique_products.append(product)
-
-        serializer = self.get_serializer(
-            unique_products,
-            many=True,
-            context={'parameter_dict': parameters_dict}
-        )
-
-        return Response(serializer.data)
+        key = catalog_cache.list_key(request)
+        etag = make_etag(key, request.META.get('HTTP_ACCEPT'))
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+
+        page_data = catalog_cache.get_page(key)
+        if page_data is not None:
+            return set_validators(Response(page_data, headers={'X-Cache': 'HIT'}), etag)
+
+        with search_scope():
+            product_ids = self.get_indexed_page(request)
+            if product_ids is not None:
+                queryset = self.get_queryset().filter(product_id__in=product_ids)
+            else:
+                queryset = self.filter_queryset(self.get_queryset())
+            page = self.paginate_queryset(queryset)
+            response = self.get_paginated_response(product_list_data(page, self.get_list_fields(request)))
+            if request.query_params.get('facets', '').lower() in ('1', 'true', 'yes'):
+                response.data['facets'] = self.get_facets(request, queryset)
+        catalog_cache.set_page(key, response.data)
+        response['X-Cache'] = 'MISS'
+        return set_validators(response, etag)
+
+    def get_indexed_page(self, request):
+        """
+        Product ids of the requested page found by the bitmap index,
+        or None when the index is disabled or cannot answer the filters
+        """
+        if not bitmap_index.can_answer(request.query_params):
+            return None
+        index = bitmap_index.get_index()
+        if index is None:
+            return None
+        after = self.paginator.get_cursor_key(request)
+        return index.page(request.query_params, after, self.paginator.get_page_size(request) + 1)
+
+    def get_facets(self, request, queryset):
+        """
+        Facet counts of the filtered products, the same for every page and ordering of the list
+        """
+        key = catalog_cache.list_key(request, kind='facets', ignore=('cursor', 'ordering', 'page_size', 'facets'))
+        facets = catalog_cache.get_page(key)
+        if facets is None:
+            facets = facet_counts(queryset)
+            catalog_cache.set_page(key, facets)
+        return facets
 
     def retrieve(self, request, *args, **kwargs):
         """
         Viewing certain product
         """
-        product_info_id = self.kwargs.get(self.lookup_url_kwarg)
-
-        queryset = ProductParameter.objects.select_related(
-            'product_info__model__category',
-            'product_info__shop',
-            'parameter'
-        ).filter(product_info__id=product_info_id)
-
-        if not queryset.exists():
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        product_id = self.kwargs.get(lookup_url_kwarg)
+        cached = catalog_cache.get_product(product_id)
+        if cached is not None:
+            etag = make_etag('product', product_id, cached['shop'], cached['version'], request.META.get('HTTP_ACCEPT'))
+            response = not_modified(request, etag)
+            if response is not None:
+                return response
+            return set_validators(Response(cached['data'], headers={'X-Cache': 'HIT'}), etag)
+
+        product = self.get_queryset().filter(product_id=product_id).first()
+        if product is None:
             return Response({'detail': 'Not found'}, status=404)
-
-        first_item = queryset.first()
-
-        param_dict = {}
-        for param in queryset:
-            param_dict[param.parameter.name] = param.value
+        version = catalog_cache.shop_versions([product['shop_id']])[product['shop_id']]
+        etag = make_etag('product', product_id, product['shop_id'], version, request.META.get('HTTP_ACCEPT'))
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
 
         data = {
-             'product_name': first_item.product_info.product_name,
-            'quantity': first_item.product_info.quantity,
-            'price': first_item.product_info.price,
-            'shop': first_item.product_info.shop.name,
-            'model': first_item.product_info.model.name,
-            'category': first_item.product_info.model.category.name,
-            'parameters': param_dict
+            'product_name': product['product_name'],
+            'quantity': product['quantity'],
+            'price': product['price'],
+            'shop': product['shop_name'],
+            'model': product['model_name'],
+            'category': product['category_name'],
+            'parameters': product['parameters'],
         }
 
         serializer = CertainProductSerializer(data)
-        return Response(serializer.data)
+        catalog_cache.set_product(product_id, product['shop_id'], version, serializer.data)
+        return set_validators(Response(serializer.data, headers={'X-Cache': 'MISS'}), etag)
+
+
+class CatalogCacheStatsView(APIView):
+    """
+    Admin endpoint with hit and miss counters of the product list cache
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(catalog_cache.cache_stats())
+
+
+class CatalogSnapshotsView(APIView):
+    """
+    Index of the pre-built catalog snapshots: their version and the URLs of the first product list page
+    of every category and shop, served as static files with .gz and .br variants
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        index = read_index()
+        if index is None:
+            return Response({'detail': 'Catalog snapshots are not built yet'}, status=status.HTTP_404_NOT_FOUND)
+        etag = make_etag('snapshots', index['version'], request.META.get('HTTP_ACCEPT'))
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        return set_validators(Response(index), etag)
+
+
+class CatalogExportView(generics.GenericAPIView):
+    """
+    Streaming export of the whole catalog or of the products matching the product list filters,
+    as NDJSON (default) or CSV with ?file_format=csv, gzipped when the client accepts it.
+    Rows are read through a server-side cursor, so memory does not grow with the catalog.
+    """
+    queryset = CatalogEntry.objects.all()
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = ProductListFilter
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(responses={200: 'NDJSON or CSV stream of catalog entries'})
+    def get(self, request):
+        file_format = request.query_params.get('file_format', 'ndjson')
+        if file_format not in EXPORT_FORMATS:
+            return Response({'error': f'File format must be one of {", ".join(EXPORT_FORMATS)}'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        chunks = export_chunks(export_rows(self.filter_queryset(self.get_queryset())), file_format)
+        gzipped = ACCEPTS_GZIP.search(request.META.get('HTTP_ACCEPT_ENCODING', '')) is not None
+        response = StreamingHttpResponse(compress_sequence(chunks) if gzipped else chunks,
+                                         content_type=f'{EXPORT_FORMATS[file_format]}; charset=utf-8')
+        if gzipped:
+            response['Content-Encoding'] = 'gzip'
+        patch_vary_headers(response, ['Accept-Encoding'])
+        response['Content-Disposition'] = f'attachment; filename="catalog.{file_format}"'
+        return response
 
 
 class CartContainsViewSet(ModelViewSet):
@@ -332,17 +446,48 @@ class OrderViewSet(ModelViewSet):
 
     @action(detail=False, methods=['get'], url_path='user-cart')
     def user_cart(self, request):
-        order = self.get_queryset().first()
-        if not order:
+        """
+        Viewing the current cart. The ETag and Last-Modified are read with one query,
+        a client with a current copy gets 304 without the cart being serialized.
+        """
+        stamp = (self.get_queryset()
+                 .values('id', 'updated_at')
+                 .annotate(products_updated_at=Max('orderitem__product__updated_at'))
+                 .order_by('id')
+                 .first())
+        if not stamp:
             return Response({'detail': 'order is empty'}, status=404)
+        last_modified = max(filter(None, [stamp['updated_at'], stamp['products_updated_at']]))
+        etag = make_etag('cart', stamp['id'], stamp['updated_at'], stamp['products_updated_at'])
+        response = not_modified(request, etag, last_modified, private=True)
+        if response is not None:
+            return response
+
+        order = self.get_queryset().get(id=stamp['id'])
         serializer = self.get_serializer(order)
-        return Response(serializer.data)
+        return set_validators(Response(serializer.data), etag, last_modified, private=True)
 
     @action(detail=False, methods=['get'], url_path='history')
     def history(self, request):
+        """
+        Viewing all orders of the user. Like the cart, it is answered with 304 when nothing has changed.
+        """
         orders = Order.objects.filter(user=request.user).order_by('-created_at')
+        stamp = orders.aggregate(
+            count=Count('id', distinct=True),
+            last_id=Max('id'),
+            updated_at=Max('updated_at'),
+            products_updated_at=Max('orderitem__product__updated_at'),
+        )
+        last_modified = max(filter(None, [stamp['updated_at'], stamp['products_updated_at']]), default=None)
+        etag = make_etag('history', stamp['count'], stamp['last_id'], stamp['updated_at'],
+                         stamp['products_updated_at'])
+        response = not_modified(request, etag, last_modified, private=True)
+        if response is not None:
+            return response
+
         serializer = self.get_serializer(orders, many=True)
-        return Response(serializer.data)
+        return set_validators(Response(serializer.data), etag, last_modified, private=True)
 
 
 class OrderConfirmationViewSet(viewsets.ViewSet):
@@ -384,6 +529,54 @@ class OrderConfirmationViewSet(viewsets.ViewSet):
         return Response({'message': 'Order confirmed'}, status=200)
 
 
+class ImportJobViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
+                       viewsets.GenericViewSet):
+    """
+    Admin endpoint for importing price lists in the background.
+    Uploading a file queues the import and returns the job at once, the job shows its progress.
+    """
+    queryset = ImportJob.objects.order_by('-created_at')
+    serializer_class = ImportJobSerializer
+    parser_classes = [MultiPartParser, FormParser]
+    permission_classes = [IsAdminUser]
+
+    def create(self, request, *args, **kwargs):
+        """
+        Uploading a price list and queueing its import
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = serializer.save(user=request.user)
+
+        run_import_job.delay(job.id)
+
+        job.refresh_from_db()
+        return Response(self.get_serializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+class StockUpdateView(APIView):
+    """
+    Admin endpoint for frequent stock and price updates of a shop.
+    Accepts (external_id, quantity, price) rows as a JSON list or text/csv lines
+    and changes only quantity and price of the shop's products.
+    """
+    parser_classes = [JSONParser, StockCSVParser]
+    permission_classes = [IsAdminUser]
+
+    def post(self, request, shop_id):
+        shop = get_object_or_404(Shop, id=shop_id)
+        if not isinstance(request.data, list):
+            return Response({'error': 'List of (external_id, quantity, price) rows is required'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            rows = [row if isinstance(row, tuple) else parse_stock_row(row) for row in request.data]
+        except FeedError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        updated, not_found = update_stock(shop.id, rows)
+        return Response({'updated': updated, 'not_found': not_found}, status=status.HTTP_200_OK)
+
+
 @swagger_auto_schema(auto_schema=None)
 class ShopViewSet(ModelViewSet):
     queryset = Shop.objects.all()
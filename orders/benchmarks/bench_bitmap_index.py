@@ -0,0 +1,98 @@
+"""
+Product list filter latency: SQL filters of catalog entries (ProductListFilter) against the in-process
+bitmap index, which intersects bitmaps and reads only the page rows. Also reports the build time,
+the time to patch the index after one product changes and the memory of the index scaled to a million products.
+
+    python -m benchmarks.bench_bitmap_index --products 1000000
+"""
+import argparse
+import statistics
+import time
+import tracemalloc
+
+from benchmarks.bench_import import clear_catalog
+from benchmarks.common import print_table, benchmark_database
+from benchmarks.feeds import generate_feed
+
+from django.http import QueryDict
+
+from backend.bitmap_index import BitmapIndex, entry_rows
+from backend.filters import ProductListFilter
+from backend.importer import CatalogImporter
+from backend.models import CatalogEntry
+
+QUERIES = [
+    'param[Цвет]=черный',
+    'param[Цвет]=черный&param[Встроенная память (Гб)]=256',
+    'param[Цвет]=красный&param[Цвет]=синий&param[Диагональ (дюйм)]=6.1&category=category 7',
+    'shop=Shop 1&model=vendor/model-42&param[Разрешение (пикс)]=2400x1080',
+]
+PAGE_SIZE = 20
+FIELDS = ['product_id', 'product_name', 'quantity', 'price', 'shop_name', 'model_name', 'category_name', 'parameters']
+
+
+def sql_page(params):
+    queryset = ProductListFilter(data=params, queryset=CatalogEntry.objects.values(*FIELDS)).qs
+    return list(queryset.order_by('product_id')[:PAGE_SIZE + 1])
+
+
+def index_page(index, params):
+    product_ids = index.page(params, limit=PAGE_SIZE + 1)
+    return list(CatalogEntry.objects.filter(product_id__in=product_ids).values(*FIELDS).order_by('product_id'))
+
+
+def measure(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=1000000)
+    parser.add_argument('--shop-size', type=int, default=100000, help='Products per generated shop')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rows = []
+    with benchmark_database():
+        clear_catalog()
+        for first_id in range(1, args.products + 1, args.shop_size):
+            goods = min(args.shop_size, args.products - first_id + 1)
+            CatalogImporter().run(generate_feed(goods, shop=f'Shop {first_id // args.shop_size}',
+                                                seed=first_id, first_id=first_id))
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        index = BitmapIndex()
+        index.synchronise()
+        build = time.perf_counter() - started
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        product_id = index.ids[len(index.ids) // 2]
+
+        def remove_and_add():
+            index.apply([product_id], [])
+            index.apply([product_id], entry_rows(product_id__in=[product_id]))
+
+        patch = measure(remove_and_add, args.repeat) / 2
+
+        for query in QUERIES:
+            params = QueryDict(query)
+            sql = measure(lambda: sql_page(params), args.repeat)
+            indexed = measure(lambda: index_page(index, params), args.repeat)
+            rows.append([query, f'{sql * 1000:.1f}', f'{indexed * 1000:.1f}', f'{sql / indexed:.1f}x'])
+
+    print_table(['filters', 'SQL ms', 'bitmap ms', 'speed-up'], rows)
+    print(f'Index of {args.products} products: built in {build:.1f} s, '
+          f'{memory / 2 ** 20 / args.products * 1000000:.0f} MiB per million products, '
+          f'{len(index.bitmaps)} bitmaps')
+    print(f'Patching the index after a change of one product: {patch * 1000:.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+Price list parsing per format: time, peak Python memory and file size per 100k goods.
+
+    python -m benchmarks.bench_feed_formats --goods 100000
+"""
+import argparse
+import os
+import tempfile
+
+from benchmarks import common  # noqa: F401 (configures Django)
+from benchmarks.bench_yaml_reader import measure
+from benchmarks.common import print_table
+from benchmarks.feeds import generate_feed
+
+from backend.importer import open_feed, write_feed
+
+FORMATS = [('yaml', 'feed.yaml', False), ('yaml stream', 'feed.yaml', True), ('csv', 'feed.csv', False),
+           ('jsonl', 'feed.jsonl', False)]
+
+
+def consume(path, stream):
+    with open_feed(path, stream=stream) as data:
+        return sum(1 for _ in data['goods'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--goods', type=int, default=100000)
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        feed = generate_feed(args.goods)
+        for name in {name for _, name, _ in FORMATS}:
+            write_feed(feed, os.path.join(tmp, name))
+
+        per_100k = 100000 / args.goods
+        for label, name, stream in FORMATS:
+            path = os.path.join(tmp, name)
+            parsed, seconds, peak = measure(lambda path: consume(path, stream), path)
+            rows.append([label, parsed, f'{os.path.getsize(path) / 2 ** 20:.1f}', f'{seconds:.2f}',
+                         f'{seconds * per_100k:.2f}', f'{peak / 2 ** 20:.1f}'])
+
+    print_table(['format', 'goods', 'file MiB', 'seconds', 'seconds/100k', 'peak MiB'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Price list import throughput: row-by-row legacy import against the bulk import engine.
+
+    python -m benchmarks.bench_import --goods 50000
+"""
+import argparse
+import os
+import tempfile
+
+from benchmarks.common import benchmark_database, timer, print_table
+from benchmarks.feeds import generate_feed, write_yaml
+
+from django.core.management import call_command
+from django.db import transaction
+from yaml import load, Loader
+
+from backend.catalog import catalog_signals_paused
+from backend.models import Shop, Category, Model, ProductInfo, Parameter, ProductParameter, CatalogEntry
+
+
+def legacy_import(file_path):
+    """
+    The original parse_data algorithm: one query per category, model, product and parameter value
+    """
+    with open(file_path, encoding='utf-8') as file:
+        data = load(file, Loader=Loader)
+
+    shop, created = Shop.objects.get_or_create(name=data.get('shop'))
+
+    categories_dict = {}
+    for category in data.get('categories'):
+        product_category = Category.objects.create(id=category.get('id'), name=category.get('name'))
+        product_category.shops.add(shop)
+        categories_dict[category.get('id')] = product_category
+
+    goods = data.get('goods')
+    models_dict = {}
+    for good in goods:
+        if good.get('model') not in models_dict:
+            models_dict[good.get('model')] = Model.objects.create(
+                name=good.get('model'), category=categories_dict.get(good.get('category')))
+
+    products_info_dict = {}
+    for good in goods:
+        products_info_dict[good.get('id')] = ProductInfo.objects.create(
+            id=good.get('id'),
+            product_name=good.get('name'),
+            model=models_dict.get(good.get('model')),
+            shop=shop,
+            quantity=good.get('quantity'),
+            price=good.get('price'),
+            rrp=good.get('price_rrc'),
+        )
+
+    for good in goods:
+        for parameter in good.get('parameters'):
+            Parameter.objects.get_or_create(name=parameter)
+
+    for good in goods:
+        for key, value in good.get('parameters').items():
+            ProductParameter.objects.get_or_create(
+                product_info=products_info_dict.get(good.get('id')),
+                parameter=Parameter.objects.get(name=key),
+                value=value,
+            )
+
+
+def clear_catalog():
+    with catalog_signals_paused():
+        for model in (CatalogEntry, ProductParameter, ProductInfo, Parameter, Model, Category, Shop):
+            model.objects.all().delete()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--goods', type=int, default=50000)
+    parser.add_argument('--legacy-goods', type=int, default=None,
+                        help='Feed size for the legacy import (it is slow, defaults to --goods)')
+    args = parser.parse_args()
+
+    results = {}
+    rows = {}
+    with tempfile.TemporaryDirectory() as tmp, benchmark_database():
+        for name, goods in [('legacy', args.legacy_goods or args.goods), ('bulk', args.goods)]:
+            path = os.path.join(tmp, f'{name}.yaml')
+            write_yaml(generate_feed(goods), path)
+            clear_catalog()
+
+            with timer(results, name):
+                if name == 'legacy':
+                    with transaction.atomic():
+                        legacy_import(path)
+                else:
+                    call_command('parse_data', file=path, stdout=open(os.devnull, 'w'))
+            rows[name] = ProductInfo.objects.count() + ProductParameter.objects.count()
+
+    print_table(
+        ['import', 'rows', 'seconds', 'rows/s'],
+        [[name, rows[name], f'{results[name]:.2f}', f'{rows[name] / results[name]:.0f}'] for name in results],
+    )
+    print(f'speedup: {(rows["bulk"] / results["bulk"]) / (rows["legacy"] / results["legacy"]):.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Encode and decode time and body size of MessagePack against JSON (JSONRenderer and JSONParser)
+for product list pages and order payloads shaped like the API responses.
+No database is needed, payloads are generated in memory.
+
+    python -m benchmarks.bench_msgpack --page-sizes 20 100 --order-items 5 50
+"""
+import argparse
+import io
+import random
+import statistics
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from benchmarks.bench_serializers import generate_rows
+from benchmarks.common import print_table
+
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from backend.parsers import MessagePackParser
+from backend.renderers import MessagePackRenderer
+from backend.serializers import product_list_data
+
+
+def catalog_page(page_size):
+    return {'next': 'http://testserver/api/v1/product-list/?cursor=eyJvIjogImlkIiwgInYiOiBbMjBdfQ%3D%3D',
+            'results': product_list_data(generate_rows(page_size))}
+
+
+def order(items, seed=0):
+    rnd = random.Random(seed)
+    order_items = []
+    for number in range(1, items + 1):
+        price = Decimal(rnd.randrange(100000, 20000000)) / 100
+        quantity = rnd.randrange(1, 5)
+        order_items.append({'id': number, 'name': f'Товар vendor/model-{number} #{number}', 'shop': 'Benchmark shop',
+                            'price': str(price), 'quantity': quantity, 'total_sum': price * quantity})
+    return {
+        'user_login': 'client@example.com',
+        'user': 1,
+        'created_at': datetime(2026, 10, 17, 12, 30, tzinfo=timezone.utc).isoformat(),
+        'status': 2,
+        'items': order_items,
+        'order_total': sum(item['total_sum'] for item in order_items),
+    }
+
+
+def measure(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def compare(label, payload, repeat):
+    row = [label]
+    for renderer, parser in [(JSONRenderer(), JSONParser()), (MessagePackRenderer(), MessagePackParser())]:
+        body = renderer.render(payload)
+        encode = measure(lambda: renderer.render(payload), repeat)
+        decode = measure(lambda: parser.parse(io.BytesIO(body)), repeat)
+        row += [len(body), f'{encode * 1000:.3f}', f'{decode * 1000:.3f}']
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--page-sizes', type=int, nargs='+', default=[20, 100])
+    parser.add_argument('--order-items', type=int, nargs='+', default=[5, 50])
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    rows = [compare(f'catalog page of {size}', catalog_page(size), args.repeat) for size in args.page_sizes]
+    rows += [compare(f'order of {items} items', order(items), args.repeat) for items in args.order_items]
+
+    print_table(['payload', 'JSON bytes', 'JSON encode ms', 'JSON decode ms',
+                 'msgpack bytes', 'msgpack encode ms', 'msgpack decode ms'], rows)
+
+
+if __name__ == '__main__':
+    main()
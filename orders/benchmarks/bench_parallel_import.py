@@ -0,0 +1,49 @@
+"""
+Multi-shop import wall-clock time with a growing number of worker processes.
+
+    python -m benchmarks.bench_parallel_import --shops 8 --goods 20000 --workers 1 4 8
+"""
+import argparse
+import os
+import tempfile
+
+from benchmarks.bench_import import clear_catalog
+from benchmarks.common import benchmark_database, timer, print_table
+from benchmarks.feeds import generate_feed, write_yaml
+
+from django.core.management import call_command
+
+from backend.models import ProductInfo, ProductParameter
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--shops', type=int, default=8)
+    parser.add_argument('--goods', type=int, default=20000, help='Goods per shop')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8])
+    args = parser.parse_args()
+
+    results = {}
+    rows = {}
+    with tempfile.TemporaryDirectory() as tmp, benchmark_database():
+        for number in range(args.shops):
+            feed = generate_feed(args.goods, shop=f'Benchmark shop {number}', seed=number,
+                                 first_id=number * args.goods + 1)
+            write_yaml(feed, os.path.join(tmp, f'shop{number}.yaml'))
+
+        for workers in args.workers:
+            clear_catalog()
+            with timer(results, workers):
+                call_command('parse_data', feeds=tmp, workers=workers, stdout=open(os.devnull, 'w'))
+            rows[workers] = ProductInfo.objects.count() + ProductParameter.objects.count()
+
+    baseline = results[args.workers[0]]
+    print_table(
+        ['workers', 'rows', 'seconds', 'rows/s', 'speedup'],
+        [[workers, rows[workers], f'{seconds:.2f}', f'{rows[workers] / seconds:.0f}', f'{baseline / seconds:.1f}x']
+         for workers, seconds in results.items()],
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Product list page latency for filter and ordering combinations backed by the catalog entry indexes:
+the first page and a page deep in the list, read through ProductListFilter and CatalogPagination.
+
+    python -m benchmarks.bench_product_list --products 1000000
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks.bench_import import clear_catalog
+from benchmarks.common import print_table, benchmark_database
+from benchmarks.feeds import generate_feed
+
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from backend.filters import ProductListFilter
+from backend.models import CatalogEntry
+from backend.importer import CatalogImporter
+from backend.pagination import CatalogPagination
+
+FIELDS = ['product_id', 'product_name', 'quantity', 'price', 'shop_id', 'shop_name', 'model_name', 'category_name',
+          'parameters']
+DEEP_PAGES = 50
+
+
+def combinations(entry):
+    return [
+        {'ordering': 'price'},
+        {'ordering': '-price', 'in_stock': 'true'},
+        {'ordering': 'name'},
+        {'ordering': '-quantity'},
+        {'shop_id': entry.shop_id, 'ordering': 'price'},
+        {'category_id': entry.category_id, 'ordering': '-price'},
+        {'category_id': entry.category_id, 'ordering': 'price', 'in_stock': 'true'},
+        {'model_id': entry.model_id, 'ordering': 'price'},
+    ]
+
+
+def read_page(params, cursor=None):
+    request = Request(APIRequestFactory().get('/api/v1/product-list/', {**params, 'cursor': cursor or ''}))
+    queryset = ProductListFilter(data=request.query_params, queryset=CatalogEntry.objects.values(*FIELDS),
+                                 request=request).qs
+    paginator = CatalogPagination()
+    page = paginator.paginate_queryset(queryset, request)
+    return paginator.encode_cursor(page[-1]) if paginator.has_next else None
+
+
+def measure(params, cursor, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        read_page(params, cursor)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=1000000)
+    parser.add_argument('--shop-size', type=int, default=100000, help='Products per generated shop')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rows = []
+    with benchmark_database():
+        clear_catalog()
+        for first_id in range(1, args.products + 1, args.shop_size):
+            goods = min(args.shop_size, args.products - first_id + 1)
+            CatalogImporter().run(generate_feed(goods, shop=f'Shop {first_id // args.shop_size}',
+                                                seed=first_id, first_id=first_id))
+
+        for params in combinations(CatalogEntry.objects.order_by('product_id').first()):
+            cursor = None
+            for _ in range(DEEP_PAGES):
+                cursor = read_page(params, cursor)
+                if cursor is None:
+                    break
+            first = measure(params, None, args.repeat)
+            deep = measure(params, cursor, args.repeat) if cursor else None
+            label = '&'.join(f'{name}={value}' for name, value in params.items())
+            rows.append([label, f'{first * 1000:.1f}', f'{deep * 1000:.1f}' if deep is not None else '-'])
+
+    print_table(['filters', 'first page ms', f'page {DEEP_PAGES + 1} ms'], rows)
+
+
+if __name__ == '__main__':
+    main()
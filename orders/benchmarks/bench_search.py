@@ -0,0 +1,79 @@
+"""
+Product search latency: icontains over product, shop, model and category names through joins
+(what SearchFilter did) against full-text search on the stored search vector of catalog entries.
+
+    python -m benchmarks.bench_search --products 1000000
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks.bench_import import clear_catalog
+from benchmarks.common import print_table, benchmark_database
+from benchmarks.feeds import generate_feed
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F, Q
+
+from backend.importer import CatalogImporter
+from backend.models import ProductInfo, CatalogEntry
+from backend.search import SEARCH_CONFIG
+
+TERMS = ['vendor/model-42', 'черный', 'category 7', 'Товар']
+PAGE_SIZE = 20
+
+
+def icontains_search(term):
+    condition = Q()
+    for word in term.split():
+        condition &= (Q(product_name__icontains=word) | Q(shop__name__icontains=word)
+                      | Q(model__name__icontains=word) | Q(model__category__name__icontains=word))
+    rows = (ProductInfo.objects.filter(condition)
+            .values('id', 'product_name', 'shop__name', 'model__name', 'model__category__name')
+            .order_by('id'))
+    return list(rows[:PAGE_SIZE])
+
+
+def ranked_search(term):
+    query = SearchQuery(term, config=SEARCH_CONFIG, search_type='websearch')
+    rows = (CatalogEntry.objects.filter(search_vector=query)
+            .annotate(rank=SearchRank(F('search_vector'), query))
+            .values('product_id', 'product_name', 'shop_name', 'model_name', 'category_name', 'rank')
+            .order_by('-rank', '-product_id'))
+    return list(rows[:PAGE_SIZE])
+
+
+def measure(search, term, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        search(term)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=1000000)
+    parser.add_argument('--shop-size', type=int, default=100000, help='Products per generated shop')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rows = []
+    with benchmark_database():
+        clear_catalog()
+        for first_id in range(1, args.products + 1, args.shop_size):
+            goods = min(args.shop_size, args.products - first_id + 1)
+            CatalogImporter().run(generate_feed(goods, shop=f'Shop {first_id // args.shop_size}',
+                                                seed=first_id, first_id=first_id))
+
+        for term in TERMS:
+            legacy = measure(icontains_search, term, args.repeat)
+            ranked = measure(ranked_search, term, args.repeat)
+            rows.append([term, f'{legacy * 1000:.1f}', f'{ranked * 1000:.1f}', f'{legacy / ranked:.1f}x'])
+
+    print_table(['term', 'icontains ms', 'full-text ms', 'speed-up'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Product list serialisation time per page: ProductListSerializer with JSONRenderer against plain dicts
+built from .values() rows with FastJSONRenderer (orjson when installed), for all fields and a sparse fieldset.
+Also compares body size and encoding time of the default and the columnar (?format=columnar) pages.
+No database is needed, rows are generated in memory.
+
+    python -m benchmarks.bench_serializers --page-sizes 20 100 1000
+"""
+import argparse
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from benchmarks.common import print_table
+from benchmarks.feeds import PARAMETERS
+
+from rest_framework.renderers import JSONRenderer
+
+from backend.renderers import ColumnarJSONRenderer, FastJSONRenderer, orjson
+from backend.serializers import PRODUCT_LIST_FIELDS, ProductListSerializer, product_list_data
+
+SPARSE_FIELDS = ['id', 'name', 'price']
+
+
+def generate_rows(count, seed=0):
+    rnd = random.Random(seed)
+    return [
+        {
+            'product_id': number,
+            'product_name': f'Товар vendor/model-{number % 500} #{number}',
+            'model_name': f'vendor/model-{number % 500}',
+            'category_name': f'Benchmark shop category {number % 20}',
+            'shop_name': 'Benchmark shop',
+            'parameters': {name: str(make_value(rnd)) for name, make_value in PARAMETERS.items()},
+            'price': Decimal(rnd.randrange(100000, 20000000)) / 100,
+            'quantity': rnd.randrange(0, 100),
+        }
+        for number in range(1, count + 1)
+    ]
+
+
+def serializer_page(rows, fields):
+    data = ProductListSerializer(rows, many=True).data
+    if fields is not None:
+        data = [{name: item[name] for name in fields} for item in data]
+    return JSONRenderer().render({'next': None, 'results': data})
+
+
+def plain_page(rows, fields):
+    data = product_list_data(rows, fields or tuple(PRODUCT_LIST_FIELDS))
+    return FastJSONRenderer().render({'next': None, 'results': data})
+
+
+def measure(function, rows, fields, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(rows, fields)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--page-sizes', type=int, nargs='+', default=[20, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    rows = []
+    for page_size in args.page_sizes:
+        page = generate_rows(page_size)
+        for label, fields in [('all', None), (','.join(SPARSE_FIELDS), SPARSE_FIELDS)]:
+            drf = measure(serializer_page, page, fields, args.repeat)
+            plain = measure(plain_page, page, fields, args.repeat)
+            rows.append([page_size, label, f'{drf * 1000:.2f}', f'{plain * 1000:.2f}', f'{drf / plain:.1f}x'])
+
+    print_table(['page size', 'fields', 'serializer ms', 'plain ms', 'speed-up'], rows)
+    print()
+
+    rows = []
+    for page_size in args.page_sizes:
+        page = {'next': None, 'results': product_list_data(generate_rows(page_size))}
+        default, columnar = FastJSONRenderer().render(page), ColumnarJSONRenderer().render(page)
+        default_time = measure(lambda data, _: FastJSONRenderer().render(data), page, None, args.repeat)
+        columnar_time = measure(lambda data, _: ColumnarJSONRenderer().render(data), page, None, args.repeat)
+        rows.append([page_size, len(default), len(columnar), f'{len(default) / len(columnar):.1f}x',
+                     f'{default_time * 1000:.2f}', f'{columnar_time * 1000:.2f}'])
+
+    print_table(['page size', 'default bytes', 'columnar bytes', 'smaller', 'default ms', 'columnar ms'], rows)
+    print(f'FastJSONRenderer encodes with {"orjson" if orjson is not None else "json (orjson is not installed)"}')
+
+
+if __name__ == '__main__':
+    main()
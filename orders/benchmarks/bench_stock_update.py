@@ -0,0 +1,64 @@
+"""
+Stock and price update throughput: UPDATE ... FROM (VALUES ...) batches against one save() per product.
+
+    python -m benchmarks.bench_stock_update --products 100000
+"""
+import argparse
+import random
+from decimal import Decimal
+
+from benchmarks.bench_import import clear_catalog
+from benchmarks.common import benchmark_database, timer, print_table
+from benchmarks.feeds import generate_feed
+
+from django.db import transaction
+
+from backend.importer import CatalogImporter
+from backend.importer.stock import update_stock
+from backend.models import ProductInfo, Shop
+
+
+def row_by_row_update(shop_id, rows):
+    with transaction.atomic():
+        for external_id, quantity, price in rows:
+            ProductInfo.objects.filter(shop_id=shop_id, external_id=external_id).update(quantity=quantity, price=price)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=100000)
+    parser.add_argument('--row-by-row', type=int, default=10000,
+                        help='Rows updated one by one for comparison (it is slow)')
+    parser.add_argument('--batch-size', type=int, nargs='+', default=[1000, 2000, 5000])
+    args = parser.parse_args()
+
+    rnd = random.Random(0)
+    rows = [(external_id, rnd.randrange(0, 100), Decimal(rnd.randrange(1000, 200000, 10)))
+            for external_id in range(1, args.products + 1)]
+    rnd.shuffle(rows)
+
+    results = {}
+    counts = {}
+    with benchmark_database():
+        clear_catalog()
+        CatalogImporter().run(generate_feed(args.products))
+        shop_id = Shop.objects.get().id
+
+        with timer(results, 'row by row'):
+            row_by_row_update(shop_id, rows[:args.row_by_row])
+        counts['row by row'] = args.row_by_row
+
+        for batch_size in args.batch_size:
+            name = f'batch {batch_size}'
+            with timer(results, name):
+                counts[name], _ = update_stock(shop_id, rows, batch_size=batch_size)
+
+    print_table(
+        ['update', 'products', 'seconds', 'products/min'],
+        [[name, counts[name], f'{seconds:.2f}', f'{counts[name] / seconds * 60:.0f}']
+         for name, seconds in results.items()],
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+YAML price list parsing: time and peak Python memory of yaml.load against the streaming reader.
+
+    python -m benchmarks.bench_yaml_reader --goods 10000 50000
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks import common  # noqa: F401 (configures Django)
+from benchmarks.common import print_table
+from benchmarks.feeds import generate_feed, write_yaml
+
+from yaml import load, Loader
+
+from backend.importer import stream_yaml_feed
+from backend.importer.engine import chunked
+
+
+def full_load(path):
+    with open(path, encoding='utf-8') as file:
+        data = load(file, Loader=Loader)
+    return sum(len(chunk) for chunk in chunked(data['goods'], 2000))
+
+
+def streamed_load(path):
+    with open(path, 'rb') as file:
+        data = stream_yaml_feed(file)
+        return sum(len(chunk) for chunk in chunked(data['goods'], 2000))
+
+
+def measure(function, path):
+    tracemalloc.start()
+    started = time.perf_counter()
+    goods = function(path)
+    seconds = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return goods, seconds, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--goods', type=int, nargs='+', default=[10000, 50000])
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for goods in args.goods:
+            path = os.path.join(tmp, f'{goods}.yaml')
+            write_yaml(generate_feed(goods), path)
+            size = os.path.getsize(path) / 2 ** 20
+            for name, function in [('yaml.load', full_load), ('stream', streamed_load)]:
+                parsed, seconds, peak = measure(function, path)
+                rows.append([name, parsed, f'{size:.1f}', f'{seconds:.2f}', f'{parsed / seconds:.0f}',
+                             f'{peak / 2 ** 20:.1f}'])
+
+    print_table(['reader', 'goods', 'file MiB', 'seconds', 'goods/s', 'peak MiB'], rows)
+
+
+if __name__ == '__main__':
+    main()
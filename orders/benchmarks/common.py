@@ -0,0 +1,41 @@
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'orders.settings')
+django.setup()
+
+from django.db import connection
+
+
+@contextmanager
+def benchmark_database():
+    """
+    Creating a throwaway database with all migrations applied, the same way the test runner does
+    """
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+@contextmanager
+def timer(results, key):
+    """
+    Storing elapsed wall-clock seconds of the block in results[key]
+    """
+    started = time.perf_counter()
+    yield
+    results[key] = time.perf_counter() - started
+
+
+def print_table(headers, rows):
+    widths = [max(len(str(value)) for value in column) for column in zip(headers, *rows)]
+    for row in [headers, *rows]:
+        print('  '.join(str(value).ljust(width) for value, width in zip(row, widths)))
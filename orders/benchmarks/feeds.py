@@ -0,0 +1,46 @@
+import random
+
+from yaml import dump
+
+COLORS = ['черный', 'белый', 'красный', 'синий', 'золотистый', 'серебристый', 'зеленый']
+PARAMETERS = {
+    'Диагональ (дюйм)': lambda rnd: rnd.choice([5.5, 6.1, 6.5, 6.7, 32, 55, 65]),
+    'Разрешение (пикс)': lambda rnd: rnd.choice(['1792x828', '2688x1242', '2400x1080', '3840x2160']),
+    'Встроенная память (Гб)': lambda rnd: rnd.choice([32, 64, 128, 256, 512]),
+    'Цвет': lambda rnd: rnd.choice(COLORS),
+}
+
+
+def generate_feed(goods=10000, categories=20, models=500, shop='Benchmark shop', seed=0, first_id=1):
+    """
+    Generating a price list with the same structure as shop1.yaml
+    """
+    rnd = random.Random(seed)
+    category_ids = list(range(1, categories + 1))
+    model_categories = {f'vendor/model-{number}': rnd.choice(category_ids) for number in range(models)}
+    model_names = list(model_categories)
+
+    data = {
+        'shop': shop,
+        'categories': [{'id': category_id, 'name': f'{shop} category {category_id}'} for category_id in category_ids],
+        'goods': [],
+    }
+    for number in range(goods):
+        model = rnd.choice(model_names)
+        price = rnd.randrange(1000, 200000, 10)
+        data['goods'].append({
+            'id': first_id + number,
+            'category': model_categories[model],
+            'model': model,
+            'name': f'Товар {model} #{number}',
+            'price': price,
+            'price_rrc': price + rnd.randrange(0, 10000, 10),
+            'quantity': rnd.randrange(0, 100),
+            'parameters': {name: make_value(rnd) for name, make_value in PARAMETERS.items()},
+        })
+    return data
+
+
+def write_yaml(data, path):
+    with open(path, 'w', encoding='utf-8') as file:
+        dump(data, file, allow_unicode=True, sort_keys=False)
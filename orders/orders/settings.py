@@ -13,6 +13,8 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 from pathlib import Path
 import os
 
+from django.core.exceptions import ImproperlyConfigured
+
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -41,6 +43,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'backend',
@@ -60,6 +63,12 @@ REST_FRAMEWORK = {
         'rest_framework.parsers.JSONParser',
         'rest_framework.parsers.FormParser',
         'rest_framework.parsers.MultiPartParser',
+        'backend.parsers.MessagePackParser',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+        'backend.renderers.MessagePackRenderer',
     ],
     'DEFAULT_THROTTLE_CLASSES': [
         'rest_framework.throttling.AnonRateThrottle',
@@ -170,3 +179,41 @@ CELERY_RESULT_BACKEND = 'redis://localhost:6379'
 CELERY_ACCEPT_CONTENT = ['application/json']
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TASK_SERIALIZER = 'json'
+
+CELERY_TASK_ALWAYS_EAGER = os.environ.get('CELERY_TASK_ALWAYS_EAGER') == 'True'
+
+# Seconds between rebuilds of the static catalog snapshots by celery beat, imports rebuild them at once
+CATALOG_SNAPSHOT_INTERVAL = int(os.environ.get('CATALOG_SNAPSHOT_INTERVAL', 600))
+CELERY_BEAT_SCHEDULE = {
+    'build-catalog-snapshots': {
+        'task': 'backend.tasks.build_catalog_snapshots',
+        'schedule': CATALOG_SNAPSHOT_INTERVAL,
+    },
+}
+
+# Import jobs report live progress and the catalog caches responses through the cache,
+# so workers and web processes must share it: Redis in production, process memory in tests and development
+if os.environ.get('CACHE_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('CACHE_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'orders',
+        }
+    }
+
+# Seconds a cached product list page or product is kept, saves invalidate it earlier
+CATALOG_CACHE_TIMEOUT = int(os.environ.get('CATALOG_CACHE_TIMEOUT', 300))
+
+# Answering product list filters by shop, category, model and parameters from an in-process bitmap index
+CATALOG_BITMAP_INDEX = os.environ.get('CATALOG_BITMAP_INDEX') == 'True'
+# Indexes of web processes follow catalog versions and change logs written by workers, so they need the shared cache
+if CATALOG_BITMAP_INDEX and not os.environ.get('CACHE_URL'):
+    raise ImproperlyConfigured('CATALOG_BITMAP_INDEX requires CACHE_URL, '
+                               'catalog versions kept in process memory are not seen by other processes')
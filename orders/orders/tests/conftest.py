@@ -1,9 +1,20 @@
 import pytest
+from django.core.cache import cache
 from django.core.management import call_command
 from rest_framework.exceptions import ValidationError
 
 from backend.management.commands.parse_data import Command
 from backend.models import User
+from orders.celery import celery_app
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """
+    Fixture that clears the cache before every test, so throttling counters do not leak between tests
+    """
+
+    cache.clear()
 
 
 @pytest.fixture
@@ -31,8 +42,9 @@ def validate_response_list():
     If validation fails, the test will fail with a message.
     """
 
-    def wrapper(serializer_class, response):
-        serializer = serializer_class(data=response.json(), many=True)
+    def wrapper(serializer_class, response, key=None):
+        data = response.json()
+        serializer = serializer_class(data=data[key] if key else data, many=True)
         try:
             serializer.is_valid(raise_exception=True)
             return True
@@ -87,3 +99,16 @@ def test_admin_user():
         )
         return test_admin_user
     return wrapper
+
+
+@pytest.fixture
+def celery_eager():
+    """
+    Fixture that runs Celery tasks synchronously in the test process.
+    The app reads settings with the CELERY namespace, so the namespaced key is the one which takes effect.
+    """
+
+    always_eager = celery_app.conf.CELERY_TASK_ALWAYS_EAGER
+    celery_app.conf.CELERY_TASK_ALWAYS_EAGER = True
+    yield
+    celery_app.conf.CELERY_TASK_ALWAYS_EAGER = always_eager
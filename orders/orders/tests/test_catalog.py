@@ -0,0 +1,132 @@
+import pytest
+
+from backend.catalog import refresh_catalog
+from backend.importer import CatalogImporter, CatalogSync
+from backend.models import Shop, Category, Model, ProductInfo, Parameter, ProductParameter, CatalogEntry, \
+    parse_numeric_value
+from orders.tests.test_import import make_feed
+
+
+class TestCatalogEntries:
+
+    @pytest.mark.django_db
+    def test_import_writes_catalog_entries(self):
+        """
+        The following test verifies that the bulk importer writes one catalog entry per product
+        with the names of its shop, model and category and its parameters
+        """
+
+        CatalogImporter(batch_size=7).run(make_feed(goods=20))
+
+        assert CatalogEntry.objects.count() == ProductInfo.objects.count() == 20
+        entry = CatalogEntry.objects.get(product__external_id=3)
+        assert entry.shop_name == 'Test shop'
+        assert (entry.model_name, entry.category_name) == ('vendor/model-3', 'Телевизоры')
+        assert (entry.quantity, entry.price) == (3, 1003)
+        assert entry.parameters == {'Цвет': 'черный', 'Встроенная память (Гб)': '256'}
+
+    @pytest.mark.django_db
+    def test_sync_updates_and_deletes_catalog_entries(self):
+        """
+        The following test verifies that a sync rebuilds entries of changed goods and removes entries of deleted ones
+        """
+
+        CatalogSync().run(make_feed(goods=10))
+        feed = make_feed(goods=8)
+        feed['goods'][0]['price'] = 5000
+        feed['goods'][0]['parameters'] = {'Цвет': 'белый'}
+        CatalogSync().run(feed)
+
+        assert CatalogEntry.objects.count() == 8
+        entry = CatalogEntry.objects.get(product__external_id=1)
+        assert (entry.price, entry.parameters) == (5000, {'Цвет': 'белый'})
+
+    @pytest.mark.django_db
+    def test_saved_objects_refresh_catalog_entries(self, django_capture_on_commit_callbacks):
+        """
+        The following test verifies that saving products, parameters, models, categories and shops
+        refreshes the catalog entries once the transaction commits
+        """
+
+        CatalogImporter().run(make_feed(goods=5))
+        product = ProductInfo.objects.get(external_id=1)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            product.price = 1
+            product.save()
+            ProductParameter.objects.create(product_info=product, parameter=Parameter.objects.create(name='Вес'),
+                                            value='150')
+            ProductParameter.objects.filter(product_info=product, parameter__name='Цвет').get().delete()
+            shop = Shop.objects.get(name='Test shop')
+            shop.name = 'Renamed shop'
+            shop.save()
+            model = Model.objects.get(name='vendor/model-1')
+            model.name = 'vendor/renamed'
+            model.save()
+            category = Category.objects.get(name='Телевизоры')
+            category.name = 'ТВ'
+            category.save()
+
+        entry = CatalogEntry.objects.get(product=product)
+        assert entry.price == 1
+        assert entry.parameters == {'Встроенная память (Гб)': '256', 'Вес': '150'}
+        assert (entry.shop_name, entry.model_name, entry.category_name) == ('Renamed shop', 'vendor/renamed', 'ТВ')
+        assert CatalogEntry.objects.filter(shop_name='Renamed shop').count() == 5
+
+    @pytest.mark.django_db
+    def test_deleted_product_removes_catalog_entry(self, django_capture_on_commit_callbacks):
+        """
+        The following test verifies that deleting a product deletes its catalog entry
+        and the parameter signals of the cascade do not write it back
+        """
+
+        CatalogImporter().run(make_feed(goods=5))
+
+        with django_capture_on_commit_callbacks(execute=True):
+            ProductInfo.objects.get(external_id=1).delete()
+
+        assert not CatalogEntry.objects.filter(product__external_id=1).exists()
+        assert CatalogEntry.objects.count() == 4
+
+    @pytest.mark.django_db
+    def test_refresh_catalog_rebuilds_entries(self):
+        """
+        The following test verifies that refresh_catalog rebuilds entries written by a bulk update without signals
+        """
+
+        CatalogImporter().run(make_feed(goods=5))
+        ProductInfo.objects.filter(external_id__lte=2).update(quantity=0)
+        CatalogEntry.objects.filter(product__external_id=5).delete()
+
+        assert refresh_catalog() == 5
+        assert CatalogEntry.objects.filter(quantity=0).count() == 2
+        assert CatalogEntry.objects.count() == 5
+
+
+class TestNumericParameterValues:
+
+    def test_parse_numeric_value(self):
+        """
+        The following test verifies that only plain numbers are parsed as numeric parameter values
+        """
+
+        assert parse_numeric_value('6.5') == parse_numeric_value(' 6,5 ') == parse_numeric_value(6.5)
+        assert parse_numeric_value(512) == 512
+        for value in ('1792x828', 'черный', '1e5', '', 'nan', '6.'):
+            assert parse_numeric_value(value) is None
+
+    @pytest.mark.django_db
+    def test_import_and_save_fill_numeric_values(self):
+        """
+        The following test verifies that imported and saved parameters keep the number of their value
+        """
+
+        CatalogImporter().run(make_feed(goods=2))
+        memory = ProductParameter.objects.get(product_info__external_id=1, parameter__name='Встроенная память (Гб)')
+        color = ProductParameter.objects.get(product_info__external_id=1, parameter__name='Цвет')
+        assert (memory.numeric_value, color.numeric_value) == (256, None)
+
+        memory.value = '128'
+        memory.save(update_fields=['value'])
+        memory.refresh_from_db()
+        assert memory.numeric_value == 128
@@ -0,0 +1,84 @@
+import csv
+import gzip
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from backend.importer import CatalogImporter
+from backend.models import Shop
+from orders.tests.test_import import make_feed, product_ids
+
+
+class TestCatalogExport:
+
+    @pytest.mark.django_db
+    def test_export_streams_ndjson(self, test_user):
+        """
+        The following test verifies that the catalog is streamed as one JSON object per product line
+        """
+
+        CatalogImporter().run(make_feed(goods=5))
+        client = APIClient()
+        client.force_authenticate(user=test_user())
+
+        response = client.get('/api/v1/catalog-export/')
+
+        assert response.status_code == 200
+        assert response.streaming
+        assert response['Content-Type'].startswith('application/x-ndjson')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode('utf-8').splitlines()]
+        assert [row['product_id'] for row in rows] == product_ids(1, 2, 3, 4, 5)
+        assert rows[0]['price'] == '1001.00'
+        assert rows[0]['parameters'] == {'Цвет': 'черный', 'Встроенная память (Гб)': '256'}
+
+    @pytest.mark.django_db
+    def test_export_streams_filtered_gzipped_csv(self, test_user):
+        """
+        The following test verifies that a CSV export follows the product list filters
+        and is gzipped when the client accepts it
+        """
+
+        CatalogImporter().run(make_feed(goods=5))
+        client = APIClient()
+        client.force_authenticate(user=test_user())
+        shop = Shop.objects.get(name='Test shop')
+
+        response = client.get('/api/v1/catalog-export/', data={'file_format': 'csv', 'shop_id': shop.id,
+                                                                'category': 'смартф'},
+                              HTTP_ACCEPT_ENCODING='gzip, deflate')
+
+        assert response.status_code == 200
+        assert response['Content-Encoding'] == 'gzip'
+        content = gzip.decompress(b''.join(response.streaming_content)).decode('utf-8')
+        rows = list(csv.DictReader(io.StringIO(content)))
+        assert [int(row['product_id']) for row in rows] == product_ids(2, 4)
+        assert json.loads(rows[0]['parameters'])['Цвет'] == 'черный'
+
+    @pytest.mark.django_db
+    def test_export_requires_authentication_and_known_format(self, test_user):
+        """
+        The following test verifies that anonymous visitors and unknown formats are rejected
+        """
+
+        client = APIClient()
+        assert client.get('/api/v1/catalog-export/').status_code == 401
+
+        client.force_authenticate(user=test_user())
+        assert client.get('/api/v1/catalog-export/', data={'file_format': 'xml'}).status_code == 400
+
+    @pytest.mark.django_db
+    def test_export_command_writes_gzipped_file(self, tmp_path):
+        """
+        The following test verifies that the export command writes the catalog of a shop to a gzipped file
+        """
+
+        CatalogImporter().run(make_feed(goods=3))
+        output = tmp_path / 'catalog.ndjson.gz'
+
+        call_command('export_catalog', '--shop', 'Test shop', '--gzip', '--output', str(output), '--chunk-size', '2')
+
+        with gzip.open(output, 'rt', encoding='utf-8') as file:
+            assert [json.loads(line)['product_id'] for line in file] == product_ids(1, 2, 3)
@@ -0,0 +1,386 @@
+import os
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from yaml import dump
+
+from backend.importer import CatalogImporter, CatalogSync, FeedError, find_feeds, import_feed, open_feed, \
+    stream_yaml_feed, write_feed
+from backend.models import Shop, Category, Model, ProductInfo, Parameter, ProductParameter, ImportJob, CatalogEntry, \
+    Order, OrderItem
+
+
+def make_feed(goods=50):
+    return {
+        'shop': 'Test shop',
+        'categories': [{'id': 1, 'name': 'Смартфоны'}, {'id': 2, 'name': 'Телевизоры'}],
+        'goods': [
+            {
+                'id': number,
+                'category': 1 + number % 2,
+                'model': f'vendor/model-{number % 5}',
+                'name': f'Product {number}',
+                'price': 1000 + number,
+                'price_rrc': 1100 + number,
+                'quantity': number,
+                'parameters': {'Цвет': 'черный', 'Встроенная память (Гб)': 256},
+            }
+            for number in range(1, goods + 1)
+        ],
+    }
+
+
+def product_ids(*external_ids, shop='Test shop'):
+    """
+    Database ids of the shop's products with the supplier ids, in the given order
+    """
+    ids = dict(ProductInfo.objects.filter(shop__name=shop, external_id__in=external_ids)
+               .values_list('external_id', 'id'))
+    return [ids[external_id] for external_id in external_ids]
+
+
+class TestCatalogImport:
+
+    @pytest.mark.django_db
+    def test_import_creates_catalog(self):
+        """
+        The following test verifies that the bulk importer writes every table of the catalog
+        """
+
+        progress = CatalogImporter(batch_size=20).run(make_feed())
+
+        shop = Shop.objects.get(name='Test shop')
+        assert set(shop.product_categories.values_list('name', flat=True)) == {'Смартфоны', 'Телевизоры'}
+        assert Model.objects.count() == 5
+        assert Parameter.objects.count() == 2
+        assert ProductInfo.objects.filter(shop=shop).count() == 50
+        assert ProductParameter.objects.count() == 100
+        assert ProductParameter.objects.filter(parameter__name='Встроенная память (Гб)').first().value == '256'
+        assert progress.phases['products']['rows'] == 50
+        assert progress.phases['product parameters']['rows'] == 100
+
+    @pytest.mark.django_db
+    def test_import_query_count_does_not_grow_with_feed(self, django_assert_max_num_queries):
+        """
+        The following test verifies that the number of queries depends on the number of batches, not rows
+        """
+
+        with django_assert_max_num_queries(30):
+            CatalogImporter(batch_size=1000).run(make_feed(goods=500))
+
+        assert ProductInfo.objects.count() == 500
+
+    @pytest.mark.django_db
+    def test_import_reuses_existing_names(self):
+        """
+        The following test verifies that categories, models and parameters already in the database are reused
+        """
+
+        category = Category.objects.create(name='Смартфоны')
+        Model.objects.create(name='vendor/model-1', category=category)
+        Parameter.objects.create(name='Цвет')
+
+        CatalogImporter().run(make_feed(goods=10))
+
+        assert Category.objects.count() == 2
+        assert Model.objects.count() == 5
+        assert Parameter.objects.count() == 2
+        assert ProductInfo.objects.filter(model__name='vendor/model-1').count() == 2
+
+    @pytest.mark.django_db
+    def test_shops_with_the_same_supplier_ids(self):
+        """
+        The following test verifies that supplier ids are unique per shop only:
+        shops with the same ids and products created by a sync are imported without collisions
+        """
+
+        CatalogImporter().run(make_feed(goods=10))
+        CatalogSync().run(make_feed(goods=12))
+        for shop in ('Other shop', 'Third shop'):
+            feed = make_feed(goods=10)
+            feed['shop'] = shop
+            CatalogImporter().run(feed)
+
+        assert ProductInfo.objects.count() == 32
+        for shop, goods in (('Test shop', 12), ('Other shop', 10), ('Third shop', 10)):
+            assert sorted(ProductInfo.objects.filter(shop__name=shop).values_list('external_id', flat=True)) == \
+                list(range(1, goods + 1))
+
+    @pytest.mark.django_db
+    def test_streamed_import_matches_full_load(self, tmp_path):
+        """
+        The following test verifies that a price list read with the streaming reader is imported completely
+        """
+
+        path = tmp_path / 'shop.yaml'
+        path.write_text(dump(make_feed(goods=30), allow_unicode=True, sort_keys=False), encoding='utf-8')
+
+        with open(path, 'rb') as file:
+            progress = CatalogImporter(batch_size=7).run(stream_yaml_feed(file))
+
+        assert ProductInfo.objects.filter(shop__name='Test shop').count() == 30
+        assert ProductParameter.objects.count() == 60
+        assert progress.phases['products']['rows'] == 30
+
+    def test_streamed_feed_requires_goods_last(self, tmp_path):
+        """
+        The following test verifies that the streaming reader rejects price lists with `shop` after `goods`
+        """
+
+        feed = make_feed(goods=2)
+        path = tmp_path / 'shop.yaml'
+        path.write_text(dump({'goods': feed['goods'], 'shop': feed['shop']}, allow_unicode=True, sort_keys=False),
+                        encoding='utf-8')
+
+        with open(path, 'rb') as file, pytest.raises(FeedError):
+            list(stream_yaml_feed(file)['goods'])
+
+
+class TestCatalogSync:
+
+    @pytest.mark.django_db
+    def test_sync_writes_only_changed_goods(self):
+        """
+        The following test verifies that a sync inserts, updates and deletes goods and skips unchanged ones
+        """
+
+        CatalogImporter().run(make_feed(goods=20))
+        feed = make_feed(goods=20)
+        feed['goods'] = feed['goods'][:-2] + make_feed(goods=22)['goods'][-1:]
+        feed['goods'][0]['price'] = 5
+        feed['goods'][1]['parameters'] = {'Цвет': 'белый'}
+
+        progress = CatalogSync(batch_size=7).run(feed)
+
+        assert progress.counters == {'unchanged': 16, 'inserted': 1, 'updated': 2, 'deleted': 2}
+        assert ProductInfo.objects.count() == 19
+        assert ProductInfo.objects.get(external_id=1).price == 5
+        assert dict(ProductParameter.objects.filter(product_info__external_id=2)
+                    .values_list('parameter__name', 'value')) == {'Цвет': 'белый'}
+        assert ProductInfo.objects.filter(external_id__in=[19, 20]).count() == 0
+        assert ProductParameter.objects.count() == 19 * 2 - 1
+
+    @pytest.mark.django_db
+    def test_sync_retires_ordered_goods_missing_from_feed(self, test_user):
+        """
+        The following test verifies that a sync keeps order items of goods missing from the feed:
+        ordered products leave the catalog with zero quantity and are written again when the good comes back
+        """
+
+        CatalogImporter().run(make_feed(goods=5))
+        product = ProductInfo.objects.get(external_id=5)
+        order = Order.objects.create(user=test_user())
+        item = OrderItem.objects.create(order=order, product=product, shop=product.shop, quantity=1)
+
+        progress = CatalogSync().run(make_feed(goods=3))
+
+        assert progress.counters == {'unchanged': 3, 'deleted': 1, 'retired': 1}
+        assert list(ProductInfo.objects.order_by('external_id').values_list('external_id', flat=True)) == [1, 2, 3, 5]
+        assert ProductInfo.objects.get(id=product.id).quantity == 0
+        assert not CatalogEntry.objects.filter(product_id=product.id).exists()
+        assert not ProductParameter.objects.filter(product_info__external_id=4).exists()
+        assert OrderItem.objects.get(id=item.id).product_id == product.id
+
+        progress = CatalogSync().run(make_feed(goods=5))
+
+        assert progress.counters == {'unchanged': 3, 'inserted': 1, 'updated': 1, 'deleted': 0}
+        assert ProductInfo.objects.get(id=product.id).quantity == 5
+        assert CatalogEntry.objects.filter(product_id=product.id).exists()
+
+    @pytest.mark.django_db
+    def test_sync_of_unchanged_feed_writes_nothing(self, django_assert_max_num_queries):
+        """
+        The following test verifies that repeating a sync of the same feed does not write products
+        """
+
+        CatalogSync().run(make_feed(goods=50))
+
+        with django_assert_max_num_queries(10):
+            progress = CatalogSync().run(make_feed(goods=50))
+
+        assert progress.counters == {'unchanged': 50, 'deleted': 0}
+        assert progress.phases['products']['rows'] == 0
+
+
+class TestMultiShopImport:
+
+    @pytest.mark.django_db
+    def test_import_directory_of_feeds(self, tmp_path):
+        """
+        The following test verifies that every price list of a directory is imported as a separate shop
+        """
+
+        for number in range(3):
+            feed = make_feed(goods=10)
+            feed['shop'] = f'Shop {number}'
+            (tmp_path / f'shop{number}.yaml').write_text(dump(feed, allow_unicode=True), encoding='utf-8')
+        (tmp_path / 'readme.txt').write_text('not a price list')
+
+        call_command('parse_data', feeds=str(tmp_path), workers=1, stdout=open(os.devnull, 'w'))
+
+        assert len(find_feeds(str(tmp_path))) == 3
+        assert Shop.objects.count() == 3
+        assert ProductInfo.objects.count() == 30
+        assert Category.objects.count() == 2
+
+    @pytest.mark.django_db
+    def test_invalid_feed_does_not_stop_other_shops(self, tmp_path):
+        """
+        The following test verifies that an invalid price list is reported without importing it
+        """
+
+        (tmp_path / 'good.yaml').write_text(dump(make_feed(goods=5), allow_unicode=True), encoding='utf-8')
+        broken = make_feed(goods=5)
+        broken['shop'] = 'Broken shop'
+        broken['goods'][0]['category'] = 99
+        (tmp_path / 'broken.yaml').write_text(dump(broken, allow_unicode=True), encoding='utf-8')
+
+        with pytest.raises(CommandError):
+            call_command('parse_data', feeds=str(tmp_path / '*.yaml'), workers=1,
+                         stdout=open(os.devnull, 'w'), stderr=open(os.devnull, 'w'))
+
+        assert list(Shop.objects.values_list('name', flat=True)) == ['Test shop']
+        assert ProductInfo.objects.count() == 5
+
+    @pytest.mark.django_db
+    def test_streamed_feed_with_unknown_category_is_reported(self, tmp_path):
+        """
+        The following test verifies that goods of a streamed YAML price list are validated like a fully loaded one
+        """
+
+        broken = make_feed(goods=5)
+        broken['goods'][1]['category'] = 99
+        (tmp_path / 'broken.yaml').write_text(dump(broken, allow_unicode=True, sort_keys=False), encoding='utf-8')
+
+        result = import_feed(str(tmp_path / 'broken.yaml'), stream=True)
+
+        assert result.error == 'Good 2 refers to unknown category 99'
+        assert ProductInfo.objects.count() == 0
+
+
+class TestFeedFormats:
+
+    @pytest.mark.parametrize('extension', ['csv', 'jsonl'])
+    def test_formats_read_same_goods_as_yaml(self, tmp_path, extension):
+        """
+        The following test verifies that CSV and JSON Lines price lists are read as the same records as YAML
+        """
+
+        feed = make_feed(goods=10)
+        feed['goods'][0]['parameters'] = {}
+        write_feed(feed, str(tmp_path / f'shop.{extension}'))
+
+        with open_feed(str(tmp_path / f'shop.{extension}')) as data:
+            goods = list(data['goods'])
+
+        assert data['shop'] == feed['shop']
+        assert sorted(data['categories'], key=lambda category: category['id']) == feed['categories']
+        assert [good['id'] for good in goods] == [good['id'] for good in feed['goods']]
+        assert goods[0]['parameters'] == {}
+        assert {name: str(value) for name, value in goods[1]['parameters'].items()} == {
+            'Цвет': 'черный', 'Встроенная память (Гб)': '256'}
+
+    @pytest.mark.django_db
+    def test_sync_from_csv_after_yaml_import_changes_nothing(self, tmp_path):
+        """
+        The following test verifies that a good has the same fingerprint in every feed format
+        """
+
+        CatalogImporter().run(make_feed(goods=20))
+        write_feed(make_feed(goods=20), str(tmp_path / 'shop.csv'))
+
+        with open_feed(str(tmp_path / 'shop.csv')) as data:
+            progress = CatalogSync().run(data)
+
+        assert progress.counters == {'unchanged': 20, 'deleted': 0}
+
+    @pytest.mark.django_db
+    def test_sync_of_csv_with_trailing_zeros_changes_nothing(self, tmp_path):
+        """
+        The following test verifies that a YAML price 1000.5 and a CSV price 1000.50 give the same fingerprint
+        """
+
+        feed = make_feed(goods=3)
+        feed['goods'][0]['price'] = 1000.5
+        path = str(tmp_path / 'shop.yaml')
+        write_feed(feed, path)
+        with open_feed(path) as data:
+            CatalogImporter().run(data)
+
+        feed['goods'][0]['price'] = '1000.50'
+        write_feed(feed, str(tmp_path / 'shop.csv'))
+        with open_feed(str(tmp_path / 'shop.csv')) as data:
+            progress = CatalogSync().run(data)
+
+        assert progress.counters == {'unchanged': 3, 'deleted': 0}
+
+    def test_jsonl_good_with_unknown_category_is_rejected(self, tmp_path):
+        """
+        The following test verifies that goods of a JSON Lines price list are validated while they are read
+        """
+
+        feed = make_feed(goods=2)
+        feed['goods'][1]['category'] = 99
+        write_feed(feed, str(tmp_path / 'shop.jsonl'))
+
+        with open_feed(str(tmp_path / 'shop.jsonl')) as data, pytest.raises(FeedError):
+            list(data['goods'])
+
+
+class TestCheckpointedImport:
+
+    @pytest.mark.django_db
+    @pytest.mark.parametrize('extension', ['yaml', 'csv', 'jsonl'])
+    def test_resume_after_failed_batch(self, tmp_path, monkeypatch, extension):
+        """
+        The following test verifies that a resumed import continues after the last committed batch
+        without duplicate rows
+        """
+
+        path = str(tmp_path / f'shop.{extension}')
+        write_feed(make_feed(goods=30), path)
+        import_goods = CatalogImporter.import_goods
+        calls = []
+
+        def failing_import_goods(importer, shop, category_ids, goods):
+            calls.append(len(goods))
+            if len(calls) == 3:
+                raise OSError('Worker was stopped')
+            import_goods(importer, shop, category_ids, goods)
+
+        monkeypatch.setattr(CatalogImporter, 'import_goods', failing_import_goods)
+        with pytest.raises(CommandError):
+            call_command('parse_data', file=path, batch_size=10, checkpoint=True,
+                         stdout=open(os.devnull, 'w'), stderr=open(os.devnull, 'w'))
+
+        job = ImportJob.objects.get()
+        assert job.status == ImportJob.JobStatus.FAILED
+        assert job.goods_done == 20
+        assert ProductInfo.objects.count() == 20
+
+        monkeypatch.setattr(CatalogImporter, 'import_goods', import_goods)
+        call_command('parse_data', file=path, batch_size=10, resume=True, stdout=open(os.devnull, 'w'))
+
+        job.refresh_from_db()
+        assert job.status == ImportJob.JobStatus.DONE
+        assert job.goods_done == 30
+        assert sorted(ProductInfo.objects.values_list('external_id', flat=True)) == list(range(1, 31))
+        assert ProductParameter.objects.count() == 60
+
+    @pytest.mark.django_db
+    def test_resume_refuses_changed_feed(self, tmp_path):
+        """
+        The following test verifies that an import is not resumed when the price list has changed
+        """
+
+        path = str(tmp_path / 'shop.jsonl')
+        write_feed(make_feed(goods=5), path)
+        ImportJob.objects.create(path=path, content_hash='0' * 40, goods_done=2,
+                                 status=ImportJob.JobStatus.FAILED)
+
+        with pytest.raises(CommandError):
+            call_command('parse_data', file=path, resume=True,
+                         stdout=open(os.devnull, 'w'), stderr=open(os.devnull, 'w'))
+
+        assert ProductInfo.objects.count() == 0
@@ -0,0 +1,71 @@
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.test import APIClient
+from yaml import dump
+
+from backend.models import ImportJob, ProductInfo
+from orders.tests.test_import import make_feed
+
+
+def upload(feed):
+    return SimpleUploadedFile('shop.yaml', dump(feed, allow_unicode=True).encode('utf-8'))
+
+
+class TestImportJobs:
+
+    @pytest.mark.django_db
+    def test_admin_uploads_feed(self, test_admin_user, celery_eager, settings, tmp_path):
+        """
+        The following test verifies that an uploaded price list is imported by the background task
+        and that the job reports its result
+        """
+
+        settings.MEDIA_ROOT = str(tmp_path)
+        client = APIClient()
+        client.force_authenticate(user=test_admin_user())
+
+        response = client.post('/api/v1/import-jobs/', data={'file': upload(make_feed(goods=20))}, format='multipart')
+
+        assert response.status_code == 202
+        job_id = response.json().get('id')
+
+        response = client.get(f'/api/v1/import-jobs/{job_id}/')
+
+        assert response.status_code == 200
+        assert response.json().get('status') == 'Done'
+        assert response.json().get('shop') == 'Test shop'
+        assert response.json().get('rows') > 20
+        assert ProductInfo.objects.count() == 20
+
+    @pytest.mark.django_db
+    def test_invalid_feed_fails_job(self, test_admin_user, celery_eager, settings, tmp_path):
+        """
+        The following test verifies that an invalid price list fails the job with an error message
+        """
+
+        settings.MEDIA_ROOT = str(tmp_path)
+        client = APIClient()
+        client.force_authenticate(user=test_admin_user())
+        feed = make_feed(goods=5)
+        feed['goods'][0]['category'] = 99
+
+        response = client.post('/api/v1/import-jobs/', data={'file': upload(feed)}, format='multipart')
+
+        job = ImportJob.objects.get(id=response.json().get('id'))
+        assert job.status == ImportJob.JobStatus.FAILED
+        assert 'unknown category' in job.error
+        assert ProductInfo.objects.count() == 0
+
+    @pytest.mark.django_db
+    def test_user_cannot_upload_feed(self, test_user):
+        """
+        The following test verifies that a user without administrator privileges cannot start an import
+        """
+
+        client = APIClient()
+        client.force_authenticate(user=test_user())
+
+        response = client.post('/api/v1/import-jobs/', data={'file': upload(make_feed(goods=1))}, format='multipart')
+
+        assert response.status_code == 403
+        assert ImportJob.objects.count() == 0
@@ -0,0 +1,74 @@
+import io
+from decimal import Decimal
+
+import msgpack
+import pytest
+from rest_framework.exceptions import ParseError
+from rest_framework.test import APIClient
+
+from backend.models import ProductInfo
+from backend.parsers import MessagePackParser, unpack_extension
+from backend.renderers import MessagePackRenderer
+
+
+def unpack(content):
+    return msgpack.unpackb(content, ext_hook=unpack_extension, raw=False)
+
+
+class TestMessagePack:
+
+    def test_decimals_survive_a_round_trip(self):
+        """
+        The following test verifies that decimals are packed and parsed back without losing digits
+        """
+
+        data = {'total': Decimal('12345678901234567890.01'), 'items': [{'price': Decimal('0.10')}], 'name': 'Цвет'}
+
+        parsed = MessagePackParser().parse(io.BytesIO(MessagePackRenderer().render(data)))
+
+        assert parsed == data
+        assert isinstance(parsed['total'], Decimal)
+
+    def test_invalid_body_is_a_parse_error(self):
+        """
+        The following test verifies that a malformed MessagePack body is rejected as a parse error
+        """
+
+        with pytest.raises(ParseError):
+            MessagePackParser().parse(io.BytesIO(b'\xc1'))
+
+    @pytest.mark.django_db
+    def test_product_list_is_negotiated_by_accept_header(self, load_test_data):
+        """
+        The following test verifies that the product list is rendered as MessagePack for clients accepting it
+        with the same content as JSON
+        """
+
+        client = APIClient()
+        json_page = client.get('/api/v1/product-list/').json()
+        response = client.get('/api/v1/product-list/', HTTP_ACCEPT='application/msgpack')
+
+        assert response.status_code == 200
+        assert response['Content-Type'] == 'application/msgpack'
+        assert unpack(response.content) == json_page
+        assert len(response.content) < len(client.get('/api/v1/product-list/').content)
+
+    @pytest.mark.django_db
+    def test_cart_accepts_and_returns_msgpack(self, test_user, load_test_data):
+        """
+        The following test verifies that a cart item is added with a MessagePack body
+        and its total sum is returned as an exact decimal
+        """
+
+        client = APIClient()
+        client.force_authenticate(user=test_user())
+        product = ProductInfo.objects.first()
+
+        response = client.post('/api/v1/cart-contains/', data=msgpack.packb({'product': product.id, 'quantity': 3}),
+                               content_type='application/msgpack', HTTP_ACCEPT='application/msgpack')
+
+        assert response.status_code == 201
+        item = unpack(response.content)
+        assert item['quantity'] == 3
+        assert item['total_sum'] == product.price * 3
+        assert isinstance(item['total_sum'], Decimal)
@@ -166,3 +166,92 @@ class TestProductAPIOrderManipulations:
         response = client.get('/api/v1/orders/history/')
         assert response.status_code == 200
         assert validate_response_list(OrderHistorySerializer, response)
+
+
+class TestConditionalRequests:
+
+    @pytest.mark.django_db
+    def test_unchanged_cart_is_not_modified(self, test_user, load_test_data, django_assert_max_num_queries):
+        """
+        The following test verifies that the cart is answered with 304 and at most one query
+        while it has not changed, and with the new cart after a product is added
+        """
+
+        client = APIClient()
+        client.force_authenticate(user=test_user())
+        first, second = ProductInfo.objects.all()[:2]
+        client.post('/api/v1/cart-contains/', data={'product': first.id, 'quantity': 1})
+
+        response = client.get('/api/v1/orders/user-cart/')
+        assert response.status_code == 200
+        etag = response['ETag']
+        assert response['Last-Modified']
+
+        with django_assert_max_num_queries(1):
+            response = client.get('/api/v1/orders/user-cart/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert response['ETag'] == etag
+
+        client.post('/api/v1/cart-contains/', data={'product': second.id, 'quantity': 1})
+        response = client.get('/api/v1/orders/user-cart/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+
+    @pytest.mark.django_db
+    def test_cart_changes_with_product_price(self, test_user, load_test_data):
+        """
+        The following test verifies that the cart ETag changes when the price of a product in the cart changes
+        """
+
+        client = APIClient()
+        client.force_authenticate(user=test_user())
+        product = ProductInfo.objects.first()
+        client.post('/api/v1/cart-contains/', data={'product': product.id, 'quantity': 1})
+        etag = client.get('/api/v1/orders/user-cart/')['ETag']
+
+        product.price += 1
+        product.save()
+
+        assert client.get('/api/v1/orders/user-cart/', HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+    @pytest.mark.django_db
+    def test_unchanged_history_is_not_modified(self, test_user, load_test_data, django_assert_max_num_queries):
+        """
+        The following test verifies that the order history is answered with 304 and at most one query
+        while no order has changed
+        """
+
+        client = APIClient()
+        client.force_authenticate(user=test_user())
+        client.post('/api/v1/cart-contains/', data={'product': ProductInfo.objects.first().id, 'quantity': 1})
+
+        etag = client.get('/api/v1/orders/history/')['ETag']
+
+        with django_assert_max_num_queries(1):
+            response = client.get('/api/v1/orders/history/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+
+        order = Order.objects.get()
+        order.status = Order.OrderStatus.CANCELLED
+        order.save()
+        assert client.get('/api/v1/orders/history/', HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+    @pytest.mark.django_db
+    def test_unchanged_product_list_is_not_modified(self, load_test_data, django_assert_max_num_queries):
+        """
+        The following test verifies that the product list and a certain product are answered with 304
+        and at most one query while the catalog has not changed
+        """
+
+        client = APIClient()
+        product_url = f'/api/v1/product-list/{ProductInfo.objects.get(external_id=1234568).id}/'
+        etag = client.get('/api/v1/product-list/')['ETag']
+        product_etag = client.get(product_url)['ETag']
+
+        with django_assert_max_num_queries(1):
+            response = client.get('/api/v1/product-list/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+
+        with django_assert_max_num_queries(1):
+            response = client.get(product_url, HTTP_IF_NONE_MATCH=product_etag)
+        assert response.status_code == 304
@@ -1,8 +1,27 @@
+import base64
+import json
+
 import pytest
 
+from django.core.cache import cache
+from django.db import connection
+from django.http import QueryDict
 from rest_framework.test import APIClient
 
-from backend.serializers import ProductListSerializer, CertainProductSerializer
+from backend.bitmap_index import can_answer, get_index, reset_index
+from backend.catalog import refresh_catalog
+from backend.catalog_cache import bump_shop_versions, shop_names
+from backend.importer import CatalogImporter
+from backend.importer.stock import update_stock
+from backend.models import Shop, Category, ProductInfo, ProductParameter, CatalogEntry
+from backend.renderers import FastJSONRenderer
+from backend.serializers import ProductListSerializer, CertainProductSerializer, product_list_data
+from orders.tests.test_import import make_feed, product_ids
+
+
+def encode_cursor(ordering, values):
+    content = json.dumps({'o': ordering, 'v': values})
+    return base64.urlsafe_b64encode(content.encode('utf-8')).decode('ascii')
 
 
 class TestProductListAndProductInfo:
@@ -17,7 +36,7 @@ class TestProductListAndProductInfo:
         response = client.get('/api/v1/product-list/')
 
         assert response.status_code == 200
-        assert validate_response_list(ProductListSerializer, response)
+        assert validate_response_list(ProductListSerializer, response, 'results')
 
     @pytest.mark.django_db
     def test_view_certain_product(self, load_test_data, validate_response_dict):
@@ -26,7 +45,8 @@ class TestProductListAndProductInfo:
         """
 
         client = APIClient()
-        response = client.get('/api/v1/product-list/1234568/')
+        product = ProductInfo.objects.get(external_id=1234568)
+        response = client.get(f'/api/v1/product-list/{product.id}/')
 
         assert response.status_code == 200
         assert validate_response_dict(CertainProductSerializer, response)
@@ -47,8 +67,8 @@ class TestProductListAndProductInfo:
         response = client.get('/api/v1/product-list/', data=param)
 
         assert response.status_code == 200
-        assert validate_response_list(ProductListSerializer, response)
-        assert response.json()[0].get('parameter') == {'Цвет': 'золотистый'}
+        assert validate_response_list(ProductListSerializer, response, 'results')
+        assert response.json()['results'][0].get('parameter').get('Цвет') == 'золотистый'
 
     @pytest.mark.django_db
     def test_view_product_list_through_search(self, load_test_data, validate_response_list):
@@ -64,6 +84,796 @@ class TestProductListAndProductInfo:
         response = client.get('/api/v1/product-list/', data=param)
 
         assert response.status_code == 200
-        assert validate_response_list(ProductListSerializer, response)
-        for item in response.json():
+        assert validate_response_list(ProductListSerializer, response, 'results')
+        for item in response.json()['results']:
             assert item.get('category') == 'Смартфоны'
+
+    @pytest.mark.django_db
+    def test_view_product_list_pages(self, load_test_data):
+        """
+        The following test verifies that the product list is split into pages joined by cursors
+        without repeating or losing products
+        """
+
+        client = APIClient()
+        seen = []
+        url = '/api/v1/product-list/?page_size=5&ordering=-price'
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200
+            assert len(response.json()['results']) <= 5
+            seen.extend(item.get('price') for item in response.json()['results'])
+            url = response.json()['next']
+
+        assert len(seen) == 14
+        assert seen == sorted(seen, key=float, reverse=True)
+
+    @pytest.mark.django_db
+    def test_view_product_list_with_invalid_cursor(self, load_test_data):
+        """
+        The following test verifies that a malformed cursor is answered with 404
+        """
+
+        client = APIClient()
+        response = client.get('/api/v1/product-list/', data={'cursor': 'broken'})
+
+        assert response.status_code == 404
+
+    @pytest.mark.parametrize('ordering, values', [
+        ('id', ['abc']),
+        ('id', [1.5]),
+        ('id', [True]),
+        ('id', [2 ** 64]),
+        ('price', ['abc', 1]),
+        ('price', ['NaN', 1]),
+        ('name', [5, 1]),
+        ('quantity', ['1', 1]),
+        ('id', 'a'),
+    ])
+    @pytest.mark.django_db
+    def test_view_product_list_with_tampered_cursor(self, load_test_data, ordering, values):
+        """
+        The following test verifies that a cursor whose values do not fit the types of the ordering fields
+        is answered with 404
+        """
+
+        client = APIClient()
+        response = client.get('/api/v1/product-list/', data={'ordering': ordering,
+                                                             'cursor': encode_cursor(ordering, values)})
+
+        assert response.status_code == 404
+
+    @pytest.mark.django_db
+    def test_product_list_and_product_take_one_query(self, load_test_data, django_assert_num_queries):
+        """
+        The following test verifies that parameters are aggregated by the database:
+        a page of products and a certain product are read with one query each
+        """
+
+        client = APIClient()
+        product = ProductInfo.objects.get(external_id=1234568)
+        # Shop names used in list cache keys are read once and cached
+        shop_names()
+
+        with django_assert_num_queries(1):
+            response = client.get('/api/v1/product-list/')
+        assert len(response.json()['results']) == 14
+        assert response.json()['results'][0].get('parameter')
+
+        with django_assert_num_queries(1):
+            response = client.get(f'/api/v1/product-list/{product.id}/')
+        assert response.json().get('parameters')
+
+
+class TestParameterFilters:
+
+    @pytest.mark.django_db
+    def test_several_parameters_are_combined(self, load_test_data):
+        """
+        The following test verifies that param[<name>] constraints are combined with AND at the product level
+        """
+
+        client = APIClient()
+        response = client.get('/api/v1/product-list/', data={'param[Цвет]': 'красный',
+                                                              'param[Встроенная память (Гб)]': '256'})
+
+        assert response.status_code == 200
+        names = [item.get('name') for item in response.json()['results']]
+        assert names == ['Смартфон Apple iPhone XR 256GB (красный)']
+
+    @pytest.mark.django_db
+    def test_repeated_parameter_accepts_any_value(self, load_test_data):
+        """
+        The following test verifies that values of a repeated parameter are alternatives
+        """
+
+        client = APIClient()
+        response = client.get('/api/v1/product-list/?param[Цвет]=красный&param[Цвет]=черный'
+                              '&param[Встроенная память (Гб)]=256')
+
+        assert response.status_code == 200
+        results = response.json()['results']
+        assert len(results) == len({item.get('id') for item in results}) == 2
+        for item in results:
+            assert item.get('parameter').get('Цвет') in ('красный', 'черный')
+
+    @pytest.mark.django_db
+    def test_parameter_value_filter_matches_values(self, load_test_data):
+        """
+        The following test verifies that parameter_value alone matches parameter values, not names
+        """
+
+        client = APIClient()
+        response = client.get('/api/v1/product-list/', data={'parameter_value': 'золотист'})
+
+        assert response.status_code == 200
+        assert response.json()['results']
+        for item in response.json()['results']:
+            assert 'золотистый' in item.get('parameter').values()
+
+    @pytest.mark.django_db
+    def test_parameter_pair_keeps_other_filters(self, load_test_data):
+        """
+        The following test verifies that the parameter name and value pair is combined with the other filters
+        """
+
+        client = APIClient()
+        response = client.get('/api/v1/product-list/', data={'parameter_name': 'Цвет',
+                                                              'parameter_value': 'золотистый', 'price_to': 1})
+
+        assert response.status_code == 200
+        assert response.json()['results'] == []
+
+
+class TestParameterRanges:
+
+    @pytest.mark.django_db
+    def test_numeric_parameter_range(self, load_test_data):
+        """
+        The following test verifies that param_min and param_max select products by the numeric parameter value
+        """
+
+        client = APIClient()
+        response = client.get('/api/v1/product-list/', data={'param_min[Диагональ (дюйм)]': '6',
+                                                              'param_max[Диагональ (дюйм)]': '6,2'})
+
+        assert response.status_code == 200
+        results = response.json()['results']
+        assert len(results) == 3
+        for item in results:
+            assert item.get('parameter').get('Диагональ (дюйм)') == '6.1'
+
+    @pytest.mark.django_db
+    def test_parameter_range_is_combined_with_values(self, load_test_data):
+        """
+        The following test verifies that a range is combined with AND with the parameter values
+        """
+
+        client = APIClient()
+        response = client.get('/api/v1/product-list/', data={'param_min[Встроенная память (Гб)]': '300',
+                                                              'param[Цвет]': 'золотистый'})
+
+        assert response.status_code == 200
+        names = [item.get('name') for item in response.json()['results']]
+        assert names == ['Смартфон Apple iPhone XS Max 512GB (золотистый)']
+
+    @pytest.mark.django_db
+    def test_parameter_range_requires_number(self, load_test_data):
+        """
+        The following test verifies that a range bound which is not a number is rejected
+        """
+
+        client = APIClient()
+        response = client.get('/api/v1/product-list/', data={'param_max[Диагональ (дюйм)]': 'seven'})
+
+        assert response.status_code == 400
+
+
+@pytest.fixture
+def bitmap_index(settings):
+    """
+    Fixture that enables a fresh bitmap index of the catalog for the test
+    """
+
+    settings.CATALOG_BITMAP_INDEX = True
+    reset_index()
+    yield
+    reset_index()
+
+
+def list_all_pages(client, params):
+    ids, url = [], '/api/v1/product-list/'
+    while url:
+        response = client.get(url, data=params if url == '/api/v1/product-list/' else None)
+        assert response.status_code == 200
+        ids += [item.get('id') for item in response.json()['results']]
+        url = response.json()['next']
+    return ids
+
+
+class TestBitmapIndex:
+
+    @pytest.mark.parametrize('params', [
+        {'param[Цвет]': 'черный'},
+        {'param[Цвет]': ['красный', 'черный'], 'param[Встроенная память (Гб)]': '256'},
+        {'parameter_name': 'Цвет', 'parameter_value': 'золотистый', 'category': 'смартф'},
+        {'shop': 'связ', 'model': 'apple'},
+        {'category': 'нет такой'},
+    ])
+    @pytest.mark.django_db
+    def test_index_pages_match_sql_pages(self, load_test_data, bitmap_index, settings, test_user, params):
+        """
+        The following test verifies that filters answered by the bitmap index list the same products
+        page by page as the SQL filters
+        """
+
+        client = APIClient()
+        client.force_authenticate(user=test_user())
+        params = {**params, 'page_size': 3}
+        indexed = list_all_pages(client, params)
+        cache.clear()
+        settings.CATALOG_BITMAP_INDEX = False
+
+        assert indexed == list_all_pages(client, params)
+
+    @pytest.mark.django_db
+    def test_index_rejects_tampered_cursor(self, load_test_data, bitmap_index):
+        """
+        The following test verifies that the bitmap index path answers a cursor with a non-numeric key with 404
+        """
+
+        response = APIClient().get('/api/v1/product-list/', data={'param[Цвет]': 'черный',
+                                                                  'cursor': encode_cursor('id', ['abc'])})
+
+        assert response.status_code == 404
+
+    @pytest.mark.django_db
+    def test_index_page_reads_only_the_page(self, load_test_data, bitmap_index, django_assert_max_num_queries):
+        """
+        The following test verifies that a warm index answers the filters with a single query for the page rows
+        """
+
+        get_index()
+        client = APIClient()
+        with django_assert_max_num_queries(1):
+            response = client.get('/api/v1/product-list/', data={'param[Цвет]': 'черный', 'page_size': 1})
+
+        assert response.status_code == 200
+        assert len(response.json()['results']) == 1
+        assert response.json()['results'][0].get('parameter').get('Цвет') == 'черный'
+
+    @pytest.mark.django_db
+    def test_index_follows_committed_changes(self, bitmap_index, django_capture_on_commit_callbacks):
+        """
+        The following test verifies that the index patches a shop once a change of its products is committed
+        """
+
+        import_two_shops()
+        client = APIClient()
+        assert list_all_pages(client, {'param[Цвет]': 'белый'}) == []
+
+        with django_capture_on_commit_callbacks(execute=True):
+            product = ProductInfo.objects.get(shop__name='Test shop', external_id=3)
+            ProductParameter.objects.filter(product_info=product, parameter__name='Цвет').update(value='белый')
+            product.save()
+
+        assert list_all_pages(client, {'param[Цвет]': 'белый'}) == [product.id]
+        assert list_all_pages(client, {'param[Цвет]': 'черный', 'shop': 'test'}) == product_ids(1, 2, 4, 5)
+
+    @pytest.mark.django_db
+    def test_index_reads_only_changed_products(self, bitmap_index, django_capture_on_commit_callbacks,
+                                               django_assert_num_queries):
+        """
+        The following test verifies that a committed change reads the entries of the changed products only,
+        and a stock update, which changes no indexed field, reads nothing
+        """
+
+        import_two_shops()
+        index = get_index()
+        product = ProductInfo.objects.get(shop__name='Test shop', external_id=3)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            product.save()
+        with django_assert_num_queries(1) as captured:
+            index.synchronise()
+        assert f'"product_id" IN ({product.id})' in captured.captured_queries[0]['sql']
+
+        with django_capture_on_commit_callbacks(execute=True):
+            update_stock(Shop.objects.get(name='Test shop').id, [(1, 7, 100)])
+        with django_assert_num_queries(0):
+            index.synchronise()
+
+    @pytest.mark.django_db
+    def test_positions_of_removed_products_are_reused(self, bitmap_index, django_capture_on_commit_callbacks):
+        """
+        The following test verifies that a removed product leaves the index and a new product takes its position
+        """
+
+        import_two_shops()
+        index = get_index()
+        removed, *kept = product_ids(1, 2, 3, 4, 5)
+        position, size = index.positions[removed], len(index.ids)
+        client = APIClient()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            ProductInfo.objects.filter(id=removed).delete()
+        assert list_all_pages(client, {'shop': 'test'}) == kept
+
+        with django_capture_on_commit_callbacks(execute=True):
+            other = ProductInfo.objects.get(id=kept[0])
+            product = ProductInfo.objects.create(product_name='New product', model=other.model, shop=other.shop,
+                                                 quantity=1, price=1, rrp=1)
+        assert list_all_pages(client, {'shop': 'test'}) == [*kept, product.id]
+        assert index.positions[product.id] == position
+        assert len(index.ids) == size
+
+    @pytest.mark.django_db
+    def test_index_reloads_shop_without_change_log(self, bitmap_index, django_capture_on_commit_callbacks):
+        """
+        The following test verifies that a shop whose change log is lost is reloaded from its catalog entries
+        """
+
+        import_two_shops()
+        client = APIClient()
+        assert list_all_pages(client, {'param[Цвет]': 'белый'}) == []
+
+        product = ProductInfo.objects.get(shop__name='Test shop', external_id=3)
+        ProductParameter.objects.filter(product_info=product, parameter__name='Цвет').update(value='белый')
+        refresh_catalog(id=product.id)
+        bump_shop_versions([product.shop_id])
+
+        assert list_all_pages(client, {'param[Цвет]': 'белый'}) == [product.id]
+        assert list_all_pages(client, {'shop': 'test'}) == product_ids(1, 2, 3, 4, 5)
+
+    def test_unsupported_filters_are_left_to_sql(self):
+        """
+        The following test verifies that search, price, facets and other orderings are not answered by the index
+        """
+
+        assert can_answer(QueryDict('param[Цвет]=черный&shop=test&cursor=abc'))
+        for query in ('search=phone', 'price_to=100', 'facets=true', 'ordering=price', 'parameter_name=Цвет'):
+            assert not can_answer(QueryDict(query))
+
+
+class TestProductSearch:
+
+    @pytest.mark.django_db
+    def test_search_matches_parameter_values(self, load_test_data):
+        """
+        The following test verifies that full-text search also finds products by their parameter values
+        """
+
+        client = APIClient()
+        response = client.get('/api/v1/product-list/', data={'search': 'золотистый'})
+
+        assert response.status_code == 200
+        assert response.json()['results']
+        for item in response.json()['results']:
+            assert item.get('parameter').get('Цвет') == 'золотистый'
+
+    @pytest.mark.django_db
+    def test_search_ranks_product_name_first(self, load_test_data):
+        """
+        The following test verifies that search results are ordered by relevance and split into pages
+        without repeating products
+        """
+
+        client = APIClient()
+        seen = []
+        pages = 0
+        url = '/api/v1/product-list/?search=Samsung&page_size=1'
+        while url and pages < 4:
+            response = client.get(url)
+            assert response.status_code == 200
+            seen.extend(item.get('id') for item in response.json()['results'])
+            url = response.json()['next']
+            pages += 1
+
+        assert pages == 3
+        assert len(seen) == len(set(seen)) == 3
+        first = client.get(f'/api/v1/product-list/{seen[0]}/').json()
+        assert 'Samsung' in first.get('product_name')
+
+    @pytest.mark.django_db
+    def test_rank_ordering_requires_search(self, load_test_data):
+        """
+        The following test verifies that ordering by relevance without a search is rejected
+        """
+
+        client = APIClient()
+        response = client.get('/api/v1/product-list/', data={'ordering': 'rank'})
+
+        assert response.status_code == 400
+
+
+class TestFuzzyProductSearch:
+
+    @pytest.mark.django_db
+    def test_fuzzy_search_finds_misspelled_names(self, load_test_data):
+        """
+        The following test verifies that fuzzy search finds products by misspelled Russian and English names
+        """
+
+        client = APIClient()
+        response = client.get('/api/v1/product-list/', data={'search': 'Смортфон', 'fuzzy': 'true'})
+
+        assert response.status_code == 200
+        assert response.json()['results']
+        for item in response.json()['results']:
+            assert 'Смартфон' in item.get('name')
+
+        response = client.get('/api/v1/product-list/', data={'search': 'Samsnug', 'fuzzy': 'true'})
+        assert {item.get('model') for item in response.json()['results']} == {
+            'samsung/galaxy-s20', 'samsung/galaxy-note20', 'samsung/qled-q90r'}
+
+    @pytest.mark.django_db
+    def test_fuzzy_search_uses_prefix_match_first(self, load_test_data, django_assert_num_queries):
+        """
+        The following test verifies that fuzzy search answers from the prefix match
+        without trigram comparison when it finds enough products
+        """
+
+        client = APIClient()
+        shop_names()
+
+        with django_assert_num_queries(2):
+            response = client.get('/api/v1/product-list/', data={'search': 'Smart', 'fuzzy': 'true'})
+
+        assert len(response.json()['results']) >= 5
+        for item in response.json()['results']:
+            assert 'Smart' in item.get('name')
+
+    @pytest.mark.django_db(transaction=True)
+    def test_fuzzy_search_threshold_does_not_leak(self, load_test_data):
+        """
+        The following test verifies that the trigram threshold of a fuzzy search is set for its transaction only
+        and the connection keeps the default threshold for the next requests
+        """
+
+        response = APIClient().get('/api/v1/product-list/', data={'search': 'Samsnug', 'fuzzy': 'true'})
+
+        assert response.json()['results']
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT current_setting('pg_trgm.word_similarity_threshold')")
+            assert cursor.fetchone()[0] == '0.6'
+
+    @pytest.mark.django_db
+    def test_fuzzy_search_rejects_invalid_similarity(self, load_test_data):
+        """
+        The following test verifies that a similarity threshold outside (0, 1] is rejected
+        """
+
+        client = APIClient()
+        response = client.get('/api/v1/product-list/', data={'search': 'Samsnug', 'fuzzy': 'true', 'similarity': 2})
+
+        assert response.status_code == 400
+
+
+class TestProductFacets:
+
+    @pytest.mark.django_db
+    def test_product_list_returns_facets(self, load_test_data, django_assert_num_queries):
+        """
+        The following test verifies that facet counts of all listed products are returned with the page
+        and computed with one query
+        """
+
+        client = APIClient()
+        shop_names()
+
+        with django_assert_num_queries(2):
+            response = client.get('/api/v1/product-list/', data={'facets': 'true', 'page_size': 5})
+
+        assert response.status_code == 200
+        facets = response.json()['facets']
+        assert len(response.json()['results']) == 5
+        assert sum(item['count'] for item in facets['category']) == 14
+        assert sum(item['count'] for item in facets['shop']) == 14
+        assert sum(item['count'] for item in facets['price']) == 14
+        assert {'value': 'Смартфоны', 'count': 5} in facets['category']
+        assert facets['parameters'].get('Цвет')
+
+    @pytest.mark.django_db
+    def test_facets_follow_filters_and_are_shared_by_pages(self, load_test_data, django_assert_num_queries):
+        """
+        The following test verifies that facets count only the filtered products
+        and the next page reuses the cached facets
+        """
+
+        client = APIClient()
+        response = client.get('/api/v1/product-list/', data={'facets': 'true', 'category': 'Телевизоры',
+                                                              'page_size': 2})
+        facets = response.json()['facets']
+        assert [item['value'] for item in facets['category']] == ['Телевизоры']
+        assert sum(item['count'] for item in facets['shop']) == 5
+
+        with django_assert_num_queries(1):
+            next_page = client.get(response.json()['next'])
+        assert next_page.json()['facets'] == facets
+
+    @pytest.mark.django_db
+    def test_product_list_without_facets(self, load_test_data):
+        """
+        The following test verifies that facets are only returned on request
+        """
+
+        client = APIClient()
+        response = client.get('/api/v1/product-list/')
+
+        assert 'facets' not in response.json()
+
+
+def import_two_shops():
+    CatalogImporter().run(make_feed(goods=5))
+    feed = make_feed(goods=5)
+    feed['shop'] = 'Other shop'
+    CatalogImporter().run(feed)
+
+
+class TestOrderingAndIdFilters:
+
+    @pytest.mark.parametrize('ordering, field, reverse', [
+        ('name', 'name', False),
+        ('-name', 'name', True),
+        ('quantity', 'quantity', False),
+        ('-quantity', 'quantity', True),
+    ])
+    @pytest.mark.django_db
+    def test_product_list_orderings(self, ordering, field, reverse):
+        """
+        The following test verifies that pages ordered by name or quantity follow each other
+        without repeating or losing products
+        """
+
+        CatalogImporter().run(make_feed(goods=12))
+        client = APIClient()
+        ids = list_all_pages(client, {'ordering': ordering, 'page_size': 5})
+        values = [CatalogEntry.objects.values_list('product_name' if field == 'name' else field, flat=True)
+                  .get(product_id=product_id) for product_id in ids]
+
+        assert sorted(ids) == product_ids(*range(1, 13))
+        assert values == sorted(values, reverse=reverse)
+
+    @pytest.mark.django_db
+    def test_product_list_rejects_unknown_ordering(self, load_test_data):
+        """
+        The following test verifies that orderings outside the whitelist are rejected
+        """
+
+        client = APIClient()
+        response = client.get('/api/v1/product-list/', data={'ordering': 'rrp'})
+
+        assert response.status_code == 400
+
+    @pytest.mark.django_db
+    def test_product_list_id_filters(self):
+        """
+        The following test verifies that shops and categories are filtered by exact id
+        """
+
+        import_two_shops()
+        client = APIClient()
+        other_shop = Shop.objects.get(name='Other shop')
+        category = Category.objects.get(name='Смартфоны')
+
+        assert list_all_pages(client, {'shop_id': other_shop.id}) == product_ids(1, 2, 3, 4, 5, shop='Other shop')
+        assert list_all_pages(client, {'shop_id': other_shop.id, 'category_id': category.id}) == \
+            product_ids(2, 4, shop='Other shop')
+        assert list_all_pages(client, {'shop_id': 0}) == []
+
+    @pytest.mark.django_db
+    def test_product_list_in_stock_filter(self):
+        """
+        The following test verifies that in_stock selects products by a positive quantity
+        """
+
+        CatalogImporter().run(make_feed(goods=4))
+        CatalogEntry.objects.filter(product_id__in=product_ids(2)).update(quantity=0)
+        client = APIClient()
+
+        assert list_all_pages(client, {'in_stock': 'true', 'ordering': 'price'}) == product_ids(1, 3, 4)
+        assert list_all_pages(client, {'in_stock': 'false'}) == product_ids(2)
+
+
+class TestSparseFieldsets:
+
+    @pytest.mark.django_db
+    def test_product_list_returns_requested_fields(self, load_test_data):
+        """
+        The following test verifies that ?fields= limits every product of the list to the requested fields
+        """
+
+        client = APIClient()
+        response = client.get('/api/v1/product-list/', data={'fields': 'price, id', 'ordering': '-name'})
+
+        assert response.status_code == 200
+        results = response.json()['results']
+        assert len(results) == 14
+        for item in results:
+            assert set(item) == {'id', 'price'}
+
+    @pytest.mark.django_db
+    def test_sparse_pages_keep_their_cursor(self):
+        """
+        The following test verifies that pages ordered by a field which is not requested still follow each other
+        """
+
+        CatalogImporter().run(make_feed(goods=7))
+        client = APIClient()
+
+        ids = list_all_pages(client, {'fields': 'id', 'ordering': '-quantity', 'page_size': 3})
+        assert ids == product_ids(7, 6, 5, 4, 3, 2, 1)
+
+    @pytest.mark.django_db
+    def test_product_list_rejects_unknown_fields(self, load_test_data):
+        """
+        The following test verifies that unknown fields are rejected
+        """
+
+        client = APIClient()
+        response = client.get('/api/v1/product-list/', data={'fields': 'id,rrp'})
+
+        assert response.status_code == 400
+
+    @pytest.mark.django_db
+    def test_plain_rows_match_serializer(self, load_test_data):
+        """
+        The following test verifies that the plain product list representation is the serializer's one
+        and is rendered to the same JSON
+        """
+
+        rows = list(CatalogEntry.objects.values('product_id', 'product_name', 'model_name', 'category_name',
+                                                'shop_name', 'parameters', 'price', 'quantity'))
+        data = product_list_data(rows)
+
+        assert data == ProductListSerializer(rows, many=True).data
+        assert json.loads(FastJSONRenderer().render({'results': data})) == {'results': data}
+
+
+def from_columnar(page):
+    dictionaries = page['dictionaries']
+    results = []
+    for row in page['rows']:
+        item = dict(zip(page['columns'], row))
+        for field in ('model', 'category', 'shop'):
+            if field in item:
+                item[field] = dictionaries[field][item[field]]
+        if 'parameter' in item:
+            item['parameter'] = {dictionaries['parameter'][index]: value for index, value in item['parameter']}
+        results.append(item)
+    return results
+
+
+class TestColumnarFormat:
+
+    @pytest.mark.django_db
+    def test_columnar_page_holds_the_same_products(self, load_test_data):
+        """
+        The following test verifies that a columnar page lists the same products as the default representation
+        in a smaller body, with shops, categories, models and parameter names stored once
+        """
+
+        client = APIClient()
+        default = client.get('/api/v1/product-list/')
+        columnar = client.get('/api/v1/product-list/', data={'format': 'columnar'})
+
+        assert columnar.status_code == 200
+        assert columnar['Content-Type'].startswith('application/vnd.catalog.columnar+json')
+        page = json.loads(columnar.content)
+        assert page['dictionaries']['shop'] == ['Связной']
+        assert len(page['dictionaries']['parameter']) == len(set(page['dictionaries']['parameter']))
+        assert from_columnar(page) == default.json()['results']
+        assert len(columnar.content) < len(default.content)
+
+    @pytest.mark.django_db
+    def test_columnar_page_follows_fields_and_accept_header(self, load_test_data):
+        """
+        The following test verifies that the columnar format is selected by the Accept header
+        and keeps only the requested fields
+        """
+
+        client = APIClient()
+        response = client.get('/api/v1/product-list/', data={'fields': 'id,category', 'page_size': 2},
+                              HTTP_ACCEPT='application/vnd.catalog.columnar+json')
+
+        page = json.loads(response.content)
+        assert page['columns'] == ['id', 'category']
+        assert set(page['dictionaries']) == {'category'}
+        assert len(page['rows']) == 2
+        assert page['next'] is not None
+
+
+class TestProductListCache:
+
+    @pytest.mark.django_db
+    def test_repeated_product_list_is_served_from_cache(self, django_assert_num_queries):
+        """
+        The following test verifies that a repeated product list request is answered from the cache
+        without database queries
+        """
+
+        import_two_shops()
+        client = APIClient()
+
+        response = client.get('/api/v1/product-list/', data={'ordering': 'price'})
+        assert response['X-Cache'] == 'MISS'
+
+        with django_assert_num_queries(0):
+            cached = client.get('/api/v1/product-list/', data={'ordering': 'price'})
+        assert cached['X-Cache'] == 'HIT'
+        assert cached.json() == response.json()
+
+    @pytest.mark.django_db
+    def test_product_save_invalidates_only_its_shop(self, django_capture_on_commit_callbacks):
+        """
+        The following test verifies that saving a product invalidates cached pages of its shop
+        and keeps pages of other shops cached
+        """
+
+        import_two_shops()
+        client = APIClient()
+        client.get('/api/v1/product-list/', data={'shop': 'test'})
+        client.get('/api/v1/product-list/', data={'shop': 'other'})
+
+        with django_capture_on_commit_callbacks(execute=True):
+            product = ProductInfo.objects.get(shop__name='Test shop', external_id=1)
+            product.quantity = 1000
+            product.save()
+
+        response = client.get('/api/v1/product-list/', data={'shop': 'test'})
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['results'][0].get('quantity') == 1000
+        assert client.get('/api/v1/product-list/', data={'shop': 'other'})['X-Cache'] == 'HIT'
+
+    @pytest.mark.django_db
+    def test_cached_product_is_invalidated_by_save(self, django_capture_on_commit_callbacks):
+        """
+        The following test verifies that a certain product is cached until a product of its shop is saved
+        """
+
+        import_two_shops()
+        client = APIClient()
+        first, second = product_ids(1, 2)
+        other = product_ids(1, shop='Other shop')[0]
+
+        assert client.get(f'/api/v1/product-list/{first}/')['X-Cache'] == 'MISS'
+        assert client.get(f'/api/v1/product-list/{first}/')['X-Cache'] == 'HIT'
+
+        with django_capture_on_commit_callbacks(execute=True):
+            product = ProductInfo.objects.get(id=second)
+            product.price = 1
+            product.save()
+
+        assert client.get(f'/api/v1/product-list/{first}/')['X-Cache'] == 'MISS'
+        assert client.get(f'/api/v1/product-list/{other}/')['X-Cache'] == 'MISS'
+
+    @pytest.mark.django_db
+    def test_admin_views_cache_counters(self, test_admin_user):
+        """
+        The following test verifies that the administrator can view hit and miss counters of the catalog cache
+        """
+
+        import_two_shops()
+        client = APIClient()
+        client.force_authenticate(user=test_admin_user())
+        client.get('/api/v1/product-list/')
+        client.get('/api/v1/product-list/')
+        client.get('/api/v1/product-list/')
+
+        response = client.get('/api/v1/catalog-cache/')
+
+        assert response.status_code == 200
+        assert response.json() == {'hits': 2, 'misses': 1, 'hit_ratio': 0.6667}
+
+    @pytest.mark.django_db
+    def test_user_cannot_view_cache_counters(self, test_user):
+        """
+        The following test verifies that cache counters are not available to users without administrator privileges
+        """
+
+        client = APIClient()
+        client.force_authenticate(user=test_user())
+
+        response = client.get('/api/v1/catalog-cache/')
+
+        assert response.status_code == 403
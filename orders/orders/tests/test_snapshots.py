@@ -0,0 +1,132 @@
+import gzip
+import json
+import os
+
+import pytest
+from django.core.management import call_command
+from django.db import connections
+from rest_framework.test import APIClient
+
+from backend.importer import CatalogImporter, write_feed
+from backend.models import CatalogEntry, Category, Shop
+from backend.snapshots import build_snapshots, snapshot_root
+from backend.tasks import SNAPSHOTS_LOCK, build_catalog_snapshots
+from orders.tests.test_import import make_feed
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    """
+    Fixture that points MEDIA_ROOT to a temporary directory
+    """
+
+    settings.MEDIA_ROOT = str(tmp_path)
+    return tmp_path
+
+
+def read_snapshot(url, media_root, suffix=''):
+    path = os.path.join(str(media_root), url.removeprefix('/media/') + suffix)
+    with open(path, 'rb') as file:
+        content = file.read()
+    return json.loads(gzip.decompress(content) if suffix == '.gz' else content)
+
+
+class TestCatalogSnapshots:
+
+    @pytest.mark.django_db
+    def test_snapshots_hold_first_pages(self, media_root):
+        """
+        The following test verifies that every category and shop gets a snapshot of its first product list page,
+        the same as the API returns, with a gzipped copy and a next link continuing through the API
+        """
+
+        CatalogImporter().run(make_feed(goods=45))
+        index = build_snapshots()
+        category = Category.objects.get(name='Телевизоры')
+        shop = Shop.objects.get(name='Test shop')
+
+        assert [item['id'] for item in index['categories']] == sorted(Category.objects.values_list('id', flat=True))
+        assert [(item['id'], item['name']) for item in index['shops']] == [(shop.id, 'Test shop')]
+
+        url = next(item['url'] for item in index['categories'] if item['id'] == category.id)
+        snapshot = read_snapshot(url, media_root)
+        assert snapshot == read_snapshot(url, media_root, '.gz')
+        api_page = APIClient().get('/api/v1/product-list/', data={'category_id': category.id}).json()
+        assert snapshot['results'] == api_page['results']
+        assert snapshot['next'].startswith(f'/api/v1/product-list/?category_id={category.id}&cursor=')
+
+        # Goods of one model belong to both categories of the feed, a category lists the entries of its models
+        names = list(CatalogEntry.objects.filter(category_id=category.id).order_by('product_id')
+                     .values_list('product_name', flat=True))
+        assert 20 < len(names) <= 40
+        next_page = APIClient().get(snapshot['next']).json()
+        assert [item['name'] for item in snapshot['results']] == names[:20]
+        assert [item['name'] for item in next_page['results']] == names[20:]
+        assert next_page['next'] is None
+
+    @pytest.mark.django_db
+    def test_new_version_replaces_index_and_old_versions(self, media_root):
+        """
+        The following test verifies that every build switches the index to a new version
+        and keeps only the previous version besides it
+        """
+
+        CatalogImporter().run(make_feed(goods=3))
+        versions = [build_snapshots()['version'] for _ in range(3)]
+
+        assert len(set(versions)) == 3
+        assert sorted(name for name in os.listdir(snapshot_root()) if name != 'index.json') == versions[1:]
+        with open(os.path.join(snapshot_root(), 'index.json'), encoding='utf-8') as file:
+            assert json.load(file)['version'] == versions[-1]
+
+    @pytest.mark.django_db
+    def test_index_endpoint(self, media_root):
+        """
+        The following test verifies that the index endpoint returns the current snapshots with an ETag
+        and answers a repeated request with 304
+        """
+
+        client = APIClient()
+        assert client.get('/api/v1/catalog-snapshots/').status_code == 404
+
+        CatalogImporter().run(make_feed(goods=3))
+        index = build_snapshots()
+        response = client.get('/api/v1/catalog-snapshots/')
+
+        assert response.status_code == 200
+        assert response.json() == index
+        assert client.get('/api/v1/catalog-snapshots/', HTTP_IF_NONE_MATCH=response['ETag']).status_code == 304
+
+    @pytest.mark.django_db
+    def test_task_skips_while_another_build_runs(self, media_root):
+        """
+        The following test verifies that the snapshot task does not run next to a build of another worker,
+        which holds the advisory lock on its own connection
+        """
+
+        CatalogImporter().run(make_feed(goods=3))
+        other = connections.create_connection('default')
+        try:
+            with other.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_lock(hashtext(%s))', [SNAPSHOTS_LOCK])
+            assert build_catalog_snapshots() == {'status': 'skipped'}
+        finally:
+            other.close()
+
+        assert build_catalog_snapshots()['snapshots'] == 3
+
+    @pytest.mark.django_db
+    def test_parse_data_rebuilds_snapshots(self, media_root, celery_eager, tmp_path,
+                                           django_capture_on_commit_callbacks):
+        """
+        The following test verifies that price lists imported by the command rebuild the snapshots
+        """
+
+        path = str(tmp_path / 'shop.yaml')
+        write_feed(make_feed(goods=3), path)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            call_command('parse_data', file=path, workers=1, stdout=open(os.devnull, 'w'))
+
+        with open(os.path.join(snapshot_root(), 'index.json'), encoding='utf-8') as file:
+            assert len(json.load(file)['categories']) == 2
@@ -0,0 +1,136 @@
+import os
+
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from backend.importer import CatalogImporter
+from backend.importer.stock import update_stock
+from backend.models import ProductInfo, Shop, CatalogEntry
+from orders.tests.test_import import make_feed
+
+
+class TestStockUpdate:
+
+    @pytest.mark.django_db
+    def test_admin_updates_stock_with_json(self, test_admin_user):
+        """
+        The following test verifies that quantity and price are updated by supplier id within the shop
+        """
+
+        CatalogImporter().run(make_feed(goods=10))
+        shop = Shop.objects.get(name='Test shop')
+        client = APIClient()
+        client.force_authenticate(user=test_admin_user())
+
+        response = client.post(f'/api/v1/shops/{shop.id}/stock/',
+                               data=[[1, 0, '99.90'], {'external_id': 2, 'quantity': 7, 'price': 5}, [999, 1, 1]],
+                               format='json')
+
+        assert response.status_code == 200
+        assert response.json() == {'updated': 2, 'not_found': 1}
+        product = ProductInfo.objects.get(external_id=1)
+        assert (product.quantity, str(product.price), product.fingerprint) == (0, '99.90', '')
+        assert ProductInfo.objects.get(external_id=2).quantity == 7
+        assert ProductInfo.objects.get(external_id=3).quantity == 3
+        entry = CatalogEntry.objects.get(product__external_id=1)
+        assert (entry.quantity, str(entry.price)) == (0, '99.90')
+
+    @pytest.mark.django_db
+    def test_admin_updates_stock_with_csv(self, test_admin_user):
+        """
+        The following test verifies that the endpoint accepts CSV rows with a header line
+        """
+
+        CatalogImporter().run(make_feed(goods=10))
+        shop = Shop.objects.get(name='Test shop')
+        client = APIClient()
+        client.force_authenticate(user=test_admin_user())
+
+        response = client.post(f'/api/v1/shops/{shop.id}/stock/', data='external_id,quantity,price\n4,40,400\n',
+                               content_type='text/csv')
+
+        assert response.status_code == 200
+        assert ProductInfo.objects.get(external_id=4).quantity == 40
+
+    @pytest.mark.django_db
+    def test_invalid_rows_are_rejected(self, test_admin_user):
+        """
+        The following test verifies that no product is updated when a row is invalid
+        """
+
+        CatalogImporter().run(make_feed(goods=10))
+        shop = Shop.objects.get(name='Test shop')
+        client = APIClient()
+        client.force_authenticate(user=test_admin_user())
+
+        response = client.post(f'/api/v1/shops/{shop.id}/stock/', data=[[1, 5, 5], [2, -1, 5]], format='json')
+
+        assert response.status_code == 400
+        assert ProductInfo.objects.get(external_id=1).quantity == 1
+
+    @pytest.mark.parametrize('row', [
+        [1, 2 ** 31, 5],
+        [1, 5, '12345678901.00'],
+        [1, 5, '1.001'],
+        [2 ** 63, 5, 5],
+    ])
+    @pytest.mark.django_db
+    def test_out_of_range_rows_are_rejected(self, test_admin_user, row):
+        """
+        The following test verifies that quantities, prices and supplier ids which do not fit their columns
+        are rejected as invalid rows
+        """
+
+        CatalogImporter().run(make_feed(goods=10))
+        shop = Shop.objects.get(name='Test shop')
+        client = APIClient()
+        client.force_authenticate(user=test_admin_user())
+
+        response = client.post(f'/api/v1/shops/{shop.id}/stock/', data=[[2, 5, 5], row], format='json')
+
+        assert response.status_code == 400
+        assert ProductInfo.objects.get(external_id=2).quantity == 2
+
+    @pytest.mark.django_db
+    def test_repeated_ids_are_counted_once(self):
+        """
+        The following test verifies that a supplier id repeated in several batches is counted once
+        as updated or not found
+        """
+
+        CatalogImporter().run(make_feed(goods=10))
+        shop = Shop.objects.get(name='Test shop')
+        rows = [(1, 5, 5), (999, 1, 1), (999, 2, 2), (1, 6, 6), (998, 1, 1)]
+
+        assert update_stock(shop.id, rows, batch_size=2) == (1, 2)
+        assert ProductInfo.objects.get(external_id=1).quantity == 6
+
+    @pytest.mark.django_db
+    def test_user_cannot_update_stock(self, test_user):
+        """
+        The following test verifies that a user without administrator privileges cannot update stock
+        """
+
+        CatalogImporter().run(make_feed(goods=1))
+        client = APIClient()
+        client.force_authenticate(user=test_user())
+
+        response = client.post(f'/api/v1/shops/{Shop.objects.get().id}/stock/', data=[[1, 5, 5]], format='json')
+
+        assert response.status_code == 403
+
+    @pytest.mark.django_db
+    def test_update_stock_command(self, tmp_path):
+        """
+        The following test verifies that the command applies a CSV file of stock rows in batches
+        """
+
+        CatalogImporter().run(make_feed(goods=10))
+        path = tmp_path / 'stock.csv'
+        path.write_text(''.join(f'{number},{number * 10},{number}.5\n' for number in range(1, 11)))
+
+        call_command('update_stock', str(path), shop='Test shop', batch_size=3, stdout=open(os.devnull, 'w'))
+
+        assert list(ProductInfo.objects.order_by('external_id').values_list('quantity', flat=True)) == \
+            [number * 10 for number in range(1, 11)]